@@ -9,6 +9,9 @@ from . import capacity
 from . import round_trips
 from . import risk
 from . import perf_attrib
+from . import var
+from . import costs
+from . import market_data
 
 from .tears import *  # noqa
 from .plotting import *  # noqa
@@ -27,4 +30,4 @@ del get_versions
 
 __all__ = ['utils', 'timeseries', 'pos', 'txn', 'bayesian',
            'interesting_periods', 'capacity', 'round_trips',
-           'risk', 'perf_attrib']
+           'risk', 'perf_attrib', 'var', 'costs', 'market_data']
@@ -1,10 +1,14 @@
 from __future__ import division
 
+import warnings
+from collections import OrderedDict
+
 import empyrical as ep
 import numpy as np
 import pandas as pd
 
-from . import pos
+from . import txn
+from .market_data import ADV_CACHE
 
 
 def daily_txns_with_bar_data(transactions, market_data):
@@ -15,10 +19,10 @@ def daily_txns_with_bar_data(transactions, market_data):
 
     Parameters
     ----------
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame, txn.Transactions or txn.TransactionAggregator
         Prices and amounts of executed trades. One row per trade.
         - See full explanation in tears.create_full_tear_sheet
-    market_data : pd.Panel
+    market_data : pd.Panel or market_data.MarketData
         Contains "volume" and "price" DataFrames for the tickers
         in the passed positions DataFrames
 
@@ -30,10 +34,8 @@ def daily_txns_with_bar_data(transactions, market_data):
         the corresponding ticker, respectively.
     """
 
-    transactions.index.name = 'date'
-    txn_daily = pd.DataFrame(transactions.assign(
-        amount=abs(transactions.amount)).groupby(
-        ['symbol', pd.TimeGrouper('D')]).sum()['amount'])
+    transactions = txn.to_transactions(transactions)
+    txn_daily = pd.DataFrame(transactions.daily_symbol_amounts())
     txn_daily['price'] = market_data['price'].unstack()
     txn_daily['volume'] = market_data['volume'].unstack()
 
@@ -42,10 +44,94 @@ def daily_txns_with_bar_data(transactions, market_data):
     return txn_daily
 
 
+def _union(left, right):
+    """Union of two indexes, as aligned by DataFrame arithmetic."""
+
+    return left if left.equals(right) else left.union(right)
+
+
+def _trailing_dollar_volume(market_data, window, symbols=None,
+                            dtype=np.float64, volume=None, price=None):
+    """
+    Mean daily dollar volume over the window days before each day, as
+    a market dates x symbols DataFrame, with zero volume as NaN.
+
+    Taken from market_data.ADV_CACHE when all symbols are requested,
+    where it is stored with zeros already masked, so the cached frame
+    is returned without a copy.
+    """
+
+    if symbols is None:
+        return ADV_CACHE.dollar_volume(market_data, window, dtype=dtype,
+                                       zero_as_nan=True)
+
+    if volume is None:
+        volume = market_data['volume']
+    if price is None:
+        price = market_data['price']
+    DV = volume.reindex(columns=symbols).astype(dtype) * \
+        price.reindex(columns=symbols).astype(dtype)
+    roll_mean_dv = DV.rolling(window=window, center=False).mean().shift()
+
+    return roll_mean_dv.replace(0, np.nan)
+
+
+def _days_to_liquidate_chunks(positions, market_data, max_bar_consumption,
+                              capital_base, mean_volume_window, chunk_size,
+                              dtype):
+    """
+    Days to liquidate and portfolio allocations, computed for
+    chunk_size symbols at a time.
+
+    Returns the dates and symbols of the full result, and a generator
+    of (columns, days_to_liquidate, positions_alloc) for each chunk,
+    where columns is a slice of symbols and the others are dates x
+    chunk arrays of dtype.
+    """
+
+    volume = market_data['volume']
+    price = market_data['price']
+    portfolio_value = positions.sum(axis='columns')
+    positions = positions.drop('cash', axis=1)
+
+    market_dates = _union(volume.index, price.index)
+    dates = _union(positions.index, market_dates)
+    symbols = _union(positions.columns,
+                     _union(volume.columns, price.columns))
+    if chunk_size is None:
+        chunk_size = max(len(symbols), 1)
+
+    def chunks():
+        for start in range(0, len(symbols), chunk_size):
+            columns = slice(start, start + chunk_size)
+            chunk = symbols[columns]
+
+            roll_mean_dv = _trailing_dollar_volume(
+                market_data, mean_volume_window,
+                None if len(chunk) == len(symbols) else chunk, dtype,
+                volume=volume, price=price).reindex(columns=chunk)
+
+            positions_alloc = positions.reindex(columns=chunk).divide(
+                portfolio_value, axis='rows')
+
+            days_to_liquidate = (positions_alloc * capital_base) / \
+                (max_bar_consumption * roll_mean_dv)
+
+            yield (columns,
+                   days_to_liquidate.reindex(index=dates).values
+                   .astype(dtype, copy=False),
+                   positions_alloc.reindex(index=dates).values
+                   .astype(dtype, copy=False))
+
+    return dates, symbols, chunks()
+
+
 def days_to_liquidate_positions(positions, market_data,
                                 max_bar_consumption=0.2,
                                 capital_base=1e6,
-                                mean_volume_window=5):
+                                mean_volume_window=5,
+                                chunk_size=None,
+                                dtype=np.float64):
     """
     Compute the number of days that would have been required
     to fully liquidate each position on each day based on the
@@ -63,7 +149,7 @@ def days_to_liquidate_positions(positions, market_data,
     positions: pd.DataFrame
         Contains daily position values including cash
         - See full explanation in tears.create_full_tear_sheet
-    market_data : pd.Panel
+    market_data : pd.Panel or market_data.MarketData
         Panel with items axis of 'price' and 'volume' DataFrames.
         The major and minor axes should match those of the
         the passed positions DataFrame (same dates and symbols).
@@ -75,6 +161,12 @@ def days_to_liquidate_positions(positions, market_data,
         position value that needs liquidating.
     mean_volume_window : float
         Trailing window to use in mean volume calculation.
+    chunk_size : int, optional
+        Number of symbols processed at a time, to bound the memory
+        used by intermediate results. Defaults to all symbols at once.
+    dtype : np.dtype, optional
+        Float type of the computation and result, e.g. np.float32 to
+        halve memory use.
 
     Returns
     -------
@@ -83,16 +175,16 @@ def days_to_liquidate_positions(positions, market_data,
         Datetime index, symbols as columns.
     """
 
-    DV = market_data['volume'] * market_data['price']
-    roll_mean_dv = DV.rolling(window=mean_volume_window,
-                              center=False).mean().shift()
-    roll_mean_dv = roll_mean_dv.replace(0, np.nan)
+    dates, symbols, chunks = _days_to_liquidate_chunks(
+        positions, market_data, max_bar_consumption, capital_base,
+        mean_volume_window, chunk_size, dtype)
 
-    positions_alloc = pos.get_percent_alloc(positions)
-    positions_alloc = positions_alloc.drop('cash', axis=1)
+    days_to_liquidate = np.empty((len(dates), len(symbols)), dtype=dtype)
+    for columns, chunk_days, _ in chunks:
+        days_to_liquidate[:, columns] = chunk_days
 
-    days_to_liquidate = (positions_alloc * capital_base) / \
-        (max_bar_consumption * roll_mean_dv)
+    days_to_liquidate = pd.DataFrame(days_to_liquidate, index=dates,
+                                     columns=symbols)
 
     return days_to_liquidate.iloc[mean_volume_window:]
 
@@ -101,7 +193,9 @@ def get_max_days_to_liquidate_by_ticker(positions, market_data,
                                         max_bar_consumption=0.2,
                                         capital_base=1e6,
                                         mean_volume_window=5,
-                                        last_n_days=None):
+                                        last_n_days=None,
+                                        chunk_size=None,
+                                        dtype=np.float64):
     """
     Finds the longest estimated liquidation time for each traded
     name over the course of backtest (or last n days of the backtest).
@@ -111,7 +205,7 @@ def get_max_days_to_liquidate_by_ticker(positions, market_data,
     positions: pd.DataFrame
         Contains daily position values including cash
         - See full explanation in tears.create_full_tear_sheet
-    market_data : pd.Panel
+    market_data : pd.Panel or market_data.MarketData
         Panel with items axis of 'price' and 'volume' DataFrames.
         The major and minor axes should match those of the
         the passed positions DataFrame (same dates and symbols).
@@ -125,6 +219,12 @@ def get_max_days_to_liquidate_by_ticker(positions, market_data,
         Trailing window to use in mean volume calculation.
     last_n_days : integer
         Compute for only the last n days of the passed backtest data.
+    chunk_size : int, optional
+        Number of symbols processed at a time.
+        - See full explanation in days_to_liquidate_positions.
+    dtype : np.dtype, optional
+        Float type of the computation.
+        - See full explanation in days_to_liquidate_positions.
 
     Returns
     -------
@@ -134,29 +234,125 @@ def get_max_days_to_liquidate_by_ticker(positions, market_data,
         date and position_alloc on that day.
     """
 
-    dtlp = days_to_liquidate_positions(positions, market_data,
-                                       max_bar_consumption=max_bar_consumption,
-                                       capital_base=capital_base,
-                                       mean_volume_window=mean_volume_window)
+    return _worst_days_to_liquidate(
+        positions, market_data, [last_n_days], max_bar_consumption,
+        capital_base, mean_volume_window, chunk_size, dtype)[last_n_days]
 
-    if last_n_days is not None:
-        dtlp = dtlp.loc[dtlp.index.max() - pd.Timedelta(days=last_n_days):]
 
-    pos_alloc = pos.get_percent_alloc(positions)
-    pos_alloc = pos_alloc.drop('cash', axis=1)
+def _trailing_argmax(values, starts):
+    """
+    Row of the max of values[start:] in each column, for each start.
 
-    liq_desc = pd.DataFrame()
-    liq_desc['days_to_liquidate'] = dtlp.unstack()
-    liq_desc['pos_alloc_pct'] = pos_alloc.unstack() * 100
-    liq_desc.index.levels[0].name = 'symbol'
-    liq_desc.index.levels[1].name = 'date'
+    All windows are served by one pass over the rows: the rows are
+    split at the starts, each segment is reduced once, and segments are
+    combined from the last one back. Ties resolve to the earliest row.
+    Columns with only NaNs after a start get -1.
+    """
+
+    n_rows, n_cols = values.shape
+    cols = np.arange(n_cols)
+    missing = np.isnan(values)
+    filled = np.where(missing, -np.inf, values)
+
+    best_rows = np.full(n_cols, -1, dtype=int)
+    best = np.full(n_cols, -np.inf)
+    worst_rows = np.empty((len(starts), n_cols), dtype=int)
+
+    end = n_rows
+    for i in np.argsort(starts, kind='mergesort')[::-1]:
+        start = starts[i]
+        if start < end:
+            rows = start + np.argmax(filled[start:end], axis=0)
+            update = ~missing[rows, cols] & (filled[rows, cols] >= best)
+            best_rows = np.where(update, rows, best_rows)
+            best = np.where(update, filled[rows, cols], best)
+            end = start
+        worst_rows[i] = best_rows
 
-    worst_liq = liq_desc.reset_index().sort_values(
-        'days_to_liquidate', ascending=False).groupby('symbol').first()
+    return worst_rows
+
+
+def _worst_days_to_liquidate(positions, market_data, windows,
+                             max_bar_consumption, capital_base,
+                             mean_volume_window, chunk_size, dtype):
+    """
+    get_max_days_to_liquidate_by_ticker for each last_n_days in windows.
+    """
+
+    dates, symbols, chunks = _days_to_liquidate_chunks(
+        positions, market_data, max_bar_consumption, capital_base,
+        mean_volume_window, chunk_size, dtype)
+
+    starts = []
+    for last_n_days in windows:
+        first_row = mean_volume_window
+        if last_n_days is not None:
+            cutoff = dates[first_row:].max() - pd.Timedelta(days=last_n_days)
+            first_row = max(first_row, dates.searchsorted(cutoff))
+        starts.append(first_row)
+
+    worst_rows = np.empty((len(windows), len(symbols)), dtype=int)
+    worst_days = np.empty((len(windows), len(symbols)))
+    worst_alloc = np.empty((len(windows), len(symbols)))
+    for columns, chunk_days, chunk_alloc in chunks:
+        rows = _trailing_argmax(chunk_days, starts)
+        cols = np.arange(rows.shape[1])
+        worst_rows[:, columns] = rows
+        worst_days[:, columns] = chunk_days[rows, cols]
+        worst_alloc[:, columns] = chunk_alloc[rows, cols]
+
+    worst_liq = OrderedDict()
+    for i, last_n_days in enumerate(windows):
+        found = worst_rows[i] >= 0
+        worst_liq[last_n_days] = pd.DataFrame(OrderedDict([
+            ('date', dates[worst_rows[i]].where(found)),
+            ('days_to_liquidate', np.where(found, worst_days[i], np.nan)),
+            ('pos_alloc_pct',
+             np.where(found, worst_alloc[i] * 100, np.nan)),
+        ]), index=pd.Index(symbols, name='symbol')).sort_index()
 
     return worst_liq
 
 
+def _worst_bar_consumption(transactions, market_data, windows):
+    """
+    get_low_liquidity_transactions for each last_n_days in windows.
+    """
+
+    transactions = txn.to_transactions(transactions)
+    amounts = transactions.daily_symbol_amounts().unstack('symbol')
+    volume = market_data['volume'].reindex(index=amounts.index,
+                                           columns=amounts.columns)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct_bar_consumed = (amounts.values / volume.values) * 100
+
+    dates = amounts.index
+    starts = []
+    for last_n_days in windows:
+        first_row = 0
+        if last_n_days is not None:
+            cutoff = dates.max() - pd.Timedelta(days=last_n_days)
+            first_row = dates.searchsorted(cutoff, side='right')
+        starts.append(first_row)
+
+    worst_rows = _trailing_argmax(pct_bar_consumed, starts)
+    cols = np.arange(len(amounts.columns))
+
+    worst_txns = OrderedDict()
+    for i, last_n_days in enumerate(windows):
+        traded = ~np.isnan(amounts.values[starts[i]:]).all(axis=0)
+        found = worst_rows[i] >= 0
+        worst = pd.DataFrame(OrderedDict([
+            ('date', dates[worst_rows[i]].where(found)),
+            ('max_pct_bar_consumed',
+             np.where(found, pct_bar_consumed[worst_rows[i], cols],
+                      np.nan)),
+        ]), index=amounts.columns)
+        worst_txns[last_n_days] = worst[traded]
+
+    return worst_txns
+
+
 def get_low_liquidity_transactions(transactions, market_data,
                                    last_n_days=None):
     """
@@ -165,10 +361,10 @@ def get_low_liquidity_transactions(transactions, market_data,
 
     Parameters
     ----------
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame or txn.Transactions
         Prices and amounts of executed trades. One row per trade.
          - See full explanation in create_full_tear_sheet.
-    market_data : pd.Panel
+    market_data : pd.Panel or market_data.MarketData
         Panel with items axis of 'price' and 'volume' DataFrames.
         The major and minor axes should match those of the
         the passed positions DataFrame (same dates and symbols).
@@ -176,21 +372,254 @@ def get_low_liquidity_transactions(transactions, market_data,
         Compute for only the last n days of the passed backtest data.
     """
 
-    txn_daily_w_bar = daily_txns_with_bar_data(transactions, market_data)
-    txn_daily_w_bar.index.name = 'date'
-    txn_daily_w_bar = txn_daily_w_bar.reset_index()
+    return _worst_bar_consumption(
+        transactions, market_data, [last_n_days])[last_n_days]
+
+
+def gen_liquidity_reports(positions, transactions, market_data,
+                          windows=(None,),
+                          max_bar_consumption=0.2,
+                          capital_base=1e6,
+                          mean_volume_window=5,
+                          chunk_size=None,
+                          dtype=np.float64):
+    """
+    Worst liquidation times and bar consumption of each traded name,
+    over the whole backtest and any number of trailing windows.
+
+    The trailing dollar volume and the join of daily transactions with
+    bar data are computed once, and the worst days of all windows are
+    found in a single pass over each. Equivalent to calling
+    get_max_days_to_liquidate_by_ticker and
+    get_low_liquidity_transactions for each window.
+
+    Parameters
+    ----------
+    positions : pd.DataFrame
+        Contains daily position values including cash
+        - See full explanation in tears.create_full_tear_sheet
+    transactions : pd.DataFrame or txn.Transactions
+        Prices and amounts of executed trades. One row per trade.
+         - See full explanation in create_full_tear_sheet.
+    market_data : pd.Panel or market_data.MarketData
+        Panel with items axis of 'price' and 'volume' DataFrames.
+    windows : list-like, optional
+        Values of last_n_days to report on. None stands for the
+        whole backtest.
+    max_bar_consumption : float, optional
+        Max proportion of a daily bar that can be consumed in the
+        process of liquidating a position.
+    capital_base : integer, optional
+        Capital base multiplied by portfolio allocation to compute
+        position value that needs liquidating.
+    mean_volume_window : int, optional
+        Trailing window to use in mean volume calculation.
+    chunk_size : int, optional
+        Number of symbols processed at a time.
+        - See full explanation in days_to_liquidate_positions.
+    dtype : np.dtype, optional
+        Float type of the days to liquidate computation.
+        - See full explanation in days_to_liquidate_positions.
+
+    Returns
+    -------
+    max_days_to_liquidate : OrderedDict
+        Each window mapped to its get_max_days_to_liquidate_by_ticker
+        result.
+    low_liquidity_transactions : OrderedDict
+        Each window mapped to its get_low_liquidity_transactions
+        result.
+    """
+
+    windows = list(windows)
+    max_days_to_liquidate = _worst_days_to_liquidate(
+        positions, market_data, windows, max_bar_consumption,
+        capital_base, mean_volume_window, chunk_size, dtype)
+    low_liquidity_transactions = _worst_bar_consumption(
+        transactions, market_data, windows)
+
+    return max_days_to_liquidate, low_liquidity_transactions
+
+
+def days_to_liquidate_grid(positions, market_data,
+                           max_bar_consumption=(0.05, 0.1, 0.15, 0.2,
+                                                0.25, 0.3),
+                           capital_base=(1e6, 1e7, 1e8),
+                           mean_volume_window=5,
+                           percentiles=(50, 95, 100),
+                           dtype=np.float64):
+    """
+    Percentiles of the days to liquidate the held positions on each
+    day, over a grid of bar consumption limits and capital bases.
+
+    Days to liquidate scale linearly with capital_base /
+    max_bar_consumption, so the percentiles are computed once, for a
+    unit capital base and bar consumption, and scaled to each point of
+    the grid.
 
-    if last_n_days is not None:
-        md = txn_daily_w_bar.date.max() - pd.Timedelta(days=last_n_days)
-        txn_daily_w_bar = txn_daily_w_bar[txn_daily_w_bar.date > md]
+    Parameters
+    ----------
+    positions : pd.DataFrame
+        Contains daily position values including cash
+        - See full explanation in tears.create_full_tear_sheet
+    market_data : pd.Panel or market_data.MarketData
+        Panel with items axis of 'price' and 'volume' DataFrames.
+    max_bar_consumption : float or list-like of float, optional
+        Max proportions of a daily bar that can be consumed in the
+        process of liquidating a position.
+    capital_base : float or list-like of float, optional
+        Capital bases multiplied by portfolio allocation to compute
+        position value that needs liquidating.
+    mean_volume_window : int, optional
+        Trailing window to use in mean volume calculation.
+    percentiles : float or list-like of float, optional
+        Percentiles of the days to liquidate over the held positions,
+        between 0 and 100. The defaults give the median, the 95th
+        percentile and the max.
+    dtype : np.dtype, optional
+        Float type of the computation.
+        - See full explanation in days_to_liquidate_positions.
 
-    bar_consumption = txn_daily_w_bar.assign(
-        max_pct_bar_consumed=(
-            txn_daily_w_bar.amount/txn_daily_w_bar.volume)*100
-    ).sort_values('max_pct_bar_consumed', ascending=False)
-    max_bar_consumption = bar_consumption.groupby('symbol').first()
+    Returns
+    -------
+    pd.DataFrame
+        Datetime index. Columns indexed by (max_bar_consumption,
+        capital_base, percentile). Short positions count by their
+        absolute days to liquidate. Days without held positions with
+        liquidity data are NaN.
+    """
+
+    max_bar_consumption = np.atleast_1d(max_bar_consumption)
+    capital_base = np.atleast_1d(capital_base)
+    percentiles = np.atleast_1d(percentiles)
+
+    dates, symbols, chunks = _days_to_liquidate_chunks(
+        positions, market_data, 1, 1, mean_volume_window, None, dtype)
+    _, base_days, positions_alloc = next(chunks)
+
+    held = np.abs(np.where(positions_alloc != 0, base_days, np.nan))
+    with warnings.catch_warnings():
+        # Days without held positions are NaN.
+        warnings.simplefilter('ignore', RuntimeWarning)
+        base = np.nanpercentile(held, percentiles, axis=1).T
+
+    columns = pd.MultiIndex.from_product(
+        [max_bar_consumption, capital_base, percentiles],
+        names=['max_bar_consumption', 'capital_base', 'percentile'])
+    scales = (capital_base.astype(float)[np.newaxis, :] /
+              max_bar_consumption.astype(float)[:, np.newaxis])
+    grid = base[:, np.newaxis, :] * scales.reshape(-1, 1)
+
+    grid = pd.DataFrame(grid.reshape(len(dates), -1).astype(dtype),
+                        index=dates, columns=columns)
+
+    return grid.iloc[mean_volume_window:]
+
+
+def simulate_liquidation(positions, market_data,
+                         start_dates=None,
+                         max_bar_consumption=0.2,
+                         capital_base=None,
+                         mean_volume_window=5,
+                         impact=0.1,
+                         max_days=20):
+    """
+    Simulates the forced liquidation of the whole book, starting from
+    the positions held at the close of each start date.
+
+    On each following trading day, every position is reduced by at
+    most max_bar_consumption of its trailing mean daily dollar volume
+    on that day. The trades pay the quadratic volumeshare slippage of
+    apply_slippage_penalty, with the trailing mean dollar volume as the
+    bar volume. All symbols and start dates are stepped forward
+    together, one day at a time.
+
+    Parameters
+    ----------
+    positions : pd.DataFrame
+        Contains daily position values including cash
+        - See full explanation in tears.create_full_tear_sheet
+    market_data : pd.Panel or market_data.MarketData
+        Panel with items axis of 'price' and 'volume' DataFrames.
+    start_dates : list-like of datetime-like, optional
+        Dates of positions to liquidate. Defaults to all dates of
+        positions.
+    max_bar_consumption : float, optional
+        Max proportion of a daily bar that can be consumed in the
+        process of liquidating a position.
+    capital_base : float, optional
+        If given, positions are scaled to this portfolio value, as in
+        days_to_liquidate_positions. Defaults to the position values.
+    mean_volume_window : int, optional
+        Trailing window to use in mean volume calculation.
+    impact : float, optional
+        Scales the size of the slippage penalty.
+        - See full explanation in apply_slippage_penalty.
+    max_days : int, optional
+        Number of trading days to simulate.
+
+    Returns
+    -------
+    remaining_exposure : pd.DataFrame
+        Gross dollar value of the positions still to liquidate, indexed
+        by start date, with a column for each day from 0 (the start
+        date) to max_days. Positions in symbols without liquidity data
+        are never reduced.
+    cumulative_cost : pd.DataFrame
+        Dollar slippage paid by the end of each day, indexed like
+        remaining_exposure.
+    """
 
-    return max_bar_consumption[['date', 'max_pct_bar_consumed']]
+    portfolio_value = positions.sum(axis='columns')
+    positions = positions.drop('cash', axis=1)
+
+    roll_mean_dv = _trailing_dollar_volume(market_data, mean_volume_window)
+    dates = _union(positions.index, roll_mean_dv.index)
+    symbols = positions.columns
+
+    if start_dates is None:
+        start_dates = positions.index
+    start_dates = pd.DatetimeIndex(start_dates)
+    start_rows = positions.index.get_indexer(start_dates)
+    if (start_rows < 0).any():
+        raise KeyError('Start dates not in positions: {}'.format(
+            list(start_dates[start_rows < 0])))
+
+    exposure = positions.values[start_rows]
+    if capital_base is not None:
+        exposure = exposure * \
+            (capital_base / portfolio_value.values[start_rows])[:, None]
+    remaining = np.nan_to_num(np.abs(exposure))
+
+    # A row of NaN past the last date, where nothing can be traded.
+    bar_limit = max_bar_consumption * np.vstack([
+        roll_mean_dv.reindex(index=dates, columns=symbols).values,
+        np.full((1, len(symbols)), np.nan)])
+    bar_limit = np.nan_to_num(bar_limit)
+    day_rows = dates.get_indexer(start_dates)
+
+    remaining_exposure = np.empty((len(start_dates), max_days + 1))
+    cumulative_cost = np.zeros((len(start_dates), max_days + 1))
+    remaining_exposure[:, 0] = remaining.sum(axis=1)
+    for day in range(1, max_days + 1):
+        limit = bar_limit[np.minimum(day_rows + day, len(dates))]
+        traded = np.minimum(remaining, limit)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct_volume_used = np.where(
+                limit > 0, traded / limit * max_bar_consumption, 0)
+        remaining = remaining - traded
+
+        remaining_exposure[:, day] = remaining.sum(axis=1)
+        cumulative_cost[:, day] = cumulative_cost[:, day - 1] + \
+            (pct_volume_used ** 2 * impact * traded).sum(axis=1)
+
+    columns = pd.RangeIndex(max_days + 1, name='day')
+    remaining_exposure = pd.DataFrame(remaining_exposure,
+                                      index=start_dates, columns=columns)
+    cumulative_cost = pd.DataFrame(cumulative_cost,
+                                   index=start_dates, columns=columns)
+
+    return remaining_exposure, cumulative_cost
 
 
 def apply_slippage_penalty(returns, txn_daily, simulate_starting_capital,
@@ -0,0 +1,345 @@
+#
+# Copyright 2018 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-fill transaction cost models and cost-adjusted returns.
+
+Costs are evaluated on arrays of fills at once. The market data lookups
+(half-spread and average daily volume of each fill) are done once by
+prepare_fills, so that a CostModel can be re-evaluated cheaply for
+every point of a sweep over cost parameters.
+"""
+
+from __future__ import division
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from . import txn
+from .market_data import ADV_CACHE
+from .utils import APPROX_BDAYS_PER_YEAR
+
+COST_COMPONENTS = ['commission', 'spread', 'impact', 'borrow']
+
+
+class FillData(object):
+    """
+    Arrays describing each fill, with market data looked up.
+
+    Built by prepare_fills.
+
+    Attributes
+    ----------
+    days : pd.DatetimeIndex
+        Days with fills.
+    day_codes : np.ndarray
+        Position of each fill's day in days.
+    shares : np.ndarray
+        Absolute number of shares of each fill.
+    dollars : np.ndarray
+        Absolute dollar value of each fill.
+    half_spread : np.ndarray
+        Half the quoted bid-ask spread, in dollars per share, on the
+        fill's day. NaN where market data has no spread.
+    adv : np.ndarray
+        Trailing average daily volume, in shares, of the fill's symbol
+        before the fill's day. NaN where unavailable.
+    """
+
+    def __init__(self, days, day_codes, shares, dollars, half_spread, adv):
+        self.days = days
+        self.day_codes = day_codes
+        self.shares = shares
+        self.dollars = dollars
+        self.half_spread = half_spread
+        self.adv = adv
+
+    def __len__(self):
+        return len(self.shares)
+
+    def daily_sum(self, costs):
+        """Sums per-fill costs by day, ignoring NaNs."""
+
+        return pd.Series(np.bincount(self.day_codes,
+                                     weights=np.nan_to_num(costs),
+                                     minlength=len(self.days)),
+                         index=self.days)
+
+
+def _market_field(market_data, field):
+    try:
+        return market_data[field]
+    except KeyError:
+        return None
+
+
+def _lookup(frame, days, symbols, day_codes, symbol_codes):
+    """
+    Values of a dates x symbols frame at each (day, symbol) fill,
+    NaN where the frame has no entry.
+    """
+
+    index = frame.index
+    if days.tz is not None and index.tz is None:
+        days = days.tz_localize(None)
+    elif days.tz is None and index.tz is not None:
+        days = days.tz_localize(index.tz)
+
+    # Codes of -1 (e.g. NaN symbols) must not wrap around to the last
+    # day or symbol.
+    rows = np.where(day_codes >= 0,
+                    index.get_indexer(days)[day_codes], -1)
+    cols = np.where(symbol_codes >= 0,
+                    frame.columns.get_indexer(symbols)[symbol_codes], -1)
+
+    values = np.full(len(day_codes), np.nan)
+    found = (rows >= 0) & (cols >= 0)
+    values[found] = frame.values[rows[found], cols[found]]
+    return values
+
+
+def prepare_fills(transactions, market_data=None, adv_window=20):
+    """
+    Collects the per-fill inputs of the cost models in one pass.
+
+    Parameters
+    ----------
+    transactions : pd.DataFrame, txn.Transactions or txn.TransactionAggregator
+        Prices and amounts of executed trades. One row per trade.
+         - See full explanation in tears.create_full_tear_sheet.
+         - A TransactionAggregator is treated as one fill per symbol
+           and day.
+    market_data : pd.Panel, market_data.MarketData or dict-like, optional
+        'volume' DataFrame (dates x symbols) used for average daily
+        volume, and optionally a 'spread' DataFrame of quoted bid-ask
+        spreads in dollars per share.
+    adv_window : int, optional
+        Trailing window, in days, of the average daily volume. The
+        current day's volume is excluded.
+
+    Returns
+    -------
+    FillData
+    """
+
+    transactions = txn.to_transactions(transactions)
+
+    if isinstance(transactions, txn.TransactionAggregator):
+        symbol_codes, day_codes, shares, dollars = \
+            transactions._symbol_day_sums()
+    else:
+        symbol_codes = transactions.symbol_codes
+        day_codes = transactions.day_codes
+        shares = np.abs(np.asarray(transactions.amounts, dtype=float))
+        dollars = shares * np.asarray(transactions.prices, dtype=float)
+    days = transactions.days
+    symbols = transactions.symbols
+
+    half_spread = np.full(len(shares), np.nan)
+    adv = np.full(len(shares), np.nan)
+
+    if market_data is not None:
+        spread = _market_field(market_data, 'spread')
+        if spread is not None:
+            half_spread = _lookup(spread, days, symbols,
+                                  day_codes, symbol_codes) / 2
+
+        if _market_field(market_data, 'volume') is not None:
+            trailing_volume = ADV_CACHE.volume(market_data, adv_window)
+            adv = _lookup(trailing_volume, days, symbols,
+                          day_codes, symbol_codes)
+
+    return FillData(days, day_codes, shares, dollars, half_spread, adv)
+
+
+class CostModel(object):
+    """
+    Per-fill transaction cost model.
+
+    The cost of a fill of q shares at price p is the sum of
+
+     - commission: commission_per_share * q,
+     - spread: the half-spread paid crossing the market, from the
+       'spread' market data field (dollars per share) or, where it is
+       not available, half_spread_bps of the traded value,
+     - impact: square-root market impact,
+       impact * p * q * sqrt(q / ADV), with ADV the trailing average
+       daily volume in shares. Fills without ADV have no impact cost.
+
+    and short positions pay borrow_rate (annualized) on their value
+    each day.
+
+    Subclasses can override any of the component methods, which take
+    a FillData and return the cost of each fill in dollars.
+
+    Parameters
+    ----------
+    commission_per_share : float, optional
+        Commission, in dollars per share.
+    half_spread_bps : float, optional
+        Half-spread, in basis points of traded value, used for fills
+        without spread market data.
+    impact : float, optional
+        Coefficient of the square-root impact term.
+    borrow_rate : float, optional
+        Annual cost of borrowing shares, as a fraction of the short
+        position value.
+    """
+
+    def __init__(self, commission_per_share=0.0, half_spread_bps=0.0,
+                 impact=0.0, borrow_rate=0.0):
+        self.commission_per_share = commission_per_share
+        self.half_spread_bps = half_spread_bps
+        self.impact = impact
+        self.borrow_rate = borrow_rate
+
+    def commission(self, fills):
+        return self.commission_per_share * fills.shares
+
+    def spread(self, fills):
+        return np.where(np.isnan(fills.half_spread),
+                        0.0001 * self.half_spread_bps * fills.dollars,
+                        fills.half_spread * fills.shares)
+
+    def impact_cost(self, fills):
+        if self.impact == 0:
+            return np.zeros(len(fills))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            participation = fills.shares / fills.adv
+        participation[~np.isfinite(participation)] = 0
+        return self.impact * fills.dollars * np.sqrt(participation)
+
+    def fill_costs(self, fills):
+        """
+        Cost of each fill by component.
+
+        Parameters
+        ----------
+        fills : FillData
+            See prepare_fills.
+
+        Returns
+        -------
+        pd.DataFrame
+            commission, spread and impact columns, in dollars, one row
+            per fill.
+        """
+
+        return pd.DataFrame(OrderedDict([
+            ('commission', self.commission(fills)),
+            ('spread', self.spread(fills)),
+            ('impact', self.impact_cost(fills)),
+        ]))
+
+    def borrow(self, positions):
+        """
+        Daily cost of borrowing the short positions.
+
+        Parameters
+        ----------
+        positions : pd.DataFrame
+            Daily net position values.
+             - See full explanation in tears.create_full_tear_sheet.
+
+        Returns
+        -------
+        pd.Series
+            Borrow cost in dollars, by day.
+        """
+
+        shorts = positions.drop('cash', axis='columns').values
+        short_value = -np.nansum(np.minimum(shorts, 0), axis=1)
+        borrow = pd.Series(short_value * self.borrow_rate /
+                           APPROX_BDAYS_PER_YEAR, index=positions.index)
+        borrow.index = borrow.index.normalize()
+        return borrow
+
+    def daily_costs(self, fills, positions=None):
+        """
+        Daily transaction costs by component.
+
+        Parameters
+        ----------
+        fills : FillData
+            See prepare_fills.
+        positions : pd.DataFrame, optional
+            Daily net position values, needed for borrow costs.
+             - See full explanation in tears.create_full_tear_sheet.
+
+        Returns
+        -------
+        pd.DataFrame
+            One column per component of COST_COMPONENTS and a total
+            column, in dollars, by day.
+        """
+
+        costs = OrderedDict([
+            ('commission', fills.daily_sum(self.commission(fills))),
+            ('spread', fills.daily_sum(self.spread(fills))),
+            ('impact', fills.daily_sum(self.impact_cost(fills))),
+        ])
+        if positions is not None:
+            costs['borrow'] = self.borrow(positions)
+
+        costs = pd.DataFrame(costs, columns=COST_COMPONENTS).fillna(0)
+        costs['total'] = costs.sum(axis='columns')
+        return costs
+
+
+def adjust_returns_for_costs(returns, positions, transactions,
+                             cost_model, market_data=None, adv_window=20):
+    """
+    Apply per-fill transaction costs and short borrow costs to returns.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in create_full_tear_sheet.
+    positions : pd.DataFrame
+        Daily net position values.
+         - See full explanation in create_full_tear_sheet.
+    transactions : pd.DataFrame, txn.Transactions or FillData
+        Prices and amounts of executed trades. One row per trade.
+         - See full explanation in create_full_tear_sheet.
+         - May also be a txn.TransactionAggregator, see prepare_fills.
+         - Pass the FillData of prepare_fills to reuse the market data
+           lookups, e.g. when sweeping over cost model parameters.
+    cost_model : CostModel
+        Cost model to apply.
+    market_data : pd.Panel, market_data.MarketData or dict-like, optional
+        See prepare_fills.
+    adv_window : int, optional
+        See prepare_fills.
+
+    Returns
+    -------
+    pd.Series
+        Time series of daily returns, net of transaction costs.
+    """
+
+    if isinstance(transactions, FillData):
+        fills = transactions
+    else:
+        fills = prepare_fills(transactions, market_data=market_data,
+                              adv_window=adv_window)
+
+    costs = cost_model.daily_costs(fills, positions=positions).total
+    portfolio_value = positions.sum(axis=1)
+    cost_returns = (costs / portfolio_value).reindex(
+        returns.index).fillna(0)
+
+    return returns - cost_returns
@@ -0,0 +1,472 @@
+#
+# Copyright 2018 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Daily market data on aligned dates and symbols.
+
+MarketData replaces the pd.Panel of 'price' and 'volume' DataFrames
+taken by the capacity analysis. Each field is a single dates x symbols
+array, so fields can be sliced and memory-mapped without copies.
+
+ADV_CACHE holds the trailing average daily volume and dollar volume
+shared by the capacity, risk and cost analyses.
+"""
+
+from __future__ import division
+
+import json
+import os
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def _field_array(values):
+    values = np.asanyarray(values)
+    if values.dtype.kind != 'f':
+        values = values.astype(float)
+    return values
+
+
+class MarketData(object):
+    """
+    Daily market data fields on aligned dates and symbols.
+
+    Can be passed wherever a pd.Panel with 'price' and 'volume' items
+    is accepted. Indexing with a field name returns a dates x symbols
+    DataFrame backed by the field's array, without a copy.
+
+    Parameters
+    ----------
+    fields : dict-like or pd.Panel
+        Field names mapped to dates x symbols DataFrames, or to 2d
+        arrays when dates and symbols are given. DataFrames are
+        aligned on the union of their dates and symbols.
+    dates : pd.DatetimeIndex, optional
+        Dates to align the fields on.
+    symbols : pd.Index, optional
+        Symbols to align the fields on.
+
+    Attributes
+    ----------
+    dates : pd.DatetimeIndex
+        Dates of the rows of each field.
+    symbols : pd.Index
+        Symbols of the columns of each field.
+    fields : OrderedDict
+        Field names mapped to float arrays. Fields built from
+        DataFrames are C-contiguous, and float32 data stays float32.
+    """
+
+    def __init__(self, fields, dates=None, symbols=None):
+        if hasattr(fields, 'major_axis'):
+            # pd.Panel
+            fields = OrderedDict((item, fields[item])
+                                 for item in fields.items)
+        elif isinstance(fields, MarketData):
+            fields = fields.frames()
+
+        frames = [f for f in fields.values()
+                  if isinstance(f, pd.DataFrame)]
+        if dates is None:
+            dates = frames[0].index
+            for frame in frames[1:]:
+                dates = dates.union(frame.index)
+        if symbols is None:
+            symbols = frames[0].columns
+            for frame in frames[1:]:
+                symbols = symbols.union(frame.columns)
+
+        self.dates = pd.DatetimeIndex(dates)
+        self.symbols = pd.Index(symbols)
+        self.fields = OrderedDict()
+        for name, values in fields.items():
+            if isinstance(values, pd.DataFrame):
+                values = np.ascontiguousarray(values.reindex(
+                    index=self.dates, columns=self.symbols).values)
+            values = _field_array(values)
+            if values.shape != (len(self.dates), len(self.symbols)):
+                raise ValueError(
+                    'Field {} has shape {}, expected {}.'.format(
+                        name, values.shape,
+                        (len(self.dates), len(self.symbols))))
+            self.fields[name] = values
+
+    def __getitem__(self, field):
+        return pd.DataFrame(self.fields[field], index=self.dates,
+                            columns=self.symbols, copy=False)
+
+    def __contains__(self, field):
+        return field in self.fields
+
+    def __len__(self):
+        return len(self.dates)
+
+    # Panel axis names, for code written against pd.Panel.
+
+    @property
+    def items(self):
+        return pd.Index(list(self.fields))
+
+    @property
+    def major_axis(self):
+        return self.dates
+
+    @property
+    def minor_axis(self):
+        return self.symbols
+
+    def frames(self):
+        """
+        The fields as DataFrames.
+
+        Returns
+        -------
+        OrderedDict
+            Field names mapped to dates x symbols DataFrames.
+        """
+
+        return OrderedDict((name, self[name]) for name in self.fields)
+
+    def select(self, start=None, end=None, symbols=None):
+        """
+        Market data over a date range and a selection of symbols.
+
+        Date ranges and slices of symbols share the arrays of this
+        object. Lists of symbols copy the selected columns.
+
+        Parameters
+        ----------
+        start, end : datetime-like, optional
+            First and last dates, inclusive. Default to all dates.
+        symbols : slice or list-like, optional
+            Slice of symbol labels, inclusive as with .loc, or a list
+            of symbols. Defaults to all symbols.
+
+        Returns
+        -------
+        MarketData
+        """
+
+        rows = self.dates.slice_indexer(start, end)
+
+        if symbols is None:
+            cols = slice(None)
+        elif isinstance(symbols, slice):
+            cols = self.symbols.slice_indexer(symbols.start, symbols.stop)
+        else:
+            cols = self.symbols.get_indexer(symbols)
+            if (cols < 0).any():
+                raise KeyError('Symbols not in market data: {}'.format(
+                    list(pd.Index(symbols)[cols < 0])))
+
+        return MarketData(
+            OrderedDict((name, values[rows][:, cols])
+                        for name, values in self.fields.items()),
+            dates=self.dates[rows], symbols=self.symbols[cols])
+
+    def trailing_dollar_volume(self, window=5):
+        """
+        Mean daily dollar volume over the window days before each day.
+
+        The result is cached in ADV_CACHE. Treat it as read-only.
+
+        Parameters
+        ----------
+        window : int, optional
+            Number of trailing days.
+
+        Returns
+        -------
+        pd.DataFrame
+            Dates x symbols, NaN on the first window days.
+        """
+
+        return ADV_CACHE.dollar_volume(self, window)
+
+    def save(self, path):
+        """
+        Saves the market data to a directory, as one .npy file per
+        field, which can be memory-mapped by MarketData.load.
+
+        Parameters
+        ----------
+        path : str
+            Directory to write to. Created if missing.
+        """
+
+        symbols = np.asarray(list(self.symbols))
+        if symbols.dtype == object:
+            raise ValueError('Only string or numeric symbols can be '
+                             'saved, not {}.'.format(
+                                 type(self.symbols[0]).__name__))
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        np.save(os.path.join(path, 'dates.npy'), self.dates.asi8)
+        np.save(os.path.join(path, 'symbols.npy'), symbols)
+        for name, values in self.fields.items():
+            np.save(os.path.join(path, name + '.npy'), values)
+
+        with open(os.path.join(path, 'market_data.json'), 'w') as f:
+            json.dump({'fields': list(self.fields),
+                       'tz': None if self.dates.tz is None
+                       else str(self.dates.tz)}, f)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """
+        Loads market data saved by MarketData.save.
+
+        Parameters
+        ----------
+        path : str
+            Directory written by MarketData.save.
+        mmap_mode : str, optional
+            Memory-map mode of the field arrays, see np.load. The
+            default maps them read-only, None reads them into memory.
+
+        Returns
+        -------
+        MarketData
+        """
+
+        with open(os.path.join(path, 'market_data.json')) as f:
+            meta = json.load(f)
+
+        dates = pd.DatetimeIndex(np.load(os.path.join(path, 'dates.npy')))
+        if meta['tz'] is not None:
+            dates = dates.tz_localize('UTC').tz_convert(meta['tz'])
+        symbols = pd.Index(np.load(os.path.join(path, 'symbols.npy')))
+
+        fields = OrderedDict(
+            (name, np.load(os.path.join(path, name + '.npy'),
+                           mmap_mode=mmap_mode))
+            for name in meta['fields'])
+
+        return cls(fields, dates=dates, symbols=symbols)
+
+
+class ADVCache(object):
+    """
+    Least recently used cache of trailing average daily volume and
+    dollar volume.
+
+    Entries are keyed by the identity of the market data, the field,
+    the window, the shift, the dtype and the zero handling, and hold
+    one dates x symbols float array each, wrapped in a DataFrame
+    without a copy. Cached frames are shared between callers, so
+    treat them as read-only.
+
+    Entries of a market data object are dropped when it is garbage
+    collected. Dicts of fields are keyed on the field DataFrames they
+    hold instead, so their entries do not keep them alive. Market data
+    that does not support weak references is not cached. Changing
+    market data in place leaves its entries stale; call invalidate
+    after doing so.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Number of entries kept. The least recently used entries are
+        evicted first.
+    dtype : np.dtype, optional
+        Default float type of the cached arrays. np.float32 halves
+        their size.
+    max_bytes : int, optional
+        Total size of the cached arrays, in bytes. Arrays larger than
+        this are returned without being cached.
+    """
+
+    def __init__(self, maxsize=16, dtype=np.float64, max_bytes=2 ** 30):
+        self.maxsize = maxsize
+        self.dtype = dtype
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._refs = {}
+        self._nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        """Size of the cached arrays, in bytes."""
+
+        return self._nbytes
+
+    def volume(self, market_data, window, shift=1, dtype=None,
+               zero_as_nan=False):
+        """
+        Mean daily volume over a trailing window.
+
+        Parameters
+        ----------
+        market_data : pd.Panel, MarketData, dict-like or pd.DataFrame
+            Market data with a 'volume' field, or a dates x symbols
+            DataFrame of volumes.
+        window : int
+            Number of days averaged.
+        shift : int, optional
+            Number of days the window ends before each day. The
+            default excludes the current day.
+        dtype : np.dtype, optional
+            Float type of the result. Defaults to the cache's dtype.
+        zero_as_nan : bool, optional
+            Store zero averages as NaN, e.g. to divide by the result.
+
+        Returns
+        -------
+        pd.DataFrame
+            Dates x symbols, NaN before window days are available.
+        """
+
+        if isinstance(market_data, pd.DataFrame):
+            def compute():
+                return market_data
+            fields = None
+        else:
+            def compute():
+                return market_data['volume']
+            fields = ['volume']
+
+        return self._get(market_data, fields, 'volume', window, shift,
+                         dtype, zero_as_nan, compute)
+
+    def dollar_volume(self, market_data, window, shift=1, dtype=None,
+                      zero_as_nan=False):
+        """
+        Mean daily dollar volume over a trailing window.
+
+        Parameters
+        ----------
+        market_data : pd.Panel, MarketData or dict-like
+            Market data with 'price' and 'volume' fields.
+        window : int
+            Number of days averaged.
+        shift : int, optional
+            Number of days the window ends before each day. The
+            default excludes the current day.
+        dtype : np.dtype, optional
+            Float type of the result. Defaults to the cache's dtype.
+        zero_as_nan : bool, optional
+            Store zero averages as NaN, e.g. to divide by the result.
+
+        Returns
+        -------
+        pd.DataFrame
+            Dates x symbols, NaN before window days are available.
+        """
+
+        def compute():
+            return market_data['volume'] * market_data['price']
+
+        return self._get(market_data, ['volume', 'price'], 'dollar_volume',
+                         window, shift, dtype, zero_as_nan, compute)
+
+    def invalidate(self, market_data=None):
+        """
+        Drops the entries of market_data, or all entries.
+
+        Parameters
+        ----------
+        market_data : object, optional
+            Market data whose entries to drop. Defaults to all.
+        """
+
+        if market_data is None:
+            self._entries.clear()
+            self._refs.clear()
+            self._nbytes = 0
+        else:
+            for owner in self._owners(market_data):
+                self._drop(id(owner))
+
+    @staticmethod
+    def _owners(market_data, fields=None):
+        """
+        Objects whose lifetime bounds the entries of market_data: the
+        given fields of a dict (all of them by default), or
+        market_data itself.
+        """
+
+        if isinstance(market_data, dict):
+            if fields is None:
+                fields = list(market_data)
+            return [market_data[field] for field in fields]
+        return [market_data]
+
+    def _remove(self, key):
+        frame = self._entries.pop(key)
+        self._nbytes -= frame.values.nbytes
+        for owner_id in key[0]:
+            if not any(owner_id in k[0] for k in self._entries):
+                self._refs.pop(owner_id, None)
+
+    def _drop(self, owner_id):
+        for key in [k for k in self._entries if owner_id in k[0]]:
+            self._remove(key)
+        self._refs.pop(owner_id, None)
+
+    def _get(self, market_data, fields, name, window, shift, dtype,
+             zero_as_nan, compute):
+        dtype = np.dtype(self.dtype if dtype is None else dtype)
+        owners = self._owners(market_data, fields)
+        key = (tuple(id(owner) for owner in owners), name, window, shift,
+               dtype, zero_as_nan)
+
+        if key in self._entries:
+            # Mark as most recently used.
+            frame = self._entries.pop(key)
+            self._entries[key] = frame
+            return frame
+
+        trailing = compute().rolling(window=window, center=False) \
+            .mean().shift(shift)
+        values = trailing.values.astype(dtype, copy=False)
+        if zero_as_nan:
+            values = np.where(values == 0, np.nan, values).astype(
+                dtype, copy=False)
+        frame = pd.DataFrame(values, index=trailing.index,
+                             columns=trailing.columns, copy=False)
+
+        nbytes = frame.values.nbytes
+        if nbytes > self.max_bytes:
+            return frame
+
+        refs = {}
+        for owner in owners:
+            owner_id = id(owner)
+            if owner_id not in self._refs:
+                try:
+                    refs[owner_id] = weakref.ref(
+                        owner,
+                        lambda _, owner_id=owner_id: self._drop(owner_id))
+                except TypeError:
+                    return frame
+        self._refs.update(refs)
+
+        self._entries[key] = frame
+        self._nbytes += nbytes
+        while (len(self._entries) > self.maxsize or
+               self._nbytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+
+        return frame
+
+
+ADV_CACHE = ADVCache()
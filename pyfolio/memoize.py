@@ -0,0 +1,56 @@
+"""Caching utilities for data derived from large pandas objects."""
+# Copyright 2018 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import weakref
+from functools import wraps
+
+
+def memoize_by_object(func):
+    """
+    Decorator that caches the result of func(obj, *args) for as long
+    as obj is alive, keyed by the identity of obj and the (hashable)
+    remaining positional arguments.
+
+    This is intended for expensive derived data (e.g. aggregates of a
+    large returns or transactions frame) that several functions compute
+    from the same object. Pandas objects are not hashable, so a
+    weak-reference callback removes the entry once obj is garbage
+    collected. The result must not hold a reference to obj, or obj is
+    never collected. Objects modified in place after the first call
+    will return stale results; call func.cache_clear() in that case.
+    """
+
+    cache = {}
+
+    def evict(ref, key):
+        cache.pop(key, None)
+
+    @wraps(func)
+    def wrapper(obj, *args):
+        key = (id(obj),) + args
+        entry = cache.get(key)
+        if entry is not None and entry[0]() is obj:
+            return entry[1]
+
+        result = func(obj, *args)
+        try:
+            ref = weakref.ref(obj, lambda ref, key=key: evict(ref, key))
+        except TypeError:
+            # Not weak-referenceable, so it cannot be cached safely.
+            return result
+        cache[key] = (ref, result)
+        return result
+
+    wrapper.cache_clear = cache.clear
+    return wrapper
@@ -92,7 +92,7 @@ def perf_attrib(returns,
                        XOM    -1.798401  0.761549
 
 
-    transactions : pd.DataFrame, optional
+    transactions : pd.DataFrame or txn.Transactions, optional
         Executed trade volumes and fill prices. Used to check the turnover of
         the algorithm. Default is None, in which case the turnover check is
         skipped.
@@ -14,7 +14,6 @@
 # limitations under the License.
 from __future__ import division
 
-import datetime
 from collections import OrderedDict
 from functools import wraps
 
@@ -24,7 +23,6 @@ import matplotlib.patches as patches
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import pytz
 import scipy as sp
 from matplotlib import figure
 from matplotlib.backends.backend_agg import FigureCanvasAgg
@@ -36,6 +34,8 @@ from . import pos
 from . import timeseries
 from . import txn
 from . import utils
+from . import var
+from .round_trips import RoundTrips
 from .utils import (APPROX_BDAYS_PER_MONTH,
                     MM_DISPLAY_UNIT)
 
@@ -160,6 +160,8 @@ def plot_monthly_returns_heatmap(returns, ax=None, **kwargs):
         The axes that were plotted on.
     """
 
+    returns = utils.to_daily_returns(returns)
+
     if ax is None:
         ax = plt.gca()
 
@@ -202,6 +204,8 @@ def plot_annual_returns(returns, ax=None, **kwargs):
         The axes that were plotted on.
     """
 
+    returns = utils.to_daily_returns(returns)
+
     if ax is None:
         ax = plt.gca()
 
@@ -252,6 +256,8 @@ def plot_monthly_returns_dist(returns, ax=None, **kwargs):
         The axes that were plotted on.
     """
 
+    returns = utils.to_daily_returns(returns)
+
     if ax is None:
         ax = plt.gca()
 
@@ -283,7 +289,8 @@ def plot_monthly_returns_dist(returns, ax=None, **kwargs):
     return ax
 
 
-def plot_holdings(returns, positions, legend_loc='best', ax=None, **kwargs):
+def plot_holdings(returns, positions, legend_loc='best', ax=None,
+                  position_stats=None, **kwargs):
     """
     Plots total amount of stocks with an active position, either short
     or long. Displays daily total, daily average per month, and
@@ -301,6 +308,9 @@ def plot_holdings(returns, positions, legend_loc='best', ax=None, **kwargs):
         The location of the legend on the plot.
     ax : matplotlib.Axes, optional
         Axes upon which to plot.
+    position_stats : pd.DataFrame, optional
+        Output of pos.get_position_stats for positions, to avoid
+        recomputing it. Computed from positions if not given.
     **kwargs, optional
         Passed to plotting function.
 
@@ -313,8 +323,9 @@ def plot_holdings(returns, positions, legend_loc='best', ax=None, **kwargs):
     if ax is None:
         ax = plt.gca()
 
-    positions = positions.copy().drop('cash', axis='columns')
-    df_holdings = positions.replace(0, np.nan).count(axis=1)
+    if position_stats is None:
+        position_stats = pos.get_position_stats(positions)
+    df_holdings = position_stats.long_count + position_stats.short_count
     df_holdings_by_month = df_holdings.resample('1M').mean()
     df_holdings.plot(color='steelblue', alpha=0.6, lw=0.5, ax=ax, **kwargs)
     df_holdings_by_month.plot(
@@ -344,7 +355,8 @@ def plot_holdings(returns, positions, legend_loc='best', ax=None, **kwargs):
 
 
 def plot_long_short_holdings(returns, positions,
-                             legend_loc='upper left', ax=None, **kwargs):
+                             legend_loc='upper left', ax=None,
+                             position_stats=None, **kwargs):
     """
     Plots total amount of stocks with an active position, breaking out
     short and long into transparent filled regions.
@@ -361,6 +373,9 @@ def plot_long_short_holdings(returns, positions,
         The location of the legend on the plot.
     ax : matplotlib.Axes, optional
         Axes upon which to plot.
+    position_stats : pd.DataFrame, optional
+        Output of pos.get_position_stats for positions, to avoid
+        recomputing it. Computed from positions if not given.
     **kwargs, optional
         Passed to plotting function.
 
@@ -374,10 +389,10 @@ def plot_long_short_holdings(returns, positions,
     if ax is None:
         ax = plt.gca()
 
-    positions = positions.drop('cash', axis='columns')
-    positions = positions.replace(0, np.nan)
-    df_longs = positions[positions > 0].count(axis=1)
-    df_shorts = positions[positions < 0].count(axis=1)
+    if position_stats is None:
+        position_stats = pos.get_position_stats(positions)
+    df_longs = position_stats.long_count
+    df_shorts = position_stats.short_count
     lf = ax.fill_between(df_longs.index, 0, df_longs.values,
                          color='g', alpha=0.5, lw=2.0)
     sf = ax.fill_between(df_shorts.index, 0, df_shorts.values,
@@ -422,6 +437,8 @@ def plot_drawdown_periods(returns, top=10, ax=None, **kwargs):
         The axes that were plotted on.
     """
 
+    returns = utils.to_daily_returns(returns)
+
     if ax is None:
         ax = plt.gca()
 
@@ -474,6 +491,8 @@ def plot_drawdown_underwater(returns, ax=None, **kwargs):
         The axes that were plotted on.
     """
 
+    returns = utils.to_daily_returns(returns)
+
     if ax is None:
         ax = plt.gca()
 
@@ -561,7 +580,7 @@ def show_perf_stats(returns, factor_returns=None, positions=None,
     positions : pd.DataFrame, optional
         Daily net position values.
          - See full explanation in create_full_tear_sheet.
-    transactions : pd.DataFrame, optional
+    transactions : pd.DataFrame or txn.Transactions, optional
         Prices and amounts of executed trades. One row per trade.
         - See full explanation in tears.create_full_tear_sheet
     turnover_denom : str, optional
@@ -690,6 +709,8 @@ def plot_returns(returns,
         The axes that were plotted on.
     """
 
+    returns = utils.to_daily_returns(returns)
+
     if ax is None:
         ax = plt.gca()
 
@@ -770,6 +791,9 @@ def plot_rolling_returns(returns,
         The axes that were plotted on.
     """
 
+    returns = utils.to_daily_returns(returns)
+    factor_returns = utils.to_daily_returns(factor_returns)
+
     if ax is None:
         ax = plt.gca()
 
@@ -863,6 +887,9 @@ def plot_rolling_beta(returns, factor_returns, legend_loc='best',
         The axes that were plotted on.
     """
 
+    returns = utils.to_daily_returns(returns)
+    factor_returns = utils.to_daily_returns(factor_returns)
+
     if ax is None:
         ax = plt.gca()
 
@@ -918,6 +945,9 @@ def plot_rolling_volatility(returns, factor_returns=None,
         The axes that were plotted on.
     """
 
+    returns = utils.to_daily_returns(returns)
+    factor_returns = utils.to_daily_returns(factor_returns)
+
     if ax is None:
         ax = plt.gca()
 
@@ -954,6 +984,79 @@ def plot_rolling_volatility(returns, factor_returns=None,
     return ax
 
 
+def plot_rolling_var(returns, factor_returns=None,
+                     rolling_window=APPROX_BDAYS_PER_MONTH * 6,
+                     cutoff=0.05, method='historical',
+                     legend_loc='best', ax=None, **kwargs):
+    """
+    Plots the rolling value at risk and expected shortfall versus date.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    factor_returns : pd.Series, optional
+        Daily noncumulative returns of the benchmark factor for
+        which the benchmark rolling VaR is computed. Usually
+        a benchmark such as market returns.
+         - This is in the same style as returns.
+    rolling_window : int, optional
+        The days window over which to compute the VaR.
+    cutoff : float, optional
+        Tail probability of the VaR estimate, e.g. 0.05 for 95% VaR.
+    method : str, optional
+        Either 'historical', 'parametric' or 'cornish_fisher'.
+        - See full explanation in var.rolling_tail_risk.
+    legend_loc : matplotlib.loc, optional
+        The location of the legend on the plot.
+    ax : matplotlib.Axes, optional
+        Axes upon which to plot.
+    **kwargs, optional
+        Passed to plotting function.
+
+    Returns
+    -------
+    ax : matplotlib.Axes
+        The axes that were plotted on.
+    """
+
+    returns = utils.to_daily_returns(returns)
+    factor_returns = utils.to_daily_returns(factor_returns)
+
+    if ax is None:
+        ax = plt.gca()
+
+    y_axis_formatter = FuncFormatter(utils.two_dec_places)
+    ax.yaxis.set_major_formatter(FuncFormatter(y_axis_formatter))
+
+    tail_risk = var.rolling_tail_risk(returns, window=rolling_window,
+                                      cutoff=cutoff, horizons=(1,),
+                                      methods=(method,))
+    tail_risk['VaR'].iloc[:, 0].plot(alpha=.7, lw=3, color='orangered',
+                                     ax=ax, **kwargs)
+    tail_risk['ES'].iloc[:, 0].plot(alpha=.7, lw=3, color='darkred',
+                                    ax=ax, **kwargs)
+    legend = ['VaR', 'Expected shortfall']
+
+    if factor_returns is not None:
+        var_factor = var.rolling_value_at_risk(factor_returns,
+                                               window=rolling_window,
+                                               cutoff=cutoff,
+                                               method=method)
+        var_factor.plot(alpha=.7, lw=3, color='grey', ax=ax, **kwargs)
+        legend.append('Benchmark VaR')
+
+    ax.set_title('Rolling {:.0%} value at risk ({}-day)'
+                 .format(1 - cutoff, rolling_window))
+    ax.axhline(0.0, color='black', linestyle='-', lw=2)
+
+    ax.set_ylabel('Daily return')
+    ax.set_xlabel('')
+    ax.legend(legend, loc=legend_loc, frameon=True, framealpha=0.5)
+    return ax
+
+
 def plot_rolling_sharpe(returns, factor_returns=None,
                         rolling_window=APPROX_BDAYS_PER_MONTH * 6,
                         legend_loc='best', ax=None, **kwargs):
@@ -985,6 +1088,9 @@ def plot_rolling_sharpe(returns, factor_returns=None,
         The axes that were plotted on.
     """
 
+    returns = utils.to_daily_returns(returns)
+    factor_returns = utils.to_daily_returns(factor_returns)
+
     if ax is None:
         ax = plt.gca()
 
@@ -1194,7 +1300,8 @@ def show_and_plot_top_positions(returns, positions_alloc,
         return ax
 
 
-def plot_max_median_position_concentration(positions, ax=None, **kwargs):
+def plot_max_median_position_concentration(positions, ax=None,
+                                           position_stats=None, **kwargs):
     """
     Plots the max and median of long and short position concentrations
     over the time.
@@ -1205,6 +1312,9 @@ def plot_max_median_position_concentration(positions, ax=None, **kwargs):
         The positions that the strategy takes over time.
     ax : matplotlib.Axes, optional
         Axes upon which to plot.
+    position_stats : pd.DataFrame, optional
+        Output of pos.get_position_stats for positions, to avoid
+        recomputing it. Computed from positions if not given.
 
     Returns
     -------
@@ -1215,7 +1325,11 @@ def plot_max_median_position_concentration(positions, ax=None, **kwargs):
     if ax is None:
         ax = plt.gcf()
 
-    alloc_summary = pos.get_max_median_position_concentration(positions)
+    if position_stats is None:
+        alloc_summary = pos.get_max_median_position_concentration(positions)
+    else:
+        alloc_summary = position_stats[
+            ['max_long', 'median_long', 'median_short', 'max_short']]
     colors = ['mediumblue', 'steelblue', 'tomato', 'firebrick']
     alloc_summary.plot(linewidth=1, color=colors, alpha=0.6, ax=ax)
 
@@ -1293,6 +1407,8 @@ def plot_return_quantiles(returns, live_start_date=None, ax=None, **kwargs):
         The axes that were plotted on.
     """
 
+    returns = utils.to_daily_returns(returns)
+
     if ax is None:
         ax = plt.gca()
 
@@ -1338,7 +1454,7 @@ def plot_turnover(returns, transactions, positions,
     returns : pd.Series
         Daily returns of the strategy, noncumulative.
          - See full explanation in tears.create_full_tear_sheet.
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame, txn.Transactions or txn.TransactionAggregator
         Prices and amounts of executed trades. One row per trade.
          - See full explanation in tears.create_full_tear_sheet.
     positions : pd.DataFrame
@@ -1400,7 +1516,7 @@ def plot_slippage_sweep(returns, positions, transactions,
     positions : pd.DataFrame
         Daily net position values.
          - See full explanation in tears.create_full_tear_sheet.
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame or txn.Transactions
         Prices and amounts of executed trades. One row per trade.
          - See full explanation in tears.create_full_tear_sheet.
     slippage_params: tuple
@@ -1450,7 +1566,7 @@ def plot_slippage_sensitivity(returns, positions, transactions,
     positions : pd.DataFrame
         Daily net position values.
          - See full explanation in tears.create_full_tear_sheet.
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame or txn.Transactions
         Prices and amounts of executed trades. One row per trade.
          - See full explanation in tears.create_full_tear_sheet.
     ax : matplotlib.Axes, optional
@@ -1523,7 +1639,7 @@ def plot_daily_turnover_hist(transactions, positions,
 
     Parameters
     ----------
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame, txn.Transactions or txn.TransactionAggregator
         Prices and amounts of executed trades. One row per trade.
          - See full explanation in tears.create_full_tear_sheet.
     positions : pd.DataFrame
@@ -1560,7 +1676,7 @@ def plot_daily_volume(returns, transactions, ax=None, **kwargs):
     returns : pd.Series
         Daily returns of the strategy, noncumulative.
          - See full explanation in tears.create_full_tear_sheet.
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame, txn.Transactions or txn.TransactionAggregator
         Prices and amounts of executed trades. One row per trade.
          - See full explanation in tears.create_full_tear_sheet.
     ax : matplotlib.Axes, optional
@@ -1588,6 +1704,7 @@ def plot_daily_volume(returns, transactions, ax=None, **kwargs):
 
 
 def plot_txn_time_hist(transactions, bin_minutes=5, tz='America/New_York',
+                       session_start='9:30', session_end='16:00',
                        ax=None, **kwargs):
     """
     Plots a histogram of transaction times, binning the times into
@@ -1595,15 +1712,19 @@ def plot_txn_time_hist(transactions, bin_minutes=5, tz='America/New_York',
 
     Parameters
     ----------
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame, txn.Transactions or txn.TransactionAggregator
         Prices and amounts of executed trades. One row per trade.
          - See full explanation in tears.create_full_tear_sheet.
-    bin_minutes : float, optional
+    bin_minutes : int, optional
         Sizes of the bins in minutes, defaults to 5 minutes.
     tz : str, optional
         Time zone to plot against. Note that if the specified
         zone does not apply daylight savings, the distribution
         may be partially offset.
+    session_start, session_end : str or datetime.time, optional
+        Local trading hours to plot, defaults to 9:30 to 16:00.
+         - See txn.get_txn_time_hist for sessions past midnight
+           and 24 hour sessions.
     ax : matplotlib.Axes, optional
         Axes upon which to plot.
     **kwargs, optional
@@ -1618,27 +1739,24 @@ def plot_txn_time_hist(transactions, bin_minutes=5, tz='America/New_York',
     if ax is None:
         ax = plt.gca()
 
-    txn_time = transactions.copy()
+    txn_time = txn.get_txn_time_hist(transactions, bin_minutes=bin_minutes,
+                                     tz=tz, session_start=session_start,
+                                     session_end=session_end)
 
-    txn_time.index = txn_time.index.tz_convert(pytz.timezone(tz))
-    txn_time.index = txn_time.index.map(lambda x: x.hour * 60 + x.minute)
-    txn_time['trade_value'] = (txn_time.amount * txn_time.price).abs()
-    txn_time = txn_time.groupby(level=0).sum().reindex(index=range(570, 961))
-    txn_time.index = (txn_time.index / bin_minutes).astype(int) * bin_minutes
-    txn_time = txn_time.groupby(level=0).sum()
+    # Bins are placed at their minute of the day, counting on past
+    # 1440 for sessions that wrap past midnight.
+    _, _, x = txn.session_time_bins(bin_minutes,
+                                    session_start=session_start,
+                                    session_end=session_end)
+    tick_step = max(int(30 / bin_minutes), 1)
+    if len(txn_time) * bin_minutes > 12 * 60:
+        tick_step *= 4
 
-    txn_time['time_str'] = txn_time.index.map(lambda x:
-                                              str(datetime.time(int(x / 60),
-                                                                x % 60))[:-3])
+    ax.bar(x, txn_time.values, width=bin_minutes, **kwargs)
 
-    trade_value_sum = txn_time.trade_value.sum()
-    txn_time.trade_value = txn_time.trade_value.fillna(0) / trade_value_sum
-
-    ax.bar(txn_time.index, txn_time.trade_value, width=bin_minutes, **kwargs)
-
-    ax.set_xlim(570, 960)
-    ax.set_xticks(txn_time.index[::int(30 / bin_minutes)])
-    ax.set_xticklabels(txn_time.time_str[::int(30 / bin_minutes)])
+    ax.set_xlim(x[0], x[-1])
+    ax.set_xticks(x[::tick_step])
+    ax.set_xticklabels(txn_time.index[::tick_step])
     ax.set_title('Transaction time distribution')
     ax.set_ylabel('Proportion')
     ax.set_xlabel('')
@@ -1731,9 +1849,11 @@ def plot_round_trip_lifetimes(round_trips, disp_amount=16, lsize=18, ax=None):
 
     Parameters
     ----------
-    round_trips : pd.DataFrame
+    round_trips : pd.DataFrame or round_trips.RoundTrips
         DataFrame with one row per round trip trade.
         - See full explanation in round_trips.extract_round_trips
+        - The trips of the sampled symbols are looked up by symbol in
+          a RoundTrips store.
     ax : matplotlib.Axes, optional
         Axes upon which to plot.
 
@@ -1746,21 +1866,27 @@ def plot_round_trip_lifetimes(round_trips, disp_amount=16, lsize=18, ax=None):
     if ax is None:
         ax = plt.subplot()
 
-    symbols_sample = round_trips.symbol.unique()
+    if isinstance(round_trips, RoundTrips):
+        symbols_sample = round_trips.symbols
+    else:
+        symbols_sample = round_trips.symbol.unique()
     np.random.seed(1)
-    sample = np.random.choice(round_trips.symbol.unique(), replace=False,
+    sample = np.random.choice(symbols_sample, replace=False,
                               size=min(disp_amount, len(symbols_sample)))
-    sample_round_trips = round_trips[round_trips.symbol.isin(sample)]
+    if isinstance(round_trips, RoundTrips):
+        sample_round_trips = round_trips.select(symbols=sample)
+    else:
+        sample_round_trips = round_trips[round_trips.symbol.isin(sample)]
 
     symbol_idx = pd.Series(np.arange(len(sample)), index=sample)
+    y_ix = symbol_idx.reindex(sample_round_trips.symbol).values + 0.05
+    colors = np.where(sample_round_trips.long.values, 'b', 'r')
 
-    for symbol, sym_round_trips in sample_round_trips.groupby('symbol'):
-        for _, row in sym_round_trips.iterrows():
-            c = 'b' if row.long else 'r'
-            y_ix = symbol_idx[symbol] + 0.05
-            ax.plot([row['open_dt'], row['close_dt']],
-                    [y_ix, y_ix], color=c,
-                    linewidth=lsize, solid_capstyle='butt')
+    # All lifetimes are drawn as one collection of lines.
+    ax.hlines(y_ix,
+              pd.DatetimeIndex(sample_round_trips['open_dt']),
+              pd.DatetimeIndex(sample_round_trips['close_dt']),
+              colors=colors, linewidth=lsize, capstyle='butt')
 
     ax.set_yticks(range(disp_amount))
     ax.set_yticklabels([utils.format_asset(s) for s in sample])
@@ -1776,6 +1902,38 @@ def plot_round_trip_lifetimes(round_trips, disp_amount=16, lsize=18, ax=None):
     return ax
 
 
+def plot_binned_distribution(counts, bin_edges, ax=None, **kwargs):
+    """
+    Plots a histogram from pre-binned counts.
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        Number of values in each bin.
+    bin_edges : np.ndarray
+        Edges of the bins, one more than counts.
+         - See round_trips.binned_distribution.
+    ax : matplotlib.Axes, optional
+        Axes upon which to plot.
+    **kwargs, optional
+        Passed to plotting function.
+
+    Returns
+    -------
+    ax : matplotlib.Axes
+        The axes that were plotted on.
+    """
+
+    if ax is None:
+        ax = plt.gca()
+
+    kwargs.setdefault('alpha', 0.4)
+    ax.bar(bin_edges[:-1], counts, width=np.diff(bin_edges), align='edge',
+           **kwargs)
+
+    return ax
+
+
 def show_profit_attribution(round_trips):
     """
     Prints the share of total PnL contributed by each
@@ -1817,8 +1975,9 @@ def plot_prob_profit_trade(round_trips, ax=None):
 
     Parameters
     ----------
-    round_trips : pd.DataFrame
-        DataFrame with one row per round trip trade.
+    round_trips : pd.DataFrame or tuple
+        DataFrame with one row per round trip trade, or the numbers of
+        profitable and unprofitable round trips.
         - See full explanation in round_trips.extract_round_trips
     ax : matplotlib.Axes, optional
         Axes upon which to plot.
@@ -1831,10 +1990,13 @@ def plot_prob_profit_trade(round_trips, ax=None):
 
     x = np.linspace(0, 1., 500)
 
-    round_trips['profitable'] = round_trips.pnl > 0
+    if isinstance(round_trips, pd.DataFrame):
+        n_profitable = (round_trips.pnl > 0).sum()
+        n_unprofitable = len(round_trips) - n_profitable
+    else:
+        n_profitable, n_unprofitable = round_trips
 
-    dist = sp.stats.beta(round_trips.profitable.sum(),
-                         (~round_trips.profitable).sum())
+    dist = sp.stats.beta(n_profitable, n_unprofitable)
     y = dist.pdf(x)
     lower_perc = dist.ppf(.025)
     upper_perc = dist.ppf(.975)
@@ -14,6 +14,8 @@
 # limitations under the License.
 from __future__ import division
 
+from collections import OrderedDict
+
 import pandas as pd
 import numpy as np
 import warnings
@@ -74,13 +76,96 @@ def get_top_long_short_abs(positions, top=10):
     positions = positions.drop('cash', axis='columns')
     df_max = positions.max()
     df_min = positions.min()
-    df_abs_max = positions.abs().max()
+    df_abs_max = np.fmax(df_max, -df_min)
     df_top_long = df_max[df_max > 0].nlargest(top)
     df_top_short = df_min[df_min < 0].nsmallest(top)
     df_top_abs = df_abs_max.nlargest(top)
     return df_top_long, df_top_short, df_top_abs
 
 
+def get_position_stats(positions, top=0):
+    """
+    Computes the cross-sectional statistics of the long and short
+    positions held in each time period.
+
+    All statistics come from NaN-masked arrays of the long and short
+    allocations, with nan-aware reductions along each row. The largest
+    allocations are selected with np.partition, without sorting whole
+    rows.
+
+    Parameters
+    ----------
+    positions : pd.DataFrame
+        The positions that the strategy takes over time, including
+        cash. Allocations are taken as fractions of the row sums.
+    top : int, optional
+        Number of largest long and short allocations to return for
+        each time period.
+
+    Returns
+    -------
+    pd.DataFrame
+        Rows are timeperiods. Columns are the number of long and short
+        positions, the total long and short allocations, and the max
+        long, median long, median short and max short allocations.
+        Allocation statistics without positions are NaN.
+        With top, columns top_long_1 to top_long_<top> and top_short_1
+        to top_short_<top> follow, with the largest allocations first
+        and NaN where fewer positions are held.
+    """
+
+    values = positions.drop('cash', axis='columns').values.astype(float)
+    portfolio_value = positions.sum(axis='columns').values
+    with np.errstate(divide='ignore', invalid='ignore'):
+        alloc = values / portfolio_value[:, np.newaxis]
+
+    is_long = alloc > 0
+    is_short = alloc < 0
+    longs = np.where(is_long, alloc, np.nan)
+    shorts = np.where(is_short, alloc, np.nan)
+
+    with warnings.catch_warnings():
+        # Rows without longs or shorts give NaN.
+        warnings.simplefilter('ignore', RuntimeWarning)
+        stats = pd.DataFrame(OrderedDict([
+            ('long_count', is_long.sum(axis=1)),
+            ('short_count', is_short.sum(axis=1)),
+            ('long_exposure', np.where(is_long, alloc, 0).sum(axis=1)),
+            ('short_exposure', np.where(is_short, alloc, 0).sum(axis=1)),
+            ('max_long', np.nanmax(longs, axis=1)),
+            ('median_long', np.nanmedian(longs, axis=1)),
+            ('median_short', np.nanmedian(shorts, axis=1)),
+            ('max_short', np.nanmin(shorts, axis=1)),
+        ]), index=positions.index)
+
+    if top > 0:
+        for name, side in [('top_long', np.where(is_long, alloc, -np.inf)),
+                           ('top_short', np.where(is_short, -alloc,
+                                                  -np.inf))]:
+            largest = _largest(side, top)
+            largest[np.isinf(largest)] = np.nan
+            if name == 'top_short':
+                largest = -largest
+            for i in range(top):
+                stats['{}_{}'.format(name, i + 1)] = largest[:, i]
+
+    return stats
+
+
+def _largest(values, n):
+    """
+    The n largest values of each row of a 2d array, in decreasing
+    order, padded with -inf to n columns.
+    """
+
+    k = min(n, values.shape[1])
+    largest = np.full((len(values), n), -np.inf)
+    if k > 0:
+        part = np.partition(values, values.shape[1] - k, axis=1)[:, -k:]
+        largest[:, :k] = np.sort(part, axis=1)[:, ::-1]
+    return largest
+
+
 def get_max_median_position_concentration(positions):
     """
     Finds the max and median long and short position concentrations
@@ -98,19 +183,8 @@ def get_max_median_position_concentration(positions):
         position concentrations. Rows are timeperiods.
     """
 
-    expos = get_percent_alloc(positions)
-    expos = expos.drop('cash', axis=1)
-
-    longs = expos.where(expos.applymap(lambda x: x > 0))
-    shorts = expos.where(expos.applymap(lambda x: x < 0))
-
-    alloc_summary = pd.DataFrame()
-    alloc_summary['max_long'] = longs.max(axis=1)
-    alloc_summary['median_long'] = longs.median(axis=1)
-    alloc_summary['median_short'] = shorts.median(axis=1)
-    alloc_summary['max_short'] = shorts.min(axis=1)
-
-    return alloc_summary
+    return get_position_stats(positions)[
+        ['max_long', 'median_long', 'median_short', 'max_short']]
 
 
 def extract_pos(positions, cash):
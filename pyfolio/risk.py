@@ -17,6 +17,9 @@ from functools import partial
 
 import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
+
+from .market_data import ADV_CACHE
 
 
 SECTORS = OrderedDict([
@@ -405,7 +408,8 @@ def plot_cap_exposures_net(net_exposures, ax=None):
     return ax
 
 
-def compute_volume_exposures(shares_held, volumes, percentile):
+def compute_volume_exposures(shares_held, volumes, percentile,
+                             mean_volume_window=None):
     """
     Returns arrays of pth percentile of long, short and gross volume exposures
     of an algorithm's held shares
@@ -416,15 +420,30 @@ def compute_volume_exposures(shares_held, volumes, percentile):
         Daily number of shares held by an algorithm.
         - See full explanation in create_risk_tear_sheet
 
-    volume : pd.DataFrame
-        Daily volume per asset
+    volumes : pd.DataFrame, pd.Panel or market_data.MarketData
+        Daily volume per asset, or market data with a 'volume' field.
+        Exposures are computed on the dates of shares_held, while
+        trailing means also use the earlier dates of volumes.
         - See full explanation in create_risk_tear_sheet
 
     percentile : float
         Percentile to use when computing and plotting volume exposures
         - See full explanation in create_risk_tear_sheet
+
+    mean_volume_window : int, optional
+        If given, shares held are compared with the mean daily volume
+        over this many previous days, taken from market_data.ADV_CACHE,
+        instead of the same day's volume. Passing the market data
+        shared with the capacity and cost analyses reuses their cache
+        entries.
     """
 
+    if mean_volume_window is not None:
+        volumes = ADV_CACHE.volume(volumes, mean_volume_window)
+    elif not isinstance(volumes, pd.DataFrame):
+        volumes = volumes['volume']
+    volumes = volumes.reindex(index=shares_held.index)
+
     shares_held = shares_held.replace(0, np.nan)
 
     shares_longed = shares_held[shares_held > 0]
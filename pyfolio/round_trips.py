@@ -20,6 +20,7 @@ from collections import deque, OrderedDict
 import pandas as pd
 import numpy as np
 
+from .txn import to_transactions, to_transaction_frame
 from .utils import print_table, format_asset
 
 PNL_STATS = OrderedDict(
@@ -92,13 +93,169 @@ def agg_all_long_short(round_trips, col, stats_dict):
     return stats_all.join(stats_long_short)
 
 
+def _sorted_group_stats(values, valid, codes, n_groups):
+    """
+    Counts, sums, extrema and medians of values by group, over all
+    valid values and over the positive and the negative ones, from a
+    single sort by group and value.
+
+    Extrema of groups without valid values are NaN, or the smallest
+    integer (NaT) for integer values.
+    """
+
+    order = np.lexsort((values, ~valid, codes))
+    values = values[order]
+    valid = valid[order]
+    codes = codes[order]
+
+    def group_sum(weights):
+        return np.bincount(codes, weights=weights, minlength=n_groups)
+
+    size = np.bincount(codes, minlength=n_groups)
+    start = np.cumsum(size) - size
+    positive = valid & (values > 0)
+    negative = valid & (values < 0)
+    fvalues = values.astype(float)
+
+    stats = {
+        'size': size,
+        'count': group_sum(valid),
+        'n_pos': group_sum(positive),
+        'n_neg': group_sum(negative),
+        'sum': group_sum(np.where(valid, fvalues, 0)),
+        'pos_sum': group_sum(np.where(positive, fvalues, 0)),
+        'neg_sum': group_sum(np.where(negative, fvalues, 0)),
+    }
+
+    # Sorted values of each group are its negative values, zeros,
+    # positive values and then invalid values.
+    empty = np.nan if values.dtype.kind == 'f' else np.iinfo('i8').min
+    last = max(len(values) - 1, 0)
+
+    def pick(i, k):
+        return np.where(k > 0, values[np.minimum(i, last)], empty)
+
+    def median(lo, k):
+        k = k.astype(int)
+        return np.where(k > 0,
+                        (fvalues[np.minimum(lo + (k - 1) // 2, last)] +
+                         fvalues[np.minimum(lo + k // 2, last)]) / 2,
+                        np.nan)
+
+    pos_start = start + stats['count'].astype(int) - \
+        stats['n_pos'].astype(int)
+    stats['min'] = pick(start, stats['count'])
+    stats['max'] = pick(start + stats['count'].astype(int) - 1,
+                        stats['count'])
+    stats['median'] = median(start, stats['count'])
+    stats['pos_median'] = median(pos_start, stats['n_pos'])
+    stats['neg_median'] = median(start, stats['n_neg'])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stats['mean'] = stats['sum'] / stats['count']
+        stats['pos_mean'] = stats['pos_sum'] / stats['n_pos']
+        stats['neg_mean'] = stats['neg_sum'] / stats['n_neg']
+
+    return stats
+
+
+def _pnl_stats(s):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        profit_factor = np.where(s['neg_sum'] != 0,
+                                 s['pos_sum'] / -s['neg_sum'], np.nan)
+        win_loss_ratio = np.where(-s['neg_mean'] != 0,
+                                  s['pos_mean'] / -s['neg_mean'], np.nan)
+
+    return OrderedDict([
+        ('Total profit', s['sum']),
+        ('Gross profit', s['pos_sum']),
+        ('Gross loss', s['neg_sum']),
+        ('Profit factor', profit_factor),
+        ('Avg. trade net profit', s['mean']),
+        ('Avg. winning trade', s['pos_mean']),
+        ('Avg. losing trade', s['neg_mean']),
+        ('Ratio Avg. Win:Avg. Loss', win_loss_ratio),
+        ('Largest winning trade', s['max']),
+        ('Largest losing trade', s['min']),
+    ])
+
+
+def _summary_stats(s):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percent_profitable = s['n_pos'] / s['size']
+
+    return OrderedDict([
+        ('Total number of round_trips', s['count']),
+        ('Percent profitable', percent_profitable),
+        ('Winning round_trips', s['n_pos']),
+        ('Losing round_trips', s['n_neg']),
+        ('Even round_trips', s['count'] - s['n_pos'] - s['n_neg']),
+    ])
+
+
+def _duration_stats(s):
+    with np.errstate(invalid='ignore'):
+        return OrderedDict(
+            (name, pd.to_timedelta(s[key]).values)
+            for name, key in [('Avg duration', 'mean'),
+                              ('Median duration', 'median'),
+                              ('Longest duration', 'max'),
+                              ('Shortest duration', 'min')])
+
+
+def _return_stats(s):
+    return OrderedDict([
+        ('Avg returns all round_trips', s['mean']),
+        ('Avg returns winning', s['pos_mean']),
+        ('Avg returns losing', s['neg_mean']),
+        ('Median returns all round_trips', s['median']),
+        ('Median returns winning', s['pos_median']),
+        ('Median returns losing', s['neg_median']),
+        ('Largest winning trade', s['max']),
+        ('Largest losing trade', s['min']),
+    ])
+
+
+def _stats_frame(rows, groups, keep):
+    return pd.DataFrame(np.vstack([row[keep] for row in rows.values()]),
+                        index=list(rows), columns=groups)
+
+
+def _all_long_short_stats(values, valid, is_long, stats_funcs):
+    """
+    Tables of statistics of values over all trades, short trades and
+    long trades, as computed by agg_all_long_short.
+    """
+
+    all_stats = _sorted_group_stats(values, valid,
+                                    np.zeros(len(values), dtype=int), 1)
+    long_short_stats = _sorted_group_stats(values, valid,
+                                           is_long.astype(int), 2)
+
+    present = long_short_stats['size'] > 0
+    groups = ['All trades'] + \
+        [name for name, p in zip(['Short trades', 'Long trades'], present)
+         if p]
+    keep = np.concatenate([[True], present])
+
+    tables = []
+    for stats_func in stats_funcs:
+        rows = OrderedDict(
+            (name, np.concatenate([all_row, long_short_row]))
+            for (name, all_row), long_short_row in zip(
+                stats_func(all_stats).items(),
+                stats_func(long_short_stats).values()))
+        tables.append(_stats_frame(rows, groups, keep))
+    return tables
+
+
 def _groupby_consecutive(txn, max_delta=pd.Timedelta('8h')):
     """Merge transactions of the same direction separated by less than
     max_delta time duration.
 
     Parameters
     ----------
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame or txn.Transactions
         Prices and amounts of executed round_trips. One row per trade.
         - See full explanation in tears.create_full_tear_sheet
 
@@ -120,8 +277,7 @@ def _groupby_consecutive(txn, max_delta=pd.Timedelta('8h')):
             transaction.amount.sum()
 
     out = []
-    for sym, t in txn.groupby('symbol'):
-        t = t.sort_index()
+    for sym, t in to_transactions(txn).iter_symbols():
         t.index.name = 'dt'
         t = t.reset_index()
 
@@ -180,7 +336,7 @@ def extract_round_trips(transactions,
 
     Parameters
     ----------
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame or txn.Transactions
         Prices and amounts of executed round_trips. One row per trade.
         - See full explanation in tears.create_full_tear_sheet
 
@@ -188,6 +344,8 @@ def extract_round_trips(transactions,
         Portfolio value (all net assets including cash) over time.
         Note that portfolio_value needs to beginning of day, so either
         use .shift() or positions.sum(axis='columns') / (1+returns).
+        Round trips closing on a day missing from portfolio_value use
+        the last value before that day.
 
     Returns
     -------
@@ -255,22 +413,233 @@ def extract_round_trips(transactions,
     roundtrips['duration'] = roundtrips['close_dt'].sub(roundtrips['open_dt'])
 
     if portfolio_value is not None:
-        # Need to normalize so that we can join
-        pv = pd.DataFrame(portfolio_value,
-                          columns=['portfolio_value'])\
-            .assign(date=portfolio_value.index)
+        # Portfolio value at the start of the close day, or of the last
+        # day before it when the round trip closes on a non-trading day.
+        close_days = pd.DatetimeIndex(roundtrips.close_dt).normalize()
+        loc = portfolio_value.index.searchsorted(close_days,
+                                                 side='right') - 1
+        pv = np.where(loc >= 0,
+                      portfolio_value.values[np.maximum(loc, 0)], np.nan)
 
-        roundtrips['date'] = roundtrips.close_dt.apply(lambda x:
-                                                       x.replace(hour=0,
-                                                                 minute=0,
-                                                                 second=0))
+        roundtrips['returns'] = roundtrips.pnl.values / pv
 
-        tmp = roundtrips.join(pv, on='date', lsuffix='_')
+    return roundtrips
 
-        roundtrips['returns'] = tmp.pnl / tmp.portfolio_value
-        roundtrips = roundtrips.drop('date', axis='columns')
 
-    return roundtrips
+class RoundTrips(object):
+    """
+    Columnar store of round trips, indexed by symbol and time.
+
+    Round trips are kept sorted by symbol and open time, with the
+    offsets of each symbol's trips and, within each symbol, the running
+    maximum of the close times. Selections by symbol, sector and time
+    range binary search these for each selected symbol at once, and
+    only scan the trips between the bounds found.
+
+    Parameters
+    ----------
+    round_trips : pd.DataFrame
+        DataFrame with one row per round trip trade.
+        - See full explanation in round_trips.extract_round_trips
+    sector_mappings : dict or pd.Series, optional
+        Security identifier to sector mapping, stored in a sector
+        column. Symbols without a mapping get 'No Sector Mapping'. If
+        not given, an existing sector column is used.
+
+    Attributes
+    ----------
+    frame : pd.DataFrame
+        The round trips, sorted by symbol and open time.
+    symbols : pd.Index
+        Unique symbols, sorted.
+    symbol_offsets : np.ndarray
+        Boundaries of each symbol's trips in frame: the trips of
+        symbols[i] are rows symbol_offsets[i] to symbol_offsets[i + 1].
+    open_times, close_times : np.ndarray
+        int64 nanosecond open and close times of the sorted trips.
+    """
+
+    def __init__(self, round_trips, sector_mappings=None):
+        if sector_mappings is not None:
+            round_trips = round_trips.assign(
+                sector=round_trips.symbol.apply(
+                    lambda x: sector_mappings.get(x, 'No Sector Mapping')))
+
+        codes, symbols = pd.factorize(round_trips['symbol'], sort=True)
+        open_dts = pd.DatetimeIndex(round_trips['open_dt'])
+        order = np.lexsort((open_dts.asi8, codes))
+
+        self.frame = round_trips.iloc[order].reset_index(drop=True)
+        self.symbols = symbols
+        self.tz = open_dts.tz
+
+        self._codes = codes[order]
+        self.symbol_offsets = np.searchsorted(
+            self._codes, np.arange(len(symbols) + 1))
+        self.open_times = open_dts.asi8[order]
+        self.close_times = pd.DatetimeIndex(self.frame['close_dt']).asi8
+        self.long = np.asarray(self.frame['long'], dtype=bool)
+
+        # Latest close of the trips opened up to each trip, within its
+        # symbol. Trips still open at a time t are those after the
+        # first one whose running close is later than t.
+        max_close = pd.Series(self.close_times).groupby(self._codes) \
+            .cummax().values
+
+        # Open times and running closes are replaced by their ranks and
+        # offset by symbol, so that a single searchsorted finds the
+        # bounds within each selected symbol's trips.
+        self._open_grid = np.unique(self.open_times)
+        self._open_keys = self._symbol_keys(
+            np.searchsorted(self._open_grid, self.open_times),
+            len(self._open_grid))
+        self._close_grid = np.unique(max_close)
+        self._close_keys = self._symbol_keys(
+            np.searchsorted(self._close_grid, max_close),
+            len(self._close_grid))
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __getitem__(self, key):
+        """
+        Boolean masks over the (sorted) rows select a new RoundTrips
+        object, anything else is looked up in frame.
+        """
+
+        key_values = getattr(key, 'values', key)
+        if getattr(key_values, 'dtype', None) == bool:
+            return RoundTrips(self.frame[key_values])
+        return self.frame[key]
+
+    def _nanos(self, time, default):
+        if time is None:
+            return default
+        time = pd.Timestamp(time)
+        if self.tz is not None and time.tz is None:
+            time = time.tz_localize(self.tz)
+        elif self.tz is None and time.tz is not None:
+            time = time.tz_convert(None)
+        return time.value
+
+    def _symbol_keys(self, ranks, n_ranks, codes=None):
+        if codes is None:
+            codes = self._codes
+        return codes.astype('i8') * (n_ranks + 1) + ranks
+
+    def _symbol_codes(self, symbols, sectors):
+        codes = np.arange(len(self.symbols))
+        if symbols is not None:
+            codes = self.symbols.get_indexer(pd.Index(symbols).unique())
+            codes = np.sort(codes[codes >= 0])
+        if sectors is not None:
+            symbol_sectors = self.frame['sector'].values[
+                self.symbol_offsets[codes]]
+            codes = codes[np.in1d(symbol_sectors, list(sectors))]
+        return codes
+
+    def select(self, symbols=None, sectors=None, start=None, end=None,
+               long=None):
+        """
+        Round trips of the given symbols or sectors that were open at
+        some time between start and end.
+
+        A trip is open from its open_dt up to, but not including, its
+        close_dt.
+
+        Parameters
+        ----------
+        symbols : list-like, optional
+            Symbols to select. Defaults to all symbols.
+        sectors : list-like, optional
+            Sectors to select. Needs a sector column, see RoundTrips.
+        start, end : datetime-like, optional
+            Time range. Defaults to the full history.
+        long : bool, optional
+            Select only long (True) or short (False) trips.
+
+        Returns
+        -------
+        pd.DataFrame
+            The selected round trips, sorted by symbol and open time.
+        """
+
+        start = self._nanos(start, np.iinfo('i8').min)
+        end = self._nanos(end, np.iinfo('i8').max)
+
+        codes = self._symbol_codes(symbols, sectors)
+
+        # Within each symbol, trips from lo on have a running close
+        # after start, and trips before hi open at or before end.
+        lo = np.searchsorted(self._close_keys, self._symbol_keys(
+            np.searchsorted(self._close_grid, start, side='right'),
+            len(self._close_grid), codes))
+        hi = np.searchsorted(self._open_keys, self._symbol_keys(
+            np.searchsorted(self._open_grid, end, side='right'),
+            len(self._open_grid), codes))
+
+        counts = np.maximum(hi - lo, 0)
+        rows = np.arange(counts.sum()) + np.repeat(
+            lo - np.cumsum(counts) + counts, counts)
+
+        rows = rows[self.close_times[rows] > start]
+        if long is not None:
+            rows = rows[self.long[rows] == long]
+        return self.frame.iloc[rows]
+
+    def open_at(self, time, symbols=None, sectors=None, long=None):
+        """
+        Round trips open at the given time: opened at or before it and
+        closed after it.
+
+        See RoundTrips.select for the parameters.
+        """
+
+        return self.select(symbols=symbols, sectors=sectors, start=time,
+                           end=time, long=long)
+
+    def to_parquet(self, path, **kwargs):
+        """
+        Saves the round trips to a Parquet file. Requires pandas 0.21
+        or later and pyarrow or fastparquet.
+
+        Parameters
+        ----------
+        path : str or file-like
+            Destination file.
+        **kwargs, optional
+            Passed to pd.DataFrame.to_parquet.
+        """
+
+        _check_parquet_support()
+        self.frame.to_parquet(path, **kwargs)
+
+    @classmethod
+    def from_parquet(cls, path, **kwargs):
+        """
+        Loads round trips saved by RoundTrips.to_parquet.
+
+        Parameters
+        ----------
+        path : str or file-like
+            Parquet file.
+        **kwargs, optional
+            Passed to pd.read_parquet.
+
+        Returns
+        -------
+        RoundTrips
+        """
+
+        _check_parquet_support()
+        return cls(pd.read_parquet(path, **kwargs))
+
+
+def _check_parquet_support():
+    if not hasattr(pd, 'read_parquet'):
+        raise ImportError(
+            'Parquet support requires pandas 0.21 or later, found '
+            'pandas {}.'.format(pd.__version__))
 
 
 def add_closing_transactions(positions, transactions):
@@ -283,7 +652,7 @@ def add_closing_transactions(positions, transactions):
     ----------
     positions : pd.DataFrame
         The positions that the strategy takes over time.
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame or txn.Transactions
         Prices and amounts of executed round_trips. One row per trade.
         - See full explanation in tears.create_full_tear_sheet
 
@@ -293,6 +662,7 @@ def add_closing_transactions(positions, transactions):
         Transactions with closing transactions appended.
     """
 
+    transactions = to_transaction_frame(transactions)
     closed_txns = transactions[['symbol', 'amount', 'price']]
 
     pos_at_end = positions.drop('cash', axis=1).iloc[-1]
@@ -301,18 +671,17 @@ def add_closing_transactions(positions, transactions):
     # they don't conflict with other round_trips executed at that time.
     end_dt = open_pos.name + pd.Timedelta(seconds=1)
 
-    for sym, ending_val in open_pos.iteritems():
-        txn_sym = transactions[transactions.symbol == sym]
+    ending_amounts = transactions.groupby('symbol').amount.sum() \
+        .reindex(open_pos.index, fill_value=0)
 
-        ending_amount = txn_sym.amount.sum()
-
-        ending_price = ending_val / ending_amount
-        closing_txn = {'symbol': sym,
-                       'amount': -ending_amount,
-                       'price': ending_price}
-
-        closing_txn = pd.DataFrame(closing_txn, index=[end_dt])
-        closed_txns = closed_txns.append(closing_txn)
+    if len(open_pos) > 0:
+        closing_txns = pd.DataFrame(
+            {'symbol': open_pos.index,
+             'amount': -ending_amounts.values,
+             'price': (open_pos / ending_amounts).values},
+            index=pd.DatetimeIndex([end_dt] * len(open_pos)),
+            columns=closed_txns.columns)
+        closed_txns = pd.concat([closed_txns, closing_txns])
 
     closed_txns = closed_txns[closed_txns.amount != 0]
 
@@ -361,26 +730,141 @@ def gen_round_trip_stats(round_trips):
        A dictionary where each value is a pandas DataFrame containing
        various round-trip statistics.
 
+    Notes
+    -----
+    The tables hold the statistics of PNL_STATS, SUMMARY_STATS,
+    DURATION_STATS and RETURN_STATS. They are computed from one sort of
+    each column by group rather than by aggregating those functions.
+
     See also
     --------
     round_trips.print_round_trip_stats
     """
 
-    stats = {}
-    stats['pnl'] = agg_all_long_short(round_trips, 'pnl', PNL_STATS)
-    stats['summary'] = agg_all_long_short(round_trips, 'pnl',
-                                          SUMMARY_STATS)
-    stats['duration'] = agg_all_long_short(round_trips, 'duration',
-                                           DURATION_STATS)
-    stats['returns'] = agg_all_long_short(round_trips, 'returns',
-                                          RETURN_STATS)
+    is_long = np.asarray(round_trips['long'], dtype=bool)
+
+    pnl = np.asarray(round_trips['pnl'], dtype=float)
+    stats_pnl, stats_summary = _all_long_short_stats(
+        pnl, ~np.isnan(pnl), is_long, [_pnl_stats, _summary_stats])
 
-    stats['symbols'] = \
-        round_trips.groupby('symbol')['returns'].agg(RETURN_STATS).T
+    duration = pd.TimedeltaIndex(round_trips['duration'])
+    stats_duration, = _all_long_short_stats(
+        duration.asi8, ~duration.isnull(), is_long, [_duration_stats])
+
+    returns = np.asarray(round_trips['returns'], dtype=float)
+    valid_returns = ~np.isnan(returns)
+    stats_returns, = _all_long_short_stats(
+        returns, valid_returns, is_long, [_return_stats])
+
+    symbol_codes, symbols = pd.factorize(round_trips['symbol'], sort=True)
+    has_symbol = symbol_codes >= 0
+    symbol_stats = _sorted_group_stats(returns[has_symbol],
+                                       valid_returns[has_symbol],
+                                       symbol_codes[has_symbol],
+                                       len(symbols))
+    stats_symbols = _stats_frame(
+        _return_stats(symbol_stats), pd.Index(symbols, name='symbol'),
+        np.ones(len(symbols), dtype=bool))
+
+    stats = {}
+    stats['pnl'] = stats_pnl
+    stats['summary'] = stats_summary
+    stats['duration'] = stats_duration
+    stats['returns'] = stats_returns
+    stats['symbols'] = stats_symbols
 
     return stats
 
 
+def binned_distribution(values, max_bins=50, outlier_percentile=0.5):
+    """
+    Fixed-bin histogram of values, with robust bin edges.
+
+    The bins span the outlier_percentile to 100 - outlier_percentile
+    range of the values, and values outside of it are counted in the
+    first and last bins, so that a few extreme values do not squash
+    the histogram. The number of bins follows the Freedman-Diaconis
+    rule, at most max_bins, as in seaborn's distplot. Bins of integer
+    values are whole numbers wide and centred on the integers.
+
+    Parameters
+    ----------
+    values : array-like
+        Values to bin. NaNs and infinite values are ignored.
+    max_bins : int, optional
+        Maximum number of bins.
+    outlier_percentile : float, optional
+        Percentile of the values, at each end, left out of the bin
+        range.
+
+    Returns
+    -------
+    counts : np.ndarray
+        Number of values in each bin.
+    bin_edges : np.ndarray
+        Edges of the bins, one more than counts.
+    """
+
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return np.zeros(1, dtype=int), np.array([0., 1.])
+
+    lower, q25, q75, upper = np.percentile(
+        values, [outlier_percentile, 25, 75, 100 - outlier_percentile])
+    if upper <= lower:
+        lower, upper = values.min() - 0.5, values.max() + 0.5
+
+    width = 2 * (q75 - q25) / len(values) ** (1 / 3)
+    if width > 0:
+        n_bins = int(np.ceil((upper - lower) / width))
+    else:
+        n_bins = int(np.sqrt(len(values)))
+    n_bins = min(max(n_bins, 1), max_bins)
+
+    if np.all(values == np.round(values)):
+        # Centre whole-number bins on integer values, e.g. days.
+        lower, upper = np.round(lower), np.round(upper)
+        step = max(np.ceil((upper - lower + 1) / n_bins), 1)
+        n_bins = int(np.ceil((upper - lower + 1) / step))
+        bin_edges = lower - 0.5 + step * np.arange(n_bins + 1)
+    else:
+        bin_edges = np.linspace(lower, upper, n_bins + 1)
+    counts, _ = np.histogram(np.clip(values, lower, upper), bin_edges)
+    return counts, bin_edges
+
+
+def gen_round_trip_distributions(round_trips, max_bins=50):
+    """
+    Generate binned distributions of round-trip holding times, PnL and
+    returns.
+
+    Parameters
+    ----------
+    round_trips : pd.DataFrame
+        DataFrame with one row per round trip trade.
+        - See full explanation in round_trips.extract_round_trips
+    max_bins : int, optional
+        Maximum number of bins of each distribution.
+
+    Returns
+    -------
+    distributions : OrderedDict
+        (counts, bin_edges) pairs, see binned_distribution, of the
+        holding times in days ('holding_days'), the PnL in dollars
+        ('pnl') and the returns in percent ('returns').
+    """
+
+    return OrderedDict([
+        ('holding_days', binned_distribution(
+            round_trips['duration'].dt.days, max_bins=max_bins)),
+        ('pnl', binned_distribution(round_trips['pnl'],
+                                    max_bins=max_bins)),
+        ('returns', binned_distribution(round_trips['returns'] * 100,
+                                        max_bins=max_bins)),
+    ])
+
+
 def print_round_trip_stats(round_trips, hide_pos=False):
     """Print various round-trip statistics. Tries to pretty-print tables
     with HTML output if run inside IPython NB.
@@ -121,7 +121,7 @@ def create_full_tear_sheet(returns,
             2004-01-09    13939.3800     -14012.9930     711.5585
             2004-01-12    14492.6300     -14624.8700     27.1821
             2004-01-13    -13853.2800    13653.6400      -43.6375
-    transactions : pd.DataFrame, optional
+    transactions : pd.DataFrame or txn.Transactions, optional
         Executed trade volumes and fill prices.
         - One row per trade.
         - Trades on different names that occur at the
@@ -131,7 +131,7 @@ def create_full_tear_sheet(returns,
             2004-01-09 12:18:01    483      324.12   'AAPL'
             2004-01-09 12:18:01    122      83.10    'MSFT'
             2004-01-13 14:12:23    -75      340.43   'AAPL'
-    market_data : pd.Panel, optional
+    market_data : pd.Panel or market_data.MarketData, optional
         Panel with items axis of 'price' and 'volume' DataFrames.
         The major and minor axes should match those of the
         the passed positions DataFrame (same dates and symbols).
@@ -189,6 +189,9 @@ def create_full_tear_sheet(returns,
         - See create_perf_attrib_tear_sheet().
     """
 
+    # Sort and index the transactions once for all the tear sheets.
+    transactions = txn.to_transactions(transactions)
+
     if (unadjusted_returns is None) and (slippage is not None) and\
        (transactions is not None):
         unadjusted_returns = returns.copy()
@@ -301,7 +304,7 @@ def create_simple_tear_sheet(returns,
             2004-01-09    13939.3800     -14012.9930     711.5585
             2004-01-12    14492.6300     -14624.8700     27.1821
             2004-01-13    -13853.2800    13653.6400      -43.6375
-    transactions : pd.DataFrame, optional
+    transactions : pd.DataFrame or txn.Transactions, optional
         Executed trade volumes and fill prices.
         - One row per trade.
         - Trades on different names that occur at the
@@ -332,6 +335,7 @@ def create_simple_tear_sheet(returns,
         If True, set default plotting style context.
     """
 
+    transactions = txn.to_transactions(transactions)
     positions = utils.check_intraday(estimate_intraday, returns,
                                      positions, transactions)
 
@@ -412,10 +416,14 @@ def create_simple_tear_sheet(returns,
                                              hide_positions=False,
                                              ax=ax_top_positions)
 
-        plotting.plot_holdings(returns, positions_alloc, ax=ax_holdings)
+        position_stats = pos.get_position_stats(positions)
+
+        plotting.plot_holdings(returns, positions_alloc, ax=ax_holdings,
+                               position_stats=position_stats)
 
         plotting.plot_long_short_holdings(returns, positions_alloc,
-                                          ax=ax_long_short_holdings)
+                                          ax=ax_long_short_holdings,
+                                          position_stats=position_stats)
 
         if transactions is not None:
             # Plot simple transactions tear sheet
@@ -467,7 +475,7 @@ def create_returns_tear_sheet(returns, positions=None,
     positions : pd.DataFrame, optional
         Daily net position values.
          - See full explanation in create_full_tear_sheet.
-    transactions : pd.DataFrame, optional
+    transactions : pd.DataFrame or txn.Transactions, optional
         Executed trade volumes and fill prices.
         - See full explanation in create_full_tear_sheet.
     live_start_date : datetime, optional
@@ -663,7 +671,7 @@ def create_position_tear_sheet(returns, positions,
     sector_mappings : dict or pd.Series, optional
         Security identifier to sector mapping.
         Security ids as keys, sectors as values.
-    transactions : pd.DataFrame, optional
+    transactions : pd.DataFrame or txn.Transactions, optional
         Prices and amounts of executed trades. One row per trade.
          - See full explanation in create_full_tear_sheet.
     estimate_intraday: boolean or str, optional
@@ -698,13 +706,18 @@ def create_position_tear_sheet(returns, positions,
         hide_positions=hide_positions,
         ax=ax_top_positions)
 
-    plotting.plot_max_median_position_concentration(positions,
-                                                    ax=ax_max_median_pos)
+    # The concentration and holdings plots share one pass over positions.
+    position_stats = pos.get_position_stats(positions)
+
+    plotting.plot_max_median_position_concentration(
+        positions, ax=ax_max_median_pos, position_stats=position_stats)
 
-    plotting.plot_holdings(returns, positions_alloc, ax=ax_holdings)
+    plotting.plot_holdings(returns, positions_alloc, ax=ax_holdings,
+                           position_stats=position_stats)
 
     plotting.plot_long_short_holdings(returns, positions_alloc,
-                                      ax=ax_long_short_holdings)
+                                      ax=ax_long_short_holdings,
+                                      position_stats=position_stats)
 
     plotting.plot_gross_leverage(returns, positions,
                                  ax=ax_gross_leverage)
@@ -746,7 +759,7 @@ def create_txn_tear_sheet(returns, positions, transactions,
     positions : pd.DataFrame
         Daily net position values.
          - See full explanation in create_full_tear_sheet.
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame or txn.Transactions
         Prices and amounts of executed trades. One row per trade.
          - See full explanation in create_full_tear_sheet.
     unadjusted_returns : pd.Series, optional
@@ -761,6 +774,7 @@ def create_txn_tear_sheet(returns, positions, transactions,
         If True, returns the figure that was plotted on.
     """
 
+    transactions = txn.to_transactions(transactions)
     positions = utils.check_intraday(estimate_intraday, returns,
                                      positions, transactions)
 
@@ -831,7 +845,7 @@ def create_round_trip_tear_sheet(returns, positions, transactions,
     positions : pd.DataFrame
         Daily net position values.
          - See full explanation in create_full_tear_sheet.
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame or txn.Transactions
         Prices and amounts of executed trades. One row per trade.
          - See full explanation in create_full_tear_sheet.
     sector_mappings : dict or pd.Series, optional
@@ -884,15 +898,18 @@ def create_round_trip_tear_sheet(returns, positions, transactions,
 
     plotting.plot_prob_profit_trade(trades, ax=ax_prob_profit_trade)
 
-    trade_holding_times = [x.days for x in trades['duration']]
-    sns.distplot(trade_holding_times, kde=False, ax=ax_holding_time)
+    distributions = round_trips.gen_round_trip_distributions(trades)
+
+    plotting.plot_binned_distribution(*distributions['holding_days'],
+                                      ax=ax_holding_time)
     ax_holding_time.set(xlabel='Holding time in days')
 
-    sns.distplot(trades.pnl, kde=False, ax=ax_pnl_per_round_trip_dollars)
+    plotting.plot_binned_distribution(*distributions['pnl'],
+                                      ax=ax_pnl_per_round_trip_dollars)
     ax_pnl_per_round_trip_dollars.set(xlabel='PnL per round-trip trade in $')
 
-    sns.distplot(trades.returns.dropna() * 100, kde=False,
-                 ax=ax_pnl_per_round_trip_pct)
+    plotting.plot_binned_distribution(*distributions['returns'],
+                                      ax=ax_pnl_per_round_trip_pct)
     ax_pnl_per_round_trip_pct.set(
         xlabel='Round-trip returns in %')
 
@@ -1009,10 +1026,10 @@ def create_capacity_tear_sheet(returns, positions, transactions,
     positions : pd.DataFrame
         Daily net position values.
          - See full explanation in create_full_tear_sheet.
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame or txn.Transactions
         Prices and amounts of executed trades. One row per trade.
          - See full explanation in create_full_tear_sheet.
-    market_data : pd.Panel
+    market_data : pd.Panel or market_data.MarketData
         Panel with items axis of 'price' and 'volume' DataFrames.
         The major and minor axes should match those of the
         the passed positions DataFrame (same dates and symbols).
@@ -1033,6 +1050,7 @@ def create_capacity_tear_sheet(returns, positions, transactions,
         See description in create_full_tear_sheet.
     """
 
+    transactions = txn.to_transactions(transactions)
     positions = utils.check_intraday(estimate_intraday, returns,
                                      positions, transactions)
 
@@ -1042,11 +1060,14 @@ def create_capacity_tear_sheet(returns, positions, transactions,
           "Tickers with >1 day liquidation time at a"
           " constant $1m capital base:")
 
-    max_days_by_ticker = capacity.get_max_days_to_liquidate_by_ticker(
-        positions, market_data,
+    max_days, llts = capacity.gen_liquidity_reports(
+        positions, transactions, market_data,
+        windows=[None, last_n_days],
         max_bar_consumption=liquidation_daily_vol_limit,
         capital_base=1e6,
         mean_volume_window=5)
+
+    max_days_by_ticker = max_days[None]
     max_days_by_ticker.index = (
         max_days_by_ticker.index.map(utils.format_asset))
 
@@ -1055,12 +1076,7 @@ def create_capacity_tear_sheet(returns, positions, transactions,
         max_days_by_ticker[max_days_by_ticker.days_to_liquidate >
                            days_to_liquidate_limit])
 
-    max_days_by_ticker_lnd = capacity.get_max_days_to_liquidate_by_ticker(
-        positions, market_data,
-        max_bar_consumption=liquidation_daily_vol_limit,
-        capital_base=1e6,
-        mean_volume_window=5,
-        last_n_days=last_n_days)
+    max_days_by_ticker_lnd = max_days[last_n_days]
     max_days_by_ticker_lnd.index = (
         max_days_by_ticker_lnd.index.map(utils.format_asset))
 
@@ -1068,7 +1084,7 @@ def create_capacity_tear_sheet(returns, positions, transactions,
     utils.print_table(
         max_days_by_ticker_lnd[max_days_by_ticker_lnd.days_to_liquidate > 1])
 
-    llt = capacity.get_low_liquidity_transactions(transactions, market_data)
+    llt = llts[None]
     llt.index = llt.index.map(utils.format_asset)
 
     print('Tickers with daily transactions consuming >{}% of daily bar \n'
@@ -1076,8 +1092,7 @@ def create_capacity_tear_sheet(returns, positions, transactions,
     utils.print_table(
         llt[llt['max_pct_bar_consumed'] > trade_daily_vol_limit * 100])
 
-    llt = capacity.get_low_liquidity_transactions(
-        transactions, market_data, last_n_days=last_n_days)
+    llt = llts[last_n_days]
 
     print("Last {} trading days:".format(last_n_days))
     utils.print_table(
@@ -1294,7 +1309,8 @@ def create_risk_tear_sheet(positions,
                            returns=None,
                            transactions=None,
                            estimate_intraday='infer',
-                           return_fig=False):
+                           return_fig=False,
+                           mean_volume_window=None):
     '''
     Creates risk tear sheet: computes and plots style factor exposures, sector
     exposures, market cap exposures and volume exposures.
@@ -1352,8 +1368,8 @@ def create_risk_tear_sheet(positions,
         2017-04-04	           1968            -3272
         2017-04-05	           2104            -3917
 
-    volumes : pd.DataFrame
-        Daily volume per asset
+    volumes : pd.DataFrame, pd.Panel or market_data.MarketData
+        Daily volume per asset, or market data with a 'volume' field
         - DataFrame with dates as index and equities as columns
         - Example:
                           Equity(24        Equity(62
@@ -1365,13 +1381,23 @@ def create_risk_tear_sheet(positions,
     percentile : float
         Percentile to use when computing and plotting volume exposures.
         - Defaults to 10th percentile
+
+    mean_volume_window : int, optional
+        If given, volume exposures use the mean daily volume over this
+        many previous days instead of the same day's volume. Pass the
+        market data used by the capacity analysis as volumes to share
+        its cached averages.
     '''
 
     positions = utils.check_intraday(estimate_intraday, returns,
                                      positions, transactions)
 
+    volume_dates = getattr(volumes, 'major_axis', None)
+    if volume_dates is None:
+        volume_dates = volumes.index
+
     idx = positions.index & style_factor_panel.iloc[0].index & sectors.index \
-        & caps.index & shares_held.index & volumes.index
+        & caps.index & shares_held.index & volume_dates
     positions = positions.loc[idx]
 
     vertical_sections = 0
@@ -1393,7 +1419,9 @@ def create_risk_tear_sheet(positions,
                                  & (percentile is not None):
         vertical_sections += 3
         shares_held = shares_held.loc[idx]
-        volumes = volumes.loc[idx]
+        # Volumes are passed whole, so that trailing averages start at
+        # the first volume date and cached averages keyed on them are
+        # reused. The exposures are aligned on the dates of idx.
 
     if percentile is None:
         percentile = 0.1
@@ -1447,7 +1475,8 @@ def create_risk_tear_sheet(positions,
         i += 2
         ax_vol_gross = plt.subplot(gs[i, :], sharex=style_axes[0])
         longed_threshold, shorted_threshold, grossed_threshold \
-            = risk.compute_volume_exposures(positions, volumes, percentile)
+            = risk.compute_volume_exposures(positions, volumes, percentile,
+                                            mean_volume_window)
         risk.plot_volume_exposures_longshort(longed_threshold,
                                              shorted_threshold, percentile,
                                              ax_vol_longshort)
@@ -1495,7 +1524,7 @@ def create_perf_attrib_tear_sheet(returns,
         Factor loadings for all days in the date range, with date
         and ticker as index, and factors as columns.
 
-    transactions : pd.DataFrame, optional
+    transactions : pd.DataFrame or txn.Transactions, optional
         Prices and amounts of executed trades. One row per trade.
          - See full explanation in create_full_tear_sheet.
          - Default is None.
@@ -2,9 +2,13 @@ from __future__ import division
 from unittest import TestCase
 from nose_parameterized import parameterized
 
+import numpy as np
+
 from pandas import (
     Series,
     DataFrame,
+    DatetimeIndex,
+    Index,
     date_range,
     datetime,
     Panel
@@ -15,6 +19,9 @@ from pandas.util.testing import (assert_frame_equal,
 from pyfolio.capacity import (days_to_liquidate_positions,
                               get_max_days_to_liquidate_by_ticker,
                               get_low_liquidity_transactions,
+                              days_to_liquidate_grid,
+                              simulate_liquidation,
+                              gen_liquidity_reports,
                               daily_txns_with_bar_data,
                               apply_slippage_penalty)
 
@@ -40,26 +47,33 @@ class CapacityTestCase(TestCase):
                       columns=['A', 'B'], index=dates)
     market_data = Panel({'volume': volume, 'price': price})
 
-    def test_days_to_liquidate_positions(self):
+    @parameterized.expand([(None, np.float64),
+                           (1, np.float64),
+                           (1, np.float32)])
+    def test_days_to_liquidate_positions(self, chunk_size, dtype):
         dtlp = days_to_liquidate_positions(self.positions,
                                            self.market_data,
                                            max_bar_consumption=1,
                                            capital_base=1e6,
-                                           mean_volume_window=1)
+                                           mean_volume_window=1,
+                                           chunk_size=chunk_size,
+                                           dtype=dtype)
 
         expected = DataFrame([[0.0, .5/3],
                               [0.75/2, 0.0]],
                              columns=['A', 'B'],
-                             index=self.dates[1:])
+                             index=self.dates[1:]).astype(dtype)
         assert_frame_equal(dtlp, expected)
 
-    def test_get_max_days_to_liquidate_by_ticker(self):
+    @parameterized.expand([(None,), (1,)])
+    def test_get_max_days_to_liquidate_by_ticker(self, chunk_size):
 
         mdtl = get_max_days_to_liquidate_by_ticker(self.positions,
                                                    self.market_data,
                                                    max_bar_consumption=1,
                                                    capital_base=1e6,
-                                                   mean_volume_window=1)
+                                                   mean_volume_window=1,
+                                                   chunk_size=chunk_size)
 
         expected = DataFrame([[datetime(2015, 1, 3), .75/2, 75.],
                               [datetime(2015, 1, 2), .5/3, 50.]],
@@ -70,6 +84,64 @@ class CapacityTestCase(TestCase):
 
         assert_frame_equal(mdtl, expected)
 
+    def test_days_to_liquidate_grid(self):
+        grid = days_to_liquidate_grid(self.positions,
+                                      self.market_data,
+                                      max_bar_consumption=[1, 0.5],
+                                      capital_base=[1e6, 2e6],
+                                      mean_volume_window=1,
+                                      percentiles=[50, 100])
+
+        self.assertEqual(grid.columns.names,
+                         ['max_bar_consumption', 'capital_base',
+                          'percentile'])
+        # Only one position is held on each day.
+        base = np.array([.5/3, .75/2])
+        for max_bar_consumption, capital_base, percentile in grid.columns:
+            expected = Series(base * capital_base / 1e6 /
+                              max_bar_consumption,
+                              index=self.dates[1:])
+            assert_series_equal(
+                grid[max_bar_consumption, capital_base, percentile],
+                expected, check_names=False)
+
+        # Scalars give a single point of the grid.
+        grid = days_to_liquidate_grid(self.positions,
+                                      self.market_data,
+                                      max_bar_consumption=0.5,
+                                      capital_base=2e6,
+                                      mean_volume_window=1,
+                                      percentiles=100)
+        self.assertEqual(list(grid.columns), [(0.5, 2e6, 100)])
+        assert_series_equal(grid[0.5, 2e6, 100],
+                            Series(base * 4, index=self.dates[1:]),
+                            check_names=False)
+
+    def test_simulate_liquidation(self):
+        remaining, cost = simulate_liquidation(self.positions,
+                                               self.market_data,
+                                               start_dates=self.dates[:1],
+                                               max_bar_consumption=0.1,
+                                               capital_base=1e6,
+                                               mean_volume_window=1,
+                                               impact=0.1,
+                                               max_days=3)
+
+        # Day 1 trades 10% of the Jan 1 volume of A and B. Day 2 sells
+        # the rest of A and 10% of the Jan 2 volume of B. There is no
+        # volume to trade on day 3.
+        expected_remaining = DataFrame([[1e6, 6e5, 2.5e5, 2.5e5]],
+                                       index=self.dates[:1])
+        expected_cost = DataFrame(
+            [[0., 400., 400. + 0.1 * (.075 ** 2 * 1.5e5 + .01 * 2e5),
+              400. + 0.1 * (.075 ** 2 * 1.5e5 + .01 * 2e5)]],
+            index=self.dates[:1])
+
+        assert_frame_equal(remaining, expected_remaining,
+                           check_names=False, check_column_type=False)
+        assert_frame_equal(cost, expected_cost,
+                           check_names=False, check_column_type=False)
+
     @parameterized.expand([(DataFrame([[datetime(2015, 1, 1), 100.],
                                        [datetime(2015, 1, 2), 100]],
                                       columns=['date', 'max_pct_bar_consumed'],
@@ -89,6 +161,59 @@ class CapacityTestCase(TestCase):
         expected.index.name = 'symbol'
         assert_frame_equal(llt, expected)
 
+    def test_gen_liquidity_reports(self):
+        txn_daily = DataFrame(data=[[1, 1000000, 1, 'A'],
+                                    [2, 2000000, 1, 'B'],
+                                    [1, 1000000, 1, 'A']],
+                              columns=['sid', 'amount', 'price', 'symbol'],
+                              index=self.dates)
+        windows = [None, 1, 0]
+
+        max_days, llts = gen_liquidity_reports(self.positions, txn_daily,
+                                               self.market_data,
+                                               windows=windows,
+                                               max_bar_consumption=1,
+                                               capital_base=1e6,
+                                               mean_volume_window=1)
+
+        def max_days_frame(data):
+            return DataFrame(data, columns=['date', 'days_to_liquidate',
+                                            'pos_alloc_pct'],
+                             index=Index(['A', 'B'], name='symbol'))
+
+        def llt_frame(dates, pcts, symbols):
+            return DataFrame({'date': DatetimeIndex(dates),
+                              'max_pct_bar_consumed': np.array(pcts,
+                                                               dtype=float)},
+                             columns=['date', 'max_pct_bar_consumed'],
+                             index=Index(symbols, dtype=object,
+                                         name='symbol'))
+
+        expected_max_days = {
+            None: max_days_frame([[datetime(2015, 1, 3), .75/2, 75.],
+                                  [datetime(2015, 1, 2), .5/3, 50.]]),
+            1: max_days_frame([[datetime(2015, 1, 3), .75/2, 75.],
+                               [datetime(2015, 1, 2), .5/3, 50.]]),
+            # Positions from the cutoff on: only the last day, without B.
+            0: max_days_frame([[datetime(2015, 1, 3), .75/2, 75.],
+                               [datetime(2015, 1, 3), 0., 0.]]),
+        }
+        expected_llts = {
+            None: llt_frame(['2015-01-01', '2015-01-02'], [100., 100.],
+                            ['A', 'B']),
+            1: llt_frame(['2015-01-03'], [(1/3)*100.], ['A']),
+            # Transactions strictly after the cutoff: none.
+            0: llt_frame([], [], []),
+        }
+
+        self.assertEqual(list(max_days), windows)
+        self.assertEqual(list(llts), windows)
+        for last_n_days in windows:
+            assert_frame_equal(max_days[last_n_days],
+                               expected_max_days[last_n_days])
+            assert_frame_equal(llts[last_n_days],
+                               expected_llts[last_n_days])
+
     def test_daily_txns_with_bar_data(self):
         daily_txn = daily_txns_with_bar_data(
             self.transactions, self.market_data)
@@ -0,0 +1,114 @@
+from __future__ import division
+
+from unittest import TestCase
+from numpy.testing import assert_allclose
+
+import numpy as np
+import pandas as pd
+
+from pyfolio.costs import (CostModel,
+                           adjust_returns_for_costs,
+                           prepare_fills)
+from pyfolio.utils import APPROX_BDAYS_PER_YEAR
+
+
+class CostModelTestCase(TestCase):
+    dates = pd.date_range('2015-01-01', periods=4, freq='D', tz='UTC')
+
+    transactions = pd.DataFrame(
+        data=[[100, 10., 'A'],
+              [-50, 20., 'B'],
+              [200, 10., 'A'],
+              [-100, 11., 'A']],
+        columns=['amount', 'price', 'symbol'],
+        index=[dates[1], dates[1], dates[2], dates[3]])
+
+    positions = pd.DataFrame(
+        data=[[0., 0., 10000.],
+              [1000., -1000., 9000.],
+              [3000., -1000., 7000.],
+              [2200., -1000., 8100.]],
+        columns=['A', 'B', 'cash'],
+        index=dates)
+
+    returns = pd.Series([0., 0.01, -0.01, 0.02], index=dates)
+
+    market_data = {
+        'volume': pd.DataFrame(1000., index=dates, columns=['A', 'B']),
+        'spread': pd.DataFrame(
+            [[0.02, 0.04], [0.02, np.nan], [0.02, 0.04], [0.02, 0.04]],
+            index=dates, columns=['A', 'B']),
+    }
+
+    def test_commission(self):
+        fills = prepare_fills(self.transactions)
+        costs = CostModel(commission_per_share=0.01).daily_costs(fills)
+
+        assert_allclose(costs.commission.values, [1.5, 2., 1.])
+        assert_allclose(costs.total.values, costs.commission.values)
+
+    def test_spread_falls_back_to_bps(self):
+        fills = prepare_fills(self.transactions,
+                              market_data=self.market_data)
+        costs = CostModel(half_spread_bps=10).fill_costs(fills)
+
+        # B has no spread on the first fill's day.
+        assert_allclose(costs.spread.values,
+                        [0.01 * 100, 0.001 * 1000, 0.01 * 200, 0.01 * 100])
+
+    def test_missing_symbol_is_not_looked_up(self):
+        transactions = self.transactions.copy()
+        transactions.iloc[1, 2] = np.nan
+        fills = prepare_fills(transactions, market_data=self.market_data,
+                              adv_window=1)
+        costs = CostModel(half_spread_bps=10, impact=0.1).fill_costs(fills)
+
+        # The fill without a symbol gets no spread or ADV from B (or A).
+        self.assertTrue(np.isnan(fills.adv[1]))
+        assert_allclose(costs.spread.values[1], 0.001 * 1000)
+        assert_allclose(costs.impact.values[1], 0)
+
+    def test_impact_uses_trailing_adv(self):
+        fills = prepare_fills(self.transactions,
+                              market_data=self.market_data, adv_window=1)
+        costs = CostModel(impact=0.1).fill_costs(fills)
+
+        dollars = np.array([1000., 1000., 2000., 1100.])
+        shares = np.array([100., 50., 200., 100.])
+        assert_allclose(costs.impact.values,
+                        0.1 * dollars * np.sqrt(shares / 1000))
+
+        # Without volume there is no impact cost.
+        costs = CostModel(impact=0.1).fill_costs(
+            prepare_fills(self.transactions))
+        assert_allclose(costs.impact.values, 0)
+
+    def test_borrow(self):
+        borrow = CostModel(borrow_rate=0.05).borrow(self.positions)
+
+        assert_allclose(borrow.values,
+                        [0.] + [1000 * 0.05 / APPROX_BDAYS_PER_YEAR] * 3)
+
+    def test_adjust_returns_for_costs(self):
+        model = CostModel(commission_per_share=0.01, borrow_rate=0.05)
+        adjusted = adjust_returns_for_costs(self.returns, self.positions,
+                                            self.transactions, model)
+
+        costs = model.daily_costs(prepare_fills(self.transactions),
+                                  positions=self.positions).total
+        expected = self.returns - (costs / self.positions.sum(axis=1))
+        assert_allclose(adjusted.values, expected.values)
+        self.assertEqual(adjusted.iloc[0], self.returns.iloc[0])
+
+    def test_fills_are_reused_across_models(self):
+        fills = prepare_fills(self.transactions,
+                              market_data=self.market_data)
+
+        for impact in [0., 0.1, 0.5]:
+            model = CostModel(half_spread_bps=5, impact=impact)
+            from_fills = adjust_returns_for_costs(
+                self.returns, self.positions, fills, model)
+            from_frame = adjust_returns_for_costs(
+                self.returns, self.positions, self.transactions, model,
+                market_data=self.market_data)
+            assert_allclose(from_fills.values, from_frame.values)
@@ -0,0 +1,196 @@
+from __future__ import division
+
+import gc
+import shutil
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+from numpy.testing import assert_allclose
+from pandas import DataFrame, date_range
+from pandas.util.testing import assert_frame_equal
+
+from pyfolio.capacity import (days_to_liquidate_positions,
+                              daily_txns_with_bar_data)
+from pyfolio.market_data import ADVCache, MarketData
+
+
+class MarketDataTestCase(TestCase):
+    dates = date_range(start='2015-01-01', freq='D', periods=3, tz='UTC')
+
+    positions = DataFrame([[1.0, 3.0, 0.0],
+                           [0.0, 1.0, 1.0],
+                           [3.0, 0.0, 1.0]],
+                          columns=['A', 'B', 'cash'], index=dates)
+
+    volume = DataFrame([[1.0, 3.0],
+                        [2.0, 2.0],
+                        [3.0, 1.0]],
+                       columns=['A', 'B'], index=dates) * 1000000
+    price = DataFrame([[1.0, 1.0]] * len(dates),
+                      columns=['A', 'B'], index=dates)
+
+    def test_aligned_fields(self):
+        market_data = MarketData({'volume': self.volume,
+                                  'price': self.price[['B']].iloc[1:]})
+
+        self.assertTrue(market_data.dates.equals(self.dates))
+        self.assertEqual(list(market_data.symbols), ['A', 'B'])
+        self.assertTrue(market_data.fields['volume'].flags.c_contiguous)
+        assert_frame_equal(market_data['volume'], self.volume)
+        self.assertTrue(np.isnan(market_data['price'].values[0]).all())
+        self.assertTrue(np.isnan(market_data['price'].A).all())
+        with self.assertRaises(KeyError):
+            market_data['spread']
+
+    def test_select_shares_memory(self):
+        market_data = MarketData({'volume': self.volume,
+                                  'price': self.price.astype('float32')})
+        self.assertEqual(market_data.fields['price'].dtype, np.float32)
+
+        selected = market_data.select(start=self.dates[1],
+                                      symbols=slice('B', None))
+        self.assertTrue(np.shares_memory(selected.fields['volume'],
+                                         market_data.fields['volume']))
+        self.assertTrue(np.shares_memory(selected['volume'].values,
+                                         market_data.fields['volume']))
+        assert_frame_equal(selected['volume'],
+                           self.volume.iloc[1:][['B']])
+
+        selected = market_data.select(end=self.dates[1], symbols=['B', 'A'])
+        assert_frame_equal(selected['volume'],
+                           self.volume.iloc[:2][['B', 'A']])
+        with self.assertRaises(KeyError):
+            market_data.select(symbols=['C'])
+
+    def test_save_and_memory_map(self):
+        market_data = MarketData({'volume': self.volume,
+                                  'price': self.price})
+        path = tempfile.mkdtemp()
+        try:
+            market_data.save(path)
+            loaded = MarketData.load(path)
+
+            self.assertIsInstance(loaded.fields['volume'], np.memmap)
+            self.assertTrue(loaded.dates.equals(self.dates))
+            self.assertTrue(loaded.symbols.equals(self.volume.columns))
+            assert_allclose(loaded['volume'], self.volume)
+            assert_allclose(loaded['price'], self.price)
+            del loaded
+        finally:
+            shutil.rmtree(path)
+
+    def test_accepted_as_panel(self):
+        market_data = MarketData({'volume': self.volume,
+                                  'price': self.price})
+
+        dollar_volume = market_data.trailing_dollar_volume(1)
+        self.assertIs(market_data.trailing_dollar_volume(1), dollar_volume)
+        assert_allclose(dollar_volume.values[1:], self.volume.values[:-1])
+
+        dtlp = days_to_liquidate_positions(self.positions, market_data,
+                                           max_bar_consumption=1,
+                                           capital_base=1e6,
+                                           mean_volume_window=1)
+        assert_allclose(dtlp.values, [[0.0, .5 / 3], [0.75 / 2, 0.0]])
+
+        transactions = DataFrame(data=[[100000, 10, 'A']] * 3,
+                                 columns=['amount', 'price', 'symbol'],
+                                 index=self.dates)
+        daily_txn = daily_txns_with_bar_data(transactions, market_data)
+        assert_allclose(daily_txn.volume, self.volume.A)
+
+
+class ADVCacheTestCase(TestCase):
+    dates = date_range(start='2015-01-01', freq='D', periods=4)
+    volume = DataFrame([[1.0, 4.0],
+                        [2.0, 3.0],
+                        [3.0, 2.0],
+                        [4.0, 1.0]],
+                       columns=['A', 'B'], index=dates)
+
+    def test_trailing_volume(self):
+        cache = ADVCache(dtype=np.float32)
+        market_data = MarketData({'volume': self.volume,
+                                  'price': self.volume * 0 + 2})
+
+        adv = cache.volume(market_data, 2)
+        self.assertIs(cache.volume(market_data, 2), adv)
+        self.assertEqual(adv.values.dtype, np.float32)
+        assert_allclose(adv.values[2:], [[1.5, 3.5], [2.5, 2.5]])
+        self.assertTrue(np.isnan(adv.values[:2]).all())
+
+        assert_allclose(cache.dollar_volume(market_data, 2, shift=0),
+                        (self.volume * 2).rolling(2).mean())
+        assert_allclose(cache.volume(self.volume, 1), self.volume.shift())
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.nbytes, 3 * 8 * 4)
+
+        # The dtype is part of the key.
+        adv64 = cache.volume(market_data, 2, dtype=np.float64)
+        self.assertEqual(adv64.values.dtype, np.float64)
+        self.assertIs(cache.volume(market_data, 2, dtype='f8'), adv64)
+        self.assertIs(cache.volume(market_data, 2), adv)
+        self.assertEqual(cache.nbytes, 3 * 8 * 4 + 8 * 8)
+
+        # Zero masking is part of the key too.
+        volume = self.volume.copy()
+        volume.iloc[:2, 0] = 0
+        masked = cache.volume(volume, 1, zero_as_nan=True)
+        self.assertIs(cache.volume(volume, 1, zero_as_nan=True), masked)
+        self.assertEqual(masked.values.dtype, np.float32)
+        assert_allclose(masked, volume.shift().replace(0, np.nan))
+        self.assertEqual(cache.volume(volume, 1).iloc[1, 0], 0)
+
+    def test_eviction_and_invalidation(self):
+        cache = ADVCache(maxsize=2)
+        market_data = {'volume': self.volume}
+
+        adv = cache.volume(market_data, 1)
+        cache.volume(market_data, 2)
+        cache.volume(market_data, 1)
+        cache.volume(market_data, 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.volume(market_data, 1), adv)
+
+        cache.invalidate(market_data)
+        self.assertEqual(len(cache), 0)
+        self.assertIsNot(cache.volume(market_data, 1), adv)
+
+        volume = self.volume.copy()
+        cache.volume(volume, 1)
+        self.assertEqual(len(cache), 2)
+        del volume
+        gc.collect()
+        self.assertEqual(len(cache), 1)
+
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+        # Dicts are keyed on their fields and not kept alive.
+        market_data = {'volume': self.volume.copy()}
+        cache.volume(market_data, 1)
+        self.assertEqual(len(cache), 1)
+        del market_data
+        gc.collect()
+        self.assertEqual(len(cache), 0)
+
+    def test_byte_budget(self):
+        # Each float64 entry takes 4 x 2 x 8 = 64 bytes.
+        cache = ADVCache(max_bytes=2 * 64)
+
+        adv = cache.volume(self.volume, 1)
+        cache.volume(self.volume, 2)
+        cache.volume(self.volume, 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.nbytes, 2 * 64)
+        self.assertIsNot(cache.volume(self.volume, 1), adv)
+
+        # Entries over the budget are computed but not cached.
+        cache.max_bytes = 32
+        cache.invalidate()
+        assert_allclose(cache.volume(self.volume, 1), self.volume.shift())
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.volume(self.volume, 1, dtype=np.float32)
+                         .values.nbytes, 32)
+        self.assertEqual(len(cache), 1)
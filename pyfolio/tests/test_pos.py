@@ -26,7 +26,8 @@ from pyfolio.utils import (to_utc, to_series, check_intraday,
 from pyfolio.pos import (get_percent_alloc,
                          extract_pos,
                          get_sector_exposures,
-                         get_max_median_position_concentration)
+                         get_max_median_position_concentration,
+                         get_position_stats)
 
 
 class PositionsTestCase(TestCase):
@@ -144,6 +145,44 @@ class PositionsTestCase(TestCase):
         alloc_summary = get_max_median_position_concentration(positions)
         assert_frame_equal(expected, alloc_summary)
 
+    def test_get_position_stats(self):
+        positions = DataFrame([[1.0, -2.0, 0.0, 3.0, nan, 8.0],
+                               [2.0, 0.0, -4.0, -6.0, 4.0, 24.0],
+                               [nan, 0.0, nan, nan, nan, 10.0]],
+                              columns=[0, 1, 2, 3, 4, 'cash'],
+                              index=self.dates[:3])
+
+        position_stats = get_position_stats(positions)
+
+        expected = DataFrame(
+            [[2, 1, 0.4, -0.2, 0.3, 0.2, -0.2, -0.2],
+             [2, 2, 0.3, -0.5, 0.2, 0.15, -0.25, -0.3],
+             [0, 0, 0.0, 0.0, nan, nan, nan, nan]],
+            columns=['long_count', 'short_count', 'long_exposure',
+                     'short_exposure', 'max_long', 'median_long',
+                     'median_short', 'max_short'],
+            index=self.dates[:3])
+        assert_frame_equal(position_stats, expected, check_dtype=False)
+
+        position_stats = get_position_stats(positions, top=2)
+        expected_top = DataFrame(
+            [[0.3, 0.1, -0.2, nan],
+             [0.2, 0.1, -0.3, -0.2],
+             [nan, nan, nan, nan]],
+            columns=['top_long_1', 'top_long_2',
+                     'top_short_1', 'top_short_2'],
+            index=self.dates[:3])
+        assert_frame_equal(position_stats[expected.columns], expected,
+                           check_dtype=False)
+        assert_frame_equal(position_stats[expected_top.columns],
+                           expected_top)
+
+        # More than the number of symbols is padded with NaN.
+        position_stats = get_position_stats(positions, top=6)
+        self.assertTrue(position_stats[['top_long_6',
+                                        'top_short_6']].isnull().all().all())
+        self.assertEqual(position_stats.shape[1], 8 + 2 * 6)
+
     __location__ = os.path.realpath(
         os.path.join(os.getcwd(), os.path.dirname(__file__)))
 
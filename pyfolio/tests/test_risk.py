@@ -13,6 +13,7 @@ from pyfolio.risk import (compute_style_factor_exposures,
                           compute_sector_exposures,
                           compute_cap_exposures,
                           compute_volume_exposures)
+from pyfolio.market_data import ADV_CACHE, MarketData
 
 
 class RiskTestCase(TestCase):
@@ -152,3 +153,34 @@ class RiskTestCase(TestCase):
         assert_series_equal(l_thresh, expected['0'], check_names=False)
         assert_series_equal(s_thresh, expected['1'], check_names=False)
         assert_series_equal(g_thresh, expected['2'], check_names=False)
+
+    def test_compute_volume_exposures_from_market_data(self):
+        market_data = MarketData({'volume': self.test_volumes})
+
+        for result, expected in zip(
+                compute_volume_exposures(self.test_shares_held,
+                                         market_data, 0.1),
+                self.expected_volumes.columns):
+            assert_series_equal(result, self.expected_volumes[expected],
+                                check_names=False)
+
+        # Trailing volumes are cached on the market data object.
+        n_entries = len(ADV_CACHE)
+        expected = compute_volume_exposures(
+            self.test_shares_held,
+            self.test_volumes.rolling(2).mean().shift(), 0.1)
+        for _ in range(2):
+            result = compute_volume_exposures(self.test_shares_held,
+                                              market_data, 0.1,
+                                              mean_volume_window=2)
+            self.assertEqual(len(ADV_CACHE), n_entries + 1)
+            for left, right in zip(result, expected):
+                assert_series_equal(left, right)
+
+        # Trailing means start at the first date of volumes, not of
+        # shares_held.
+        shares_held = self.test_shares_held.iloc[5:]
+        result = compute_volume_exposures(shares_held, self.test_volumes,
+                                          0.1, mean_volume_window=2)
+        for left, right in zip(result, expected):
+            assert_series_equal(left, right.iloc[5:])
@@ -1,3 +1,5 @@
+from __future__ import division
+
 from nose_parameterized import parameterized
 
 from unittest import TestCase
@@ -11,13 +13,22 @@ from pandas import (
     read_csv
 )
 from pandas.util.testing import (assert_frame_equal)
+from numpy import nan
+from numpy.testing import assert_allclose
 
 import os
 import gzip
+from io import BytesIO
 
 from pyfolio.round_trips import (extract_round_trips,
                                  add_closing_transactions,
+                                 binned_distribution,
+                                 gen_round_trip_distributions,
+                                 gen_round_trip_stats,
                                  _groupby_consecutive,
+                                 PNL_STATS,
+                                 RETURN_STATS,
+                                 RoundTrips,
                                  )
 
 
@@ -136,6 +147,21 @@ class RoundTripTestCase(TestCase):
                    index=[0]),
          Series([100., 100., 100.], index=dates[:3]),
          ),
+        # Round-trip closing on a day without portfolio value
+        (DataFrame(data=[[4, 10., 'A'],
+                         [-2, 15., 'A'],
+                         [2, 20., 'A']],
+                   columns=['amount', 'price', 'symbol'],
+                   index=dates[:3]),
+         DataFrame(data=[[dates[0], dates[1],
+                          Timedelta(days=1), 10., .5,
+                          True, 'A', 0.1]],
+                   columns=['open_dt', 'close_dt',
+                            'duration', 'pnl', 'rt_returns',
+                            'long', 'symbol', 'returns'],
+                   index=[0]),
+         Series([100., 200.], index=dates[[0, 2]]),
+         ),
 
     ])
     def test_extract_round_trips(self, transactions, expected,
@@ -189,3 +215,126 @@ class RoundTripTestCase(TestCase):
 
         self.assertAlmostEqual(round_trips.pnl.sum(),
                                transactions_closed.txn_dollars.sum())
+
+    def test_gen_round_trip_stats(self):
+        round_trips = DataFrame({'pnl': [10., -5., 20., 0.],
+                                 'returns': [.1, -.05, .2, 0.],
+                                 'long': [True, True, False, True],
+                                 'symbol': ['A', 'B', 'A', 'B'],
+                                 'duration': [Timedelta(days=d)
+                                              for d in [1, 2, 3, 4]]})
+
+        stats = gen_round_trip_stats(round_trips)
+
+        self.assertEqual(list(stats['pnl'].columns),
+                         ['All trades', 'Short trades', 'Long trades'])
+        self.assertEqual(list(stats['pnl'].index), list(PNL_STATS))
+        assert_allclose(stats['pnl']['All trades'],
+                        [25, 30, -5, 6, 6.25, 15, -5, 3, 20, -5])
+        assert_allclose(stats['pnl']['Short trades'],
+                        [20, 20, 0, nan, 20, 20, nan, nan, 20, 20])
+        assert_allclose(stats['summary']['Long trades'],
+                        [3, 1 / 3, 1, 1, 1])
+        self.assertEqual(list(stats['duration']['All trades']),
+                         [Timedelta(days=2.5), Timedelta(days=2.5),
+                          Timedelta(days=4), Timedelta(days=1)])
+        self.assertEqual(list(stats['returns'].index), list(RETURN_STATS))
+        assert_allclose(stats['symbols']['A'],
+                        [.15, .15, nan, .15, .15, nan, .2, .1])
+
+    def test_binned_distribution(self):
+        values = Series(list(range(1000)) + [1e6, nan])
+        counts, bin_edges = binned_distribution(values, max_bins=10)
+
+        self.assertEqual(len(bin_edges), len(counts) + 1)
+        self.assertLessEqual(len(counts), 10)
+        self.assertEqual(counts.sum(), 1001)
+        # The outlier is counted in the last bin.
+        self.assertLess(bin_edges[-1], 1100)
+        assert_allclose(bin_edges[0] % 1, .5)
+
+        counts, bin_edges = binned_distribution([.5, .5, 1.5], max_bins=10)
+        self.assertEqual(counts.sum(), 3)
+
+    def test_gen_round_trip_distributions(self):
+        round_trips = DataFrame({'pnl': [10., -5., 20., 0.],
+                                 'returns': [.1, -.05, nan, 0.],
+                                 'duration': [Timedelta(days=d, hours=5)
+                                              for d in [1, 2, 2, 4]]})
+
+        distributions = gen_round_trip_distributions(round_trips)
+
+        self.assertEqual(list(distributions),
+                         ['holding_days', 'pnl', 'returns'])
+        counts, bin_edges = distributions['holding_days']
+        self.assertEqual(list(bin_edges[:-1][counts > 0] + .5), [1, 2, 4])
+        self.assertEqual(list(counts[counts > 0]), [1, 2, 1])
+        self.assertEqual(distributions['returns'][0].sum(), 3)
+
+
+class RoundTripsStoreTestCase(TestCase):
+    dates = date_range(start='2015-01-01', freq='D', periods=10)
+    round_trips = DataFrame({
+        'open_dt': dates[[3, 0, 1, 5, 2]],
+        'close_dt': dates[[4, 9, 2, 8, 3]],
+        'pnl': [1., 2., 3., 4., 5.],
+        'long': [True, False, True, True, False],
+        'symbol': ['B', 'A', 'A', 'B', 'C'],
+    })
+
+    def test_sorted_columns(self):
+        store = RoundTrips(self.round_trips,
+                           sector_mappings={'A': 'X', 'B': 'X'})
+
+        self.assertEqual(len(store), 5)
+        self.assertEqual(list(store.symbols), ['A', 'B', 'C'])
+        self.assertEqual(list(store.symbol_offsets), [0, 2, 4, 5])
+        self.assertEqual(list(store['pnl']), [2., 3., 1., 4., 5.])
+        self.assertEqual(list(store['sector']),
+                         ['X', 'X', 'X', 'X', 'No Sector Mapping'])
+
+    def test_select(self):
+        store = RoundTrips(self.round_trips,
+                           sector_mappings={'A': 'X', 'B': 'X'})
+
+        # Trip C closes at the start of the range.
+        self.assertEqual(list(store.select(start=self.dates[3],
+                                           end=self.dates[4]).pnl),
+                         [2., 1.])
+        self.assertEqual(list(store.select(symbols=['B', 'D']).pnl),
+                         [1., 4.])
+        self.assertEqual(len(store.select(symbols=['D'])), 0)
+        self.assertEqual(list(store.select(symbols=['C', 'A'],
+                                           end=self.dates[1]).pnl),
+                         [2., 3.])
+        self.assertEqual(list(store.select(sectors=['X'],
+                                           long=True).pnl),
+                         [3., 1., 4.])
+        self.assertEqual(list(store.open_at(self.dates[6]).pnl),
+                         [2., 4.])
+        self.assertEqual(list(store.open_at(self.dates[6],
+                                            long=False).pnl),
+                         [2.])
+
+        longs = store[store['long']]
+        self.assertIsInstance(longs, RoundTrips)
+        self.assertEqual(list(longs.open_at(self.dates[1]).pnl), [3.])
+
+    def test_parquet(self):
+        try:
+            import pyarrow  # noqa
+        except ImportError:
+            try:
+                import fastparquet  # noqa
+            except ImportError:
+                self.skipTest('Parquet support requires pyarrow or '
+                              'fastparquet.')
+
+        store = RoundTrips(self.round_trips, sector_mappings={'A': 'X'})
+        buf = BytesIO()
+        store.to_parquet(buf)
+        buf.seek(0)
+        loaded = RoundTrips.from_parquet(buf)
+
+        assert_frame_equal(loaded.frame, store.frame)
+        self.assertEqual(list(loaded.select(sectors=['X']).pnl), [2., 3.])
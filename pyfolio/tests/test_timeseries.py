@@ -6,11 +6,13 @@ from nose_parameterized import parameterized
 from numpy.testing import assert_allclose, assert_almost_equal
 from pandas.util.testing import assert_series_equal
 
+import empyrical as ep
 import numpy as np
 import pandas as pd
 
 from .. import timeseries
 from pyfolio.utils import to_utc, to_series
+from pyfolio import utils
 import gzip
 
 
@@ -283,6 +285,185 @@ class TestStats(TestCase):
         np.testing.assert_almost_equal(actual, expected)
 
 
+class TestAlphaBeta(TestCase):
+    dt = pd.date_range('2000-1-3', periods=300, freq='D')
+    random_state = np.random.RandomState(42)
+    factor_returns = pd.Series(random_state.normal(0, 0.01, 300), index=dt)
+    returns = pd.Series(0.0002 + 0.8 * factor_returns.values +
+                        random_state.normal(0, 0.005, 300), index=dt)
+    returns.iloc[[3, 50]] = np.nan
+    factor_returns.iloc[[10]] = np.nan
+
+    def test_alpha_beta_stats_matches_empyrical(self):
+        stats = timeseries.alpha_beta_stats(self.returns,
+                                            self.factor_returns)
+        active = (self.returns - self.factor_returns).dropna()
+
+        assert_almost_equal(stats['alpha'],
+                            ep.alpha(self.returns, self.factor_returns))
+        assert_almost_equal(stats['beta'],
+                            ep.beta(self.returns, self.factor_returns))
+        assert_almost_equal(stats['r_squared'],
+                            self.returns.corr(self.factor_returns) ** 2)
+        assert_almost_equal(stats['tracking_error'],
+                            active.std() * np.sqrt(252))
+        assert_almost_equal(stats['information_ratio'],
+                            active.mean() / active.std() * np.sqrt(252))
+
+    def test_rolling_alpha_beta_matches_full_sample(self):
+        window = 60
+        rolling = timeseries.rolling_alpha_beta(self.returns,
+                                                self.factor_returns,
+                                                rolling_window=window)
+
+        self.assertTrue(rolling.iloc[:window].isnull().all().all())
+        for end in [window, 150, len(self.dt) - 1]:
+            expected = timeseries.alpha_beta_stats(
+                self.returns.iloc[end - window:end + 1],
+                self.factor_returns)
+            assert_allclose(rolling.iloc[end].values, expected.values)
+
+        assert_series_equal(rolling['beta'],
+                            timeseries.rolling_beta(self.returns,
+                                                    self.factor_returns,
+                                                    rolling_window=window),
+                            check_names=False)
+
+    @parameterized.expand([
+        (10,),
+        (126,),
+    ])
+    def test_rolling_beta_matches_windowed_beta(self, window):
+        actual = timeseries.rolling_beta(self.returns, self.factor_returns,
+                                         rolling_window=window)
+        for beg, end in zip(self.dt[:-window], self.dt[window:]):
+            assert_almost_equal(
+                actual.loc[end],
+                ep.beta(self.returns.loc[beg:end],
+                        self.factor_returns.loc[beg:end]))
+
+        actual = timeseries.rolling_beta(
+            self.returns, pd.DataFrame({'a': self.factor_returns,
+                                        'b': -self.factor_returns}),
+            rolling_window=window)
+        assert_allclose(actual['a'].values, -actual['b'].values)
+
+
+class TestMultiBenchmarkRegression(TestCase):
+    dt = pd.date_range('2000-1-3', periods=200, freq='D')
+    random_state = np.random.RandomState(7)
+    benchmarks = pd.DataFrame(random_state.normal(0, 0.01, (200, 3)),
+                              index=dt, columns=['SPY', 'IWM', 'EFA'])
+    returns = pd.DataFrame(
+        {'strat_a': 0.0001 + benchmarks.values.dot([0.5, 0.2, -0.1]) +
+         random_state.normal(0, 0.002, 200),
+         'strat_b': benchmarks.values.dot([-0.3, 0.0, 0.9]) +
+         random_state.normal(0, 0.004, 200)},
+        index=dt)
+    returns.iloc[5, 0] = np.nan
+    benchmarks.iloc[20, 1] = np.nan
+
+    def test_univariate_matches_alpha_beta_stats(self):
+        result = timeseries.multi_benchmark_regression(self.returns,
+                                                       self.benchmarks)
+        for strategy in self.returns.columns:
+            for benchmark in self.benchmarks.columns:
+                expected = timeseries.alpha_beta_stats(
+                    self.returns[strategy], self.benchmarks[benchmark])
+                assert_allclose(result.loc[(strategy, benchmark)].values,
+                                expected.values)
+
+        single = timeseries.multi_benchmark_regression(
+            self.returns['strat_a'], self.benchmarks)
+        assert_allclose(single.values, result.loc['strat_a'].values)
+
+    def test_univariate_rolling_matches_rolling_alpha_beta(self):
+        result = timeseries.multi_benchmark_regression(
+            self.returns, self.benchmarks, rolling_window=50)
+        expected = timeseries.rolling_alpha_beta(
+            self.returns['strat_b'], self.benchmarks['IWM'],
+            rolling_window=50)
+
+        for stat in expected.columns:
+            assert_allclose(result[(stat, 'strat_b', 'IWM')].values,
+                            expected[stat].values)
+
+    def test_multivariate_matches_least_squares(self):
+        result = timeseries.multi_benchmark_regression(
+            self.returns, self.benchmarks, multivariate=True)
+        rolling = timeseries.multi_benchmark_regression(
+            self.returns, self.benchmarks, rolling_window=60,
+            multivariate=True)
+
+        for strategy in self.returns.columns:
+            data = pd.concat([self.returns[strategy], self.benchmarks],
+                             axis=1).dropna()
+            x = np.column_stack([np.ones(len(data)), data.values[:, 1:]])
+            coef = np.linalg.lstsq(x, data.values[:, 0], rcond=-1)[0]
+            assert_allclose(result.loc[strategy].values, coef)
+
+            window = pd.concat([self.returns[strategy], self.benchmarks],
+                               axis=1).iloc[-61:].dropna()
+            x = np.column_stack([np.ones(len(window)),
+                                 window.values[:, 1:]])
+            coef = np.linalg.lstsq(x, window.values[:, 0], rcond=-1)[0]
+            assert_allclose(rolling[strategy].iloc[-1].values, coef)
+
+        self.assertTrue(rolling.iloc[:60].isnull().all().all())
+
+
+class TestIntraday(TestCase):
+    days = pd.date_range('2017-1-3', periods=20, freq='B')
+    index = pd.DatetimeIndex([d + pd.Timedelta(minutes=570 + i)
+                              for d in days for i in range(390)])
+    minute_returns = pd.Series(
+        np.random.RandomState(1).normal(0, 0.0005, len(index)),
+        index=index)
+
+    def test_annualization_factor(self):
+        self.assertEqual(utils.annualization_factor(self.minute_returns),
+                         252 * 390)
+        hourly = self.minute_returns.resample('60T').sum().dropna()
+        self.assertEqual(utils.annualization_factor(hourly), 252 * 6.5)
+
+        daily = pd.Series(0.01, index=self.days)
+        self.assertFalse(utils.is_intraday_returns(daily))
+        self.assertEqual(utils.annualization_factor(daily), 252)
+
+    def test_to_daily_returns(self):
+        daily = utils.to_daily_returns(self.minute_returns)
+
+        self.assertEqual(len(daily), len(self.days))
+        assert_allclose(
+            daily.values,
+            [(1 + r).prod() - 1 for _, r in
+             self.minute_returns.groupby(self.minute_returns.index.date)])
+        # The roll-up is cached per returns object, and callers get a
+        # copy that they can modify.
+        expected = daily.copy()
+        daily[:] = 0
+        assert_series_equal(utils.to_daily_returns(self.minute_returns),
+                            expected)
+
+        passthrough = pd.Series(0.01, index=self.days)
+        self.assertIs(utils.to_daily_returns(passthrough), passthrough)
+
+    def test_perf_stats_annualized_by_bar(self):
+        stats = timeseries.perf_stats(self.minute_returns)
+
+        self.assertAlmostEqual(
+            stats['Annual volatility'],
+            self.minute_returns.std() * np.sqrt(252 * 390))
+        self.assertAlmostEqual(
+            stats['Sharpe ratio'],
+            ep.sharpe_ratio(self.minute_returns, annualization=252 * 390))
+
+        rolling_vol = timeseries.rolling_volatility(self.minute_returns, 390)
+        assert_allclose(rolling_vol.iloc[-1],
+                        self.minute_returns.iloc[-390:].std() *
+                        np.sqrt(252 * 390))
+
+
 class TestCone(TestCase):
     def test_bootstrap_cone_against_linear_cone_normal_returns(self):
         random_seed = 100
@@ -347,6 +528,97 @@ class TestBootstrap(TestCase):
             'SD of bootstrap does not match theoretical SD of'
             'sampling distribution')
 
+    def test_calc_bootstrap_adaptive(self):
+        np.random.seed(123)
+        returns = pd.Series(np.random.randn(500) * 0.01)
+
+        samples = timeseries.calc_bootstrap_adaptive(
+            np.mean, returns, tol=0.05, min_samples=200,
+            max_samples=5000, batch_size=100)
+
+        self.assertTrue(200 <= len(samples) < 5000)
+        self.assertEqual(len(samples) % 100, 0)
+        assert_almost_equal(np.std(samples),
+                            np.std(returns) / np.sqrt(500), 3)
+
+        # An unreachable tolerance stops at max_samples.
+        samples = timeseries.calc_bootstrap_adaptive(
+            np.mean, returns, tol=0, min_samples=10,
+            max_samples=250, batch_size=100)
+        self.assertEqual(len(samples), 250)
+
+        # A NaN statistic never counts as converged.
+        samples = timeseries.calc_bootstrap_adaptive(
+            lambda x: np.nan, returns, tol=0.05, min_samples=100,
+            max_samples=300, batch_size=100)
+        self.assertEqual(len(samples), 300)
+
+    def test_perf_stats_bootstrap_adaptive(self):
+        np.random.seed(123)
+        index = pd.date_range('2000-1-3', periods=250, freq='B')
+        returns = pd.Series(np.random.randn(250) * 0.01, index=index)
+        factor_returns = returns * 0.5 + pd.Series(
+            np.random.randn(250) * 0.01, index=index)
+
+        stats = timeseries.perf_stats_bootstrap(
+            returns, factor_returns, adaptive=True, tol=0.1,
+            min_samples=100, max_samples=300, batch_size=50)
+
+        self.assertEqual(list(stats.columns),
+                         ['mean', 'median', '5%', '95%', 'n_samples'])
+        self.assertTrue(stats['n_samples'].between(100, 300).all())
+        self.assertEqual(stats.loc['Alpha', 'n_samples'],
+                         stats.loc['Beta', 'n_samples'])
+        self.assertTrue((stats['5%'] <= stats['95%']).all())
+
+    def test_circular_block_indices(self):
+        idx = timeseries.block_bootstrap_indices(
+            10, 50, sample_length=12, method='circular', block_length=4,
+            random_state=np.random.RandomState(0))
+
+        self.assertEqual(idx.shape, (50, 12))
+        self.assertTrue(((idx >= 0) & (idx < 10)).all())
+        steps = (np.diff(idx, axis=1) % 10).reshape(50, 11)
+        # Consecutive within each block of 4, wrapping around the end.
+        within = np.arange(1, 12) % 4 != 0
+        self.assertTrue((steps[:, within] == 1).all())
+
+    def test_stationary_block_indices(self):
+        idx = timeseries.block_bootstrap_indices(
+            1000, 200, method='stationary', block_length=10,
+            random_state=np.random.RandomState(0))
+
+        self.assertEqual(idx.shape, (200, 1000))
+        breaks = (np.diff(idx, axis=1) % 1000) != 1
+        assert_almost_equal(breaks.mean(), 0.1, 2)
+
+        with self.assertRaises(ValueError):
+            timeseries.block_bootstrap_indices(10, 5, method='moving')
+
+    def test_block_bootstrap_widens_autocorrelated_intervals(self):
+        random_state = np.random.RandomState(123)
+        noise = random_state.randn(500)
+        returns = np.empty(500)
+        returns[0] = noise[0]
+        for i in range(1, 500):
+            returns[i] = 0.8 * returns[i - 1] + noise[i]
+        returns = pd.Series(returns * 0.01)
+
+        np.random.seed(123)
+        iid = timeseries.calc_bootstrap(np.mean, returns, n_samples=500)
+        block = timeseries.calc_bootstrap(np.mean, returns, n_samples=500,
+                                          method='stationary',
+                                          block_length=20)
+
+        self.assertGreater(np.std(block), 2 * np.std(iid))
+
+        paths = timeseries.simulate_paths(returns, 30, num_samples=100,
+                                          random_seed=1,
+                                          method='circular',
+                                          block_length=5)
+        self.assertEqual(paths.shape, (100, 30))
+        self.assertTrue(np.in1d(paths, returns.values).all())
+
 
 class TestGrossLev(TestCase):
     __location__ = os.path.realpath(
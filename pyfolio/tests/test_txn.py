@@ -1,14 +1,32 @@
+from __future__ import division
+
+import gc
+from io import StringIO
 from unittest import TestCase
 
+from numpy.testing import assert_allclose
+
 from pandas import (
     Series,
     DataFrame,
+    DatetimeIndex,
+    Timedelta,
     date_range
 )
-from pandas.util.testing import (assert_series_equal)
+from pandas.util.testing import (assert_frame_equal,
+                                 assert_series_equal)
 
+from pyfolio.memoize import memoize_by_object
 from pyfolio.txn import (get_turnover,
-                         adjust_returns_for_slippage)
+                         get_turnover_breakdown,
+                         get_txn_time_hist,
+                         get_txn_vol,
+                         adjust_returns_for_slippage,
+                         make_transaction_frame,
+                         session_time_bins,
+                         to_transaction_frame,
+                         Transactions,
+                         TransactionAggregator)
 
 
 class TransactionsTestCase(TestCase):
@@ -64,6 +82,45 @@ class TransactionsTestCase(TestCase):
 
         assert_series_equal(result, expected)
 
+    def test_get_turnover_breakdown(self):
+        dates = date_range(start='2015-01-01', freq='D', periods=4)
+        positions = DataFrame([[10.0, 20.0, 0.0, 70.0],
+                               [30.0, 0.0, 10.0, 60.0],
+                               [30.0, 10.0, 10.0, 50.0],
+                               [20.0, 10.0, 10.0, 60.0]],
+                              columns=['A', 'B', 'C', 'cash'], index=dates)
+        transactions = DataFrame(
+            data=[[2, 10.0, 'A'],
+                  [-2, 10.0, 'B'],
+                  [1, 10.0, 'C'],
+                  [1, 10.0, 'B'],
+                  [-1, 10.0, 'A']],
+            columns=['amount', 'price', 'symbol'],
+            index=DatetimeIndex(['2015-01-02 10:00', '2015-01-02 11:00',
+                                 '2015-01-02 12:00', '2015-01-03 10:00',
+                                 '2015-01-04 10:00']))
+
+        portfolio, symbol, sector = get_turnover_breakdown(
+            positions, transactions, sector_mappings={'A': 'X', 'B': 'X'})
+
+        for denominator in ['AGB', 'portfolio_value']:
+            expected = get_turnover(positions, transactions, denominator)
+            self.assertTrue(portfolio.index.equals(expected.index))
+            assert_allclose(portfolio[denominator], expected)
+            assert_allclose(symbol[denominator].sum(axis=1), expected)
+
+        # Day 2 trades $50 against an average gross book of $35.
+        assert_allclose(symbol['AGB'].loc['2015-01-02'],
+                        [20 / 35, 20 / 35, 10 / 35])
+        self.assertEqual(list(sector.columns),
+                         [('AGB', 'X'), ('portfolio_value', 'X')])
+        assert_allclose(sector['portfolio_value', 'X'],
+                        symbol['portfolio_value'][['A', 'B']].sum(axis=1))
+
+        _, sparse_symbol, _ = get_turnover_breakdown(
+            positions, transactions, sparse=True)
+        assert_allclose(sparse_symbol.values.astype(float), symbol.values)
+
     def test_adjust_returns_for_slippage(self):
         dates = date_range(start='2015-01-01', freq='D', periods=20)
 
@@ -84,3 +141,233 @@ class TransactionsTestCase(TestCase):
                                              transactions, slippage_bps)
 
         assert_series_equal(result, expected)
+
+    def test_make_transaction_frame(self):
+        dates = date_range(start='2015-01-01', freq='D', periods=3,
+                           tz='UTC')
+
+        def txn(sid, amount, price, dt):
+            return {'sid': sid, 'amount': amount, 'price': price,
+                    'order_id': 'order_{}'.format(amount),
+                    'commission': None, 'dt': dt}
+
+        zipline_txns = Series([
+            [txn({'sid': 1, 'symbol': 'A'}, 10, 2.0,
+                 dates[0] + Timedelta(hours=2)),
+             txn({'sid': 2, 'symbol': 'B'}, -5, 4.0,
+                 dates[0] + Timedelta(hours=1))],
+            [],
+            [txn({'sid': 1, 'symbol': 'A'}, 3, 1.0, dates[2])],
+        ], index=dates)
+
+        result = make_transaction_frame(zipline_txns)
+
+        self.assertEqual(list(result.columns),
+                         ['sid', 'symbol', 'price', 'order_id', 'amount',
+                          'commission', 'dt', 'txn_dollars'])
+        self.assertEqual(list(result.symbol), ['B', 'A', 'A'])
+        self.assertEqual(list(result.amount), [-5, 10, 3])
+        self.assertEqual(list(result.txn_dollars), [20.0, -20.0, -3.0])
+        self.assertTrue(result.commission.isnull().all())
+        self.assertTrue(result.index.equals(DatetimeIndex(
+            result.dt.values)))
+        self.assertTrue(result.index.is_monotonic_increasing)
+
+
+class TransactionsContainerTestCase(TestCase):
+    # Unsorted trades in New York time, spanning three local days.
+    transactions = DataFrame(
+        data=[[10, 2.0, 'B'],
+              [-5, 4.0, 'A'],
+              [3, 1.0, 'A'],
+              [-20, 3.0, 'B'],
+              [7, 5.0, 'A']],
+        columns=['amount', 'price', 'symbol'],
+        index=DatetimeIndex(['2015-01-02 15:00', '2015-01-01 23:30',
+                             '2015-01-01 10:00', '2015-01-03 09:31',
+                             '2015-01-02 09:45'],
+                            tz='America/New_York'))
+
+    def test_sorted_columns(self):
+        txns = Transactions(self.transactions)
+
+        self.assertEqual(len(txns), 5)
+        self.assertTrue(txns.index.is_monotonic_increasing)
+        self.assertEqual(list(txns.amounts), [3, -5, 7, 10, -20])
+        self.assertEqual(list(txns.symbols), ['A', 'B'])
+        self.assertEqual(list(txns.symbol_offsets), [0, 3, 5])
+        self.assertEqual([(sym, list(t.amount))
+                          for sym, t in txns.iter_symbols()],
+                         [('A', [3, -5, 7]), ('B', [10, -20])])
+
+    def test_daily_aggregates(self):
+        txns = Transactions(self.transactions)
+
+        assert_frame_equal(get_txn_vol(txns),
+                           get_txn_vol(self.transactions))
+        self.assertEqual(list(txns.daily_txn_vol().txn_shares),
+                         [8, 17, 20])
+        self.assertEqual(list(txns.daily_symbol_counts()), [1, 2, 1])
+
+        amounts = txns.daily_symbol_amounts()
+        self.assertEqual(list(amounts.index.names), ['symbol', 'date'])
+        self.assertEqual(list(amounts), [8, 7, 10, 20])
+
+    def test_minutes_of_day_and_selection(self):
+        txns = Transactions(self.transactions)
+
+        self.assertEqual(list(txns.minutes_of_day('America/New_York')),
+                         [600, 1410, 585, 900, 571])
+        self.assertEqual(list(txns.minutes_of_day('UTC')),
+                         [900, 270, 885, 1200, 871])
+
+        before = txns[txns.index < '2015-01-02']
+        self.assertIsInstance(before, Transactions)
+        self.assertEqual(list(before.amounts), [3, -5])
+
+    def test_get_txn_time_hist(self):
+        hist = get_txn_time_hist(self.transactions, bin_minutes=30)
+
+        self.assertEqual(len(hist), 14)
+        self.assertEqual(list(hist.index[[0, 1, -1]]),
+                         ['09:30', '10:00', '16:00'])
+        assert_allclose(hist.iloc[[0, 1, 11]], [95 / 118, 3 / 118, 20 / 118])
+        self.assertAlmostEqual(hist.sum(), 1)
+
+        # Bins are aligned to multiples of bin_minutes from midnight.
+        hist = get_txn_time_hist(self.transactions, bin_minutes=45,
+                                 normalize=False)
+
+        self.assertEqual(len(hist), 10)
+        self.assertEqual(list(hist.index[[0, 1, -2, -1]]),
+                         ['09:00', '09:45', '15:00', '15:45'])
+        self.assertEqual(list(hist.iloc[[0, 1, -2, -1]]), [60, 38, 20, 0])
+
+        minutes, bins, bin_starts = session_time_bins(45)
+        self.assertEqual((minutes[0], minutes[-1]), (570, 960))
+        self.assertEqual((bins[0], bins[15], bins[-1]), (0, 1, 9))
+        self.assertEqual(list(bin_starts[[0, -1]]), [540, 945])
+
+        # Whole minutes given as floats are accepted, fractions are not.
+        self.assertEqual(list(session_time_bins(45.0)[2][[0, -1]]),
+                         [540, 945])
+        with self.assertRaises(ValueError):
+            get_txn_time_hist(self.transactions, bin_minutes=2.5)
+
+        # An overnight session, which leaves out the 15:00 trade.
+        hist = get_txn_time_hist(self.transactions, bin_minutes=60,
+                                 session_start='23:00', session_end='10:00',
+                                 normalize=False)
+
+        self.assertEqual(len(hist), 12)
+        self.assertEqual(list(hist.index[[0, -2, -1]]),
+                         ['23:00', '09:00', '10:00'])
+        self.assertEqual(list(hist.iloc[[0, -2, -1]]), [20, 95, 3])
+        self.assertEqual(hist.sum(), 118)
+
+        hist = get_txn_time_hist(self.transactions, bin_minutes=60,
+                                 session_start='0:00', session_end='0:00',
+                                 normalize=False)
+        self.assertEqual(len(hist), 24)
+        self.assertEqual(hist.sum(), 138)
+
+    def test_get_txn_vol_cached(self):
+        transactions = self.transactions.copy()
+        result = get_txn_vol(transactions)
+        expected = result.copy()
+
+        # Callers get their own copy of the cached result.
+        result['txn_volume'] = 0
+        assert_frame_equal(get_txn_vol(transactions), expected)
+
+        transactions['price'] *= 2
+        get_txn_vol.cache_clear()
+        assert_series_equal(get_txn_vol(transactions).txn_volume,
+                            2 * expected.txn_volume)
+
+
+class TransactionAggregatorTestCase(TestCase):
+    transactions = TransactionsContainerTestCase.transactions.tz_convert(
+        'UTC').sort_index()
+
+    def assert_same_aggregates(self, aggregator):
+        txns = Transactions(self.transactions)
+
+        assert_frame_equal(aggregator.daily_txn_vol(),
+                           txns.daily_txn_vol(), check_names=False)
+        assert_series_equal(aggregator.daily_symbol_amounts(),
+                            txns.daily_symbol_amounts())
+        assert_series_equal(aggregator.daily_symbol_counts(),
+                            txns.daily_symbol_counts(), check_names=False)
+        assert_series_equal(
+            aggregator.traded_value_by_minute('America/New_York'),
+            txns.traded_value_by_minute('America/New_York'))
+
+    def test_chunks(self):
+        chunks = [self.transactions.iloc[i:i + 2] for i in range(0, 5, 2)]
+        aggregator = TransactionAggregator.from_chunks(chunks, max_buffer=1)
+
+        self.assertEqual(aggregator.n_transactions, 5)
+        self.assert_same_aggregates(aggregator)
+
+    def test_merges_grow_with_aggregates(self):
+        # One new (day, symbol) pair per chunk.
+        transactions = DataFrame(
+            {'amount': range(1, 17), 'price': 1.0,
+             'symbol': ['S{}'.format(i) for i in range(16)]},
+            index=date_range('2015-01-02 15:00', periods=16, freq='T',
+                             tz='UTC'))
+        chunks = [transactions.iloc[i:i + 1] for i in range(16)]
+        aggregator = TransactionAggregator.from_chunks(chunks, max_buffer=1)
+
+        # Merges happen after chunks 2, 5 and 11, when the buffered
+        # rows outnumber the merged ones, leaving five chunks pending.
+        self.assertEqual(len(aggregator._pair_chunks), 6)
+        assert_series_equal(
+            aggregator.daily_symbol_amounts(),
+            TransactionAggregator.from_chunks([transactions])
+            .daily_symbol_amounts())
+
+    def test_csv(self):
+        csv = StringIO(self.transactions.to_csv())
+        aggregator = TransactionAggregator.from_csv(csv, chunksize=2)
+
+        self.assert_same_aggregates(aggregator)
+
+    def test_selection_and_raw_access(self):
+        aggregator = TransactionAggregator.from_chunks([self.transactions])
+
+        first_day = aggregator[aggregator.index < '2015-01-02']
+        self.assertEqual(list(first_day.daily_txn_vol().txn_shares), [3])
+
+        with self.assertRaises(ValueError):
+            aggregator.traded_value_by_minute('UTC')
+        with self.assertRaises(ValueError):
+            to_transaction_frame(aggregator)
+
+
+class MemoizeTestCase(TestCase):
+
+    def test_memoize_by_object(self):
+        calls = []
+
+        @memoize_by_object
+        def total(series, scale):
+            calls.append(scale)
+            return series.sum() * scale
+
+        series = Series([1., 2., 3.])
+        self.assertEqual(total(series, 1), 6)
+        self.assertEqual(total(series, 1), 6)
+        self.assertEqual(total(series, 2), 12)
+        self.assertEqual(calls, [1, 2])
+
+        # A new object with the same values is a cache miss.
+        self.assertEqual(total(series.copy(), 1), 6)
+        self.assertEqual(calls, [1, 2, 1])
+
+        # Entries are evicted once their object is collected.
+        del series
+        gc.collect()
+        self.assertEqual(total(Series([1.]), 1), 1)
+        self.assertEqual(calls, [1, 2, 1, 1])
@@ -0,0 +1,89 @@
+from __future__ import division
+
+from unittest import TestCase
+from nose_parameterized import parameterized
+from numpy.testing import assert_allclose
+
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+from pyfolio.var import (rolling_tail_risk,
+                         rolling_value_at_risk,
+                         rolling_expected_shortfall)
+
+
+class RollingVaRTestCase(TestCase):
+    dates = pd.date_range('2000-1-3', periods=300, freq='D')
+    returns = pd.Series(np.random.RandomState(0).standard_t(4, 300) / 100,
+                        index=dates)
+
+    @parameterized.expand([
+        (20, 0.05),
+        (50, 0.01),
+        (100, 0.1),
+    ])
+    def test_historical_matches_sorting_each_window(self, window, cutoff):
+        var = rolling_value_at_risk(self.returns, window=window,
+                                    cutoff=cutoff)
+        es = rolling_expected_shortfall(self.returns, window=window,
+                                        cutoff=cutoff)
+
+        for i in range(window - 1, len(self.returns)):
+            x = self.returns.values[i - window + 1:i + 1]
+            q = np.percentile(x, 100 * cutoff)
+            self.assertAlmostEqual(var.iloc[i], q)
+            self.assertAlmostEqual(es.iloc[i], x[x <= q].mean())
+
+        self.assertTrue(var.iloc[:window - 1].isnull().all())
+
+    def test_historical_skips_nans(self):
+        returns = self.returns.copy()
+        returns.iloc[[5, 6, 40]] = np.nan
+
+        var = rolling_value_at_risk(returns, window=20, min_periods=15)
+        expected = returns.rolling(20, min_periods=15).apply(
+            lambda x: np.nanpercentile(x, 5))
+
+        assert_allclose(var.values, expected.values)
+
+    def test_parametric(self):
+        var = rolling_value_at_risk(self.returns, window=30,
+                                    method='parametric', horizon=10)
+        rolling = self.returns.rolling(30)
+        expected = (rolling.mean() +
+                    stats.norm.ppf(0.05) * rolling.std()) * np.sqrt(10)
+
+        assert_allclose(var.values, expected.values)
+
+    def test_cornish_fisher_reduces_to_parametric_under_normality(self):
+        returns = pd.Series(stats.norm.ppf(np.linspace(0.001, 0.999, 999)),
+                            index=pd.date_range('2000-1-3', periods=999))
+        returns = returns.sample(frac=1, random_state=1)
+
+        tail_risk = rolling_tail_risk(returns, window=len(returns),
+                                      methods=('parametric',
+                                               'cornish_fisher'))
+
+        assert_allclose(tail_risk.iloc[-1]['VaR', 'cornish_fisher'],
+                        tail_risk.iloc[-1]['VaR', 'parametric'],
+                        rtol=0.01)
+        assert_allclose(tail_risk.iloc[-1]['ES', 'cornish_fisher'],
+                        tail_risk.iloc[-1]['ES', 'parametric'],
+                        rtol=0.01)
+
+    def test_dataframe_of_strategies(self):
+        returns = pd.DataFrame({'a': self.returns,
+                                'b': self.returns * 2})
+
+        tail_risk = rolling_tail_risk(returns, window=50)
+        self.assertEqual(tail_risk.shape, (300, 2 * 2 * 3 * 2))
+
+        var = rolling_value_at_risk(returns, window=50)
+        self.assertEqual(list(var.columns), ['a', 'b'])
+        assert_allclose(var['b'].dropna().values,
+                        2 * var['a'].dropna().values)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            rolling_value_at_risk(self.returns, method='monte_carlo')
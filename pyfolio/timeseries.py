@@ -27,8 +27,10 @@ from sklearn import linear_model
 from .deprecate import deprecated
 from .interesting_periods import PERIODS
 from .txn import get_turnover
-from .utils import APPROX_BDAYS_PER_MONTH, APPROX_BDAYS_PER_YEAR
+from .utils import APPROX_BDAYS_PER_MONTH
+from .utils import ANNUALIZATION_FACTORS
 from .utils import DAILY
+from .utils import annualization_factor, is_intraday_returns
 
 DEPRECATION_WARNING = ("Risk functions in pyfolio.timeseries are deprecated "
                        "and will be removed in a future release. Please "
@@ -504,6 +506,205 @@ def aggregate_returns(returns, convert_to):
     return ep.aggregate_returns(returns, convert_to=convert_to)
 
 
+ALPHA_BETA_STATS = ['alpha', 'beta', 'r_squared', 'tracking_error',
+                    'information_ratio']
+
+
+def _regression_moments(returns, factor_returns, rolling_window=None):
+    """
+    Accumulates the sums needed for univariate regressions of every
+    strategy on every factor.
+
+    Only observations where both the strategy and the factor are
+    non-NaN enter a given regression. Both inputs are centered on their
+    overall means before summing so that the running sums used in the
+    rolling case do not lose precision; the centering is undone when
+    the statistics are computed.
+
+    Parameters
+    ----------
+    returns : np.ndarray
+        Strategy returns, shape (n_days, n_strategies).
+    factor_returns : np.ndarray
+        Factor returns, shape (n_days, n_factors), aligned with returns.
+    rolling_window : int, optional
+        If given, compute the sums over trailing windows of this many
+        observations instead of the full sample.
+
+    Returns
+    -------
+    moments : dict
+        Arrays of shape (n_strategies, n_factors), or
+        (n_days, n_strategies, n_factors) if rolling_window is given,
+        keyed by 'count', 'x', 'y', 'xx', 'xy' and 'yy', plus the
+        centering offsets 'x_offset' and 'y_offset'.
+    """
+
+    with np.errstate(invalid='ignore'):
+        y_offset = np.nan_to_num(np.nanmean(returns, axis=0))
+        x_offset = np.nan_to_num(np.nanmean(factor_returns, axis=0))
+    y = (returns - y_offset)[:, :, np.newaxis]
+    x = (factor_returns - x_offset)[:, np.newaxis, :]
+
+    valid = ~(np.isnan(y) | np.isnan(x))
+    y = np.where(valid, y, 0.)
+    x = np.where(valid, x, 0.)
+
+    terms = {'count': valid.astype(float),
+             'x': x,
+             'y': y,
+             'xx': x * x,
+             'xy': x * y,
+             'yy': y * y}
+
+    if rolling_window is None:
+        moments = {k: v.sum(axis=0) for k, v in terms.items()}
+    else:
+        moments = {k: _rolling_sum(v, rolling_window)
+                   for k, v in terms.items()}
+
+    moments['y_offset'] = y_offset[:, np.newaxis]
+    moments['x_offset'] = x_offset[np.newaxis, :]
+    return moments
+
+
+def _alpha_beta_from_moments(moments, risk_free=0.0, period=DAILY,
+                             annualization=None):
+    """
+    Computes the ALPHA_BETA_STATS from the output of _regression_moments.
+
+    Alpha and beta follow the definitions of empyrical.alpha and
+    empyrical.beta. The tracking error and information ratio are the
+    annualized standard deviation and the annualized mean over
+    standard deviation of the active returns (returns - factor).
+    """
+
+    if annualization is None:
+        ann_factor = ANNUALIZATION_FACTORS[period]
+    else:
+        ann_factor = annualization
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        n = moments['count']
+        n = np.where(n < 2, np.nan, n)
+        x_mean = moments['x'] / n
+        y_mean = moments['y'] / n
+        sxx = moments['xx'] - n * x_mean ** 2
+        sxy = moments['xy'] - n * x_mean * y_mean
+        syy = moments['yy'] - n * y_mean ** 2
+
+        beta = sxy / sxx
+        alpha = ((y_mean + moments['y_offset'] - risk_free) -
+                 beta * (x_mean + moments['x_offset'] - risk_free))
+        alpha = (1 + alpha) ** ann_factor - 1
+        r_squared = sxy ** 2 / (sxx * syy)
+
+        active_mean = (y_mean + moments['y_offset']) - \
+            (x_mean + moments['x_offset'])
+        active_var = (syy - 2 * sxy + sxx) / (n - 1)
+        tracking_error = np.sqrt(active_var * ann_factor)
+        information_ratio = active_mean * ann_factor / tracking_error
+
+    return OrderedDict([('alpha', alpha),
+                        ('beta', beta),
+                        ('r_squared', r_squared),
+                        ('tracking_error', tracking_error),
+                        ('information_ratio', information_ratio)])
+
+
+def alpha_beta_stats(returns, factor_returns, risk_free=0.0, period=DAILY,
+                     annualization=None):
+    """
+    Calculates alpha, beta, R-squared, tracking error and information
+    ratio from a single alignment and regression of returns on
+    factor_returns.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    factor_returns : pd.Series
+        Daily noncumulative returns of the benchmark factor to which betas are
+        computed. Usually a benchmark such as market returns.
+         - This is in the same style as returns.
+    risk_free : int, float, optional
+        Constant risk-free return throughout the period.
+    period : str, optional
+        Defines the periodicity of the 'returns' data for purposes of
+        annualizing. Can be 'minutely', 'hourly', 'daily', 'weekly' or
+        'monthly'.
+    annualization : float, optional
+        Number of observations per year, overriding period.
+         - See utils.annualization_factor.
+
+    Returns
+    -------
+    pd.Series
+        Alpha (annualized), beta, R-squared, tracking error (annualized)
+        and information ratio (annualized).
+    """
+
+    returns, factor_returns = returns.align(factor_returns, join='inner')
+    moments = _regression_moments(
+        returns.values.astype(float)[:, np.newaxis],
+        factor_returns.values.astype(float)[:, np.newaxis])
+    stats = _alpha_beta_from_moments(moments, risk_free=risk_free,
+                                     period=period,
+                                     annualization=annualization)
+
+    return pd.Series(OrderedDict((k, v.item()) for k, v in stats.items()))
+
+
+def rolling_alpha_beta(returns, factor_returns,
+                       rolling_window=APPROX_BDAYS_PER_MONTH * 6,
+                       risk_free=0.0, period=DAILY):
+    """
+    Determines the rolling alpha, beta, R-squared, tracking error and
+    information ratio of a strategy.
+
+    All statistics are derived from the same running sums, so the
+    rolling alpha costs no more than the rolling beta.
+
+    Parameters
+    ----------
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    factor_returns : pd.Series
+        Daily noncumulative returns of the benchmark factor to which betas are
+        computed. Usually a benchmark such as market returns.
+         - This is in the same style as returns.
+    rolling_window : int, optional
+        The size of the rolling window, in days (default 6 months). As
+        in rolling_beta, each window spans rolling_window days on both
+        ends, i.e. rolling_window + 1 observations.
+    risk_free : int, float, optional
+        Constant risk-free return throughout the period.
+    period : str, optional
+        Defines the periodicity of the 'returns' data for purposes of
+        annualizing. Can be 'monthly', 'weekly', or 'daily'.
+
+    Returns
+    -------
+    pd.DataFrame
+        Rolling statistics, indexed by the end of each window.
+         - See alpha_beta_stats for a description of the columns.
+    """
+
+    factor_returns = factor_returns.reindex(returns.index)
+    moments = _regression_moments(
+        returns.values.astype(float)[:, np.newaxis],
+        factor_returns.values.astype(float)[:, np.newaxis],
+        rolling_window=rolling_window + 1)
+    stats = _alpha_beta_from_moments(moments, risk_free=risk_free,
+                                     period=period)
+
+    return pd.DataFrame(OrderedDict((k, v[:, 0, 0])
+                                    for k, v in stats.items()),
+                        index=returns.index)
+
+
 def rolling_beta(returns, factor_returns,
                  rolling_window=APPROX_BDAYS_PER_MONTH * 6):
     """
@@ -533,19 +734,23 @@ def rolling_beta(returns, factor_returns,
     See https://en.wikipedia.org/wiki/Beta_(finance) for more details.
     """
 
+    factors = factor_returns.reindex(returns.index)
+    if factors.ndim == 1:
+        factors = factors.to_frame()
+
+    # Each window spans rolling_window days on both ends, i.e.
+    # rolling_window + 1 observations.
+    moments = _regression_moments(
+        returns.values.astype(float)[:, np.newaxis],
+        factors.values.astype(float),
+        rolling_window=rolling_window + 1)
+    beta = _alpha_beta_from_moments(moments)['beta'][:, 0, :]
+
     if factor_returns.ndim > 1:
-        # Apply column-wise
-        return factor_returns.apply(partial(rolling_beta, returns),
-                                    rolling_window=rolling_window)
+        return pd.DataFrame(beta, index=returns.index,
+                            columns=factor_returns.columns)
     else:
-        out = pd.Series(index=returns.index)
-        for beg, end in zip(returns.index[0:-rolling_window],
-                            returns.index[rolling_window:]):
-            out.loc[end] = ep.beta(
-                returns.loc[beg:end],
-                factor_returns.loc[beg:end])
-
-        return out
+        return pd.Series(beta[:, 0], index=returns.index)
 
 
 def rolling_regression(returns, factor_returns,
@@ -603,6 +808,192 @@ def rolling_regression(returns, factor_returns,
     return rolling_risk
 
 
+def _multivariate_regression(returns, factor_returns, rolling_window=None):
+    """
+    Solves the multivariate regressions of every strategy on all factors
+    (plus an intercept) with stacked normal equations.
+
+    Days where the strategy or any of the factors is NaN are excluded
+    from that strategy's regression.
+
+    Parameters
+    ----------
+    returns : np.ndarray
+        Strategy returns, shape (n_days, n_strategies).
+    factor_returns : np.ndarray
+        Factor returns, shape (n_days, n_factors), aligned with returns.
+    rolling_window : int, optional
+        If given, solve one regression per trailing window of this many
+        observations instead of a single full-sample regression.
+
+    Returns
+    -------
+    coefs : np.ndarray
+        Intercept followed by the factor betas, shape
+        (n_strategies, n_factors + 1), or
+        (n_days, n_strategies, n_factors + 1) if rolling_window is given.
+    """
+
+    n_days, n_factors = factor_returns.shape
+
+    with np.errstate(invalid='ignore'):
+        x_offset = np.nan_to_num(np.nanmean(factor_returns, axis=0))
+        y_offset = np.nan_to_num(np.nanmean(returns, axis=0))
+
+    factors_valid = ~np.isnan(factor_returns).any(axis=1)
+    x = np.column_stack([np.ones(n_days),
+                         np.where(factors_valid[:, np.newaxis],
+                                  factor_returns - x_offset, 0.)])
+    xx = x[:, :, np.newaxis] * x[:, np.newaxis, :]
+
+    coefs = []
+    for j in range(returns.shape[1]):
+        valid = factors_valid & ~np.isnan(returns[:, j])
+        y = np.where(valid, returns[:, j] - y_offset[j], 0.)
+        w = valid.astype(float)
+
+        terms = [xx * w[:, np.newaxis, np.newaxis],
+                 x * (w * y)[:, np.newaxis]]
+        if rolling_window is None:
+            xtx, xty = [t.sum(axis=0) for t in terms]
+        else:
+            xtx, xty = [_rolling_sum(t, rolling_window) for t in terms]
+
+        # Windows with too few observations are solved against the
+        # identity and masked out afterwards.
+        enough = xtx[..., 0, 0] > n_factors + 1
+        xtx = np.where(enough[..., np.newaxis, np.newaxis], xtx,
+                       np.eye(n_factors + 1))
+        xty = np.where(enough[..., np.newaxis], xty, 0.)
+        try:
+            coef = np.linalg.solve(xtx, xty[..., np.newaxis])[..., 0]
+        except np.linalg.LinAlgError:
+            # Fall back to the pseudo-inverse if any window is singular,
+            # e.g. because two benchmarks are collinear.
+            coef = np.array([np.linalg.pinv(a).dot(b) for a, b in
+                             zip(xtx.reshape(-1, n_factors + 1,
+                                             n_factors + 1),
+                                 xty.reshape(-1, n_factors + 1))])
+            coef = coef.reshape(xty.shape)
+        coef[~enough] = np.nan
+        coef[..., 0] += y_offset[j] - coef[..., 1:].dot(x_offset)
+        coefs.append(coef)
+
+    return np.stack(coefs, axis=-2)
+
+
+def _rolling_sum(values, window):
+    """
+    Trailing sums of window observations along the first axis. The
+    first window - 1 entries are NaN.
+    """
+
+    cum = np.cumsum(values, axis=0)
+    lagged = np.zeros_like(cum)
+    lagged[window:] = cum[:-window]
+    window_sum = cum - lagged
+    window_sum[:window - 1] = np.nan
+    return window_sum
+
+
+def multi_benchmark_regression(returns, benchmarks, rolling_window=None,
+                               multivariate=False, risk_free=0.0,
+                               period=DAILY):
+    """
+    Regresses one or many strategies on many benchmarks at once.
+
+    All series are aligned once and every regression is solved with
+    stacked array operations rather than one call per
+    (strategy, benchmark) pair.
+
+    Parameters
+    ----------
+    returns : pd.Series or pd.DataFrame
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+         - If a DataFrame, each column is treated as a separate strategy.
+    benchmarks : pd.DataFrame
+        Daily noncumulative returns of the benchmarks or style indices,
+        one per column.
+         - This is in the same style as returns.
+    rolling_window : int, optional
+        If given, the size of the rolling window, in days. As in
+        rolling_beta and rolling_regression, each window spans
+        rolling_window days on both ends, i.e. rolling_window + 1
+        observations. Otherwise a single full-sample regression is
+        computed.
+    multivariate : bool, optional
+        If False (default), regress each strategy on each benchmark
+        separately and report the statistics of alpha_beta_stats.
+        If True, regress each strategy on all benchmarks jointly and
+        report the intercept ('alpha', not annualized, as in
+        rolling_regression) and one beta per benchmark.
+    risk_free : int, float, optional
+        Constant risk-free return throughout the period. Only used in
+        the univariate case.
+    period : str, optional
+        Defines the periodicity of the 'returns' data for purposes of
+        annualizing. Only used in the univariate case.
+
+    Returns
+    -------
+    pd.DataFrame
+        Univariate, full sample:
+        - Index of benchmarks (or (strategy, benchmark) if returns is a
+          DataFrame), columns of alpha_beta_stats.
+        Univariate, rolling:
+        - Index of dates, columns of (stat, benchmark) or
+          (stat, strategy, benchmark).
+        Multivariate, full sample:
+        - Index of strategies, columns of 'alpha' and the benchmarks.
+        Multivariate, rolling:
+        - Index of dates, columns of (strategy, coefficient) where
+          coefficient is 'alpha' or a benchmark.
+    """
+
+    single = returns.ndim == 1
+    if single:
+        returns = returns.to_frame()
+    benchmarks = benchmarks.reindex(returns.index)
+
+    y = returns.values.astype(float)
+    x = benchmarks.values.astype(float)
+    n_obs = None if rolling_window is None else rolling_window + 1
+
+    if multivariate:
+        coefs = _multivariate_regression(y, x, rolling_window=n_obs)
+        coef_names = ['alpha'] + benchmarks.columns.tolist()
+        if rolling_window is None:
+            return pd.DataFrame(coefs, index=returns.columns,
+                                columns=coef_names)
+        columns = pd.MultiIndex.from_product(
+            [returns.columns, coef_names], names=['strategy', 'coef'])
+        return pd.DataFrame(coefs.reshape(len(returns), -1),
+                            index=returns.index, columns=columns)
+
+    moments = _regression_moments(y, x, rolling_window=n_obs)
+    stats = _alpha_beta_from_moments(moments, risk_free=risk_free,
+                                     period=period)
+
+    if rolling_window is None:
+        index = pd.MultiIndex.from_product(
+            [returns.columns, benchmarks.columns],
+            names=['strategy', 'benchmark'])
+        out = pd.DataFrame(OrderedDict((k, v.ravel())
+                                       for k, v in stats.items()),
+                           index=index)
+        return out.xs(returns.columns[0]) if single else out
+
+    columns = pd.MultiIndex.from_product(
+        [list(stats.keys()), returns.columns, benchmarks.columns],
+        names=['stat', 'strategy', 'benchmark'])
+    out = pd.DataFrame(np.concatenate([v.reshape(len(returns), -1)
+                                       for v in stats.values()], axis=1),
+                       index=returns.index, columns=columns)
+    return out.xs(returns.columns[0], axis='columns', level='strategy') \
+        if single else out
+
+
 def gross_lev(positions):
     """
     Calculates the gross leverage of a strategy.
@@ -669,6 +1060,17 @@ FACTOR_STAT_FUNCS = [
     ep.beta,
 ]
 
+# Stats that take an 'annualization' argument, which perf_stats sets for
+# intraday returns.
+ANNUALIZED_STAT_FUNCS = [
+    'annual_return',
+    'annual_volatility',
+    'sharpe_ratio',
+    'calmar_ratio',
+    'omega_ratio',
+    'sortino_ratio',
+]
+
 STAT_FUNC_NAMES = {
     'annual_return': 'Annual return',
     'cum_returns_final': 'Cumulative returns',
@@ -708,7 +1110,7 @@ def perf_stats(returns, factor_returns=None, positions=None,
     positions : pd.DataFrame
         Daily net position values.
          - See full explanation in tears.create_full_tear_sheet.
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame or txn.Transactions
         Prices and amounts of executed trades. One row per trade.
         - See full explanation in tears.create_full_tear_sheet.
     turnover_denom : str
@@ -721,9 +1123,19 @@ def perf_stats(returns, factor_returns=None, positions=None,
         Performance metrics.
     """
 
+    # Intraday returns are annualized by their bar size. Drawdown and
+    # the distributional stats are computed straight from the bars.
+    ann_kwargs = {}
+    if is_intraday_returns(returns):
+        ann_kwargs['annualization'] = annualization_factor(returns)
+
     stats = pd.Series()
     for stat_func in SIMPLE_STAT_FUNCS:
-        stats[STAT_FUNC_NAMES[stat_func.__name__]] = stat_func(returns)
+        if stat_func.__name__ in ANNUALIZED_STAT_FUNCS:
+            res = stat_func(returns, **ann_kwargs)
+        else:
+            res = stat_func(returns)
+        stats[STAT_FUNC_NAMES[stat_func.__name__]] = res
 
     if positions is not None:
         stats['Gross leverage'] = gross_lev(positions).mean()
@@ -732,15 +1144,109 @@ def perf_stats(returns, factor_returns=None, positions=None,
                                                    transactions,
                                                    turnover_denom).mean()
     if factor_returns is not None:
+        factor_stats = alpha_beta_stats(returns, factor_returns,
+                                        **ann_kwargs)
         for stat_func in FACTOR_STAT_FUNCS:
-            res = stat_func(returns, factor_returns)
-            stats[STAT_FUNC_NAMES[stat_func.__name__]] = res
+            stats[STAT_FUNC_NAMES[stat_func.__name__]] = \
+                factor_stats[stat_func.__name__]
 
     return stats
 
 
+IID = 'iid'
+STATIONARY = 'stationary'
+CIRCULAR = 'circular'
+BOOTSTRAP_METHODS = (IID, STATIONARY, CIRCULAR)
+
+
+def block_bootstrap_indices(n, num_samples, sample_length=None,
+                            method=STATIONARY, block_length=None,
+                            random_state=None):
+    """
+    Builds a matrix of block bootstrap indices into a series of length n.
+
+    Blocks of consecutive observations are drawn from random starting
+    points, wrapping around the end of the series, which preserves the
+    serial correlation of returns within each block.
+
+     - 'stationary' (Politis and Romano): block lengths are geometric
+       with mean block_length.
+     - 'circular': all blocks have length block_length.
+
+    The whole matrix is built in one vectorized step: block breaks are
+    drawn for every position, the start of the current block is carried
+    forward with a cumulative maximum, and each position indexes its
+    block's random start plus its offset within the block.
+
+    Parameters
+    ----------
+    n : int
+        Length of the series to resample.
+    num_samples : int
+        Number of bootstrap samples (rows).
+    sample_length : int, optional
+        Length of each sample (columns). Defaults to n.
+    method : str, optional
+        Either 'stationary' or 'circular'.
+    block_length : int or float, optional
+        (Mean) block length. Defaults to n ** (1 / 3).
+    random_state : numpy.random.RandomState, optional
+        Random number generator. Defaults to the global numpy state.
+
+    Returns
+    -------
+    numpy.ndarray
+        Integer indices of shape (num_samples, sample_length).
+    """
+
+    if sample_length is None:
+        sample_length = n
+    if block_length is None:
+        block_length = max(n ** (1 / 3), 1)
+    if random_state is None:
+        random_state = np.random
+    if block_length < 1:
+        raise ValueError('block_length must be at least 1, got {}'
+                         .format(block_length))
+
+    positions = np.arange(sample_length)
+
+    if method == STATIONARY:
+        new_block = random_state.random_sample(
+            (num_samples, sample_length)) < 1 / block_length
+    elif method == CIRCULAR:
+        new_block = np.broadcast_to(
+            positions % int(round(block_length)) == 0,
+            (num_samples, sample_length))
+    else:
+        raise ValueError('Unknown block bootstrap method {!r}, expected '
+                         'one of {}'.format(method, (STATIONARY, CIRCULAR)))
+
+    new_block = np.array(new_block)
+    new_block[:, 0] = True
+
+    block_first = np.maximum.accumulate(
+        np.where(new_block, positions, 0), axis=1)
+    starts = random_state.randint(n, size=(num_samples, sample_length))
+    block_starts = starts[np.arange(num_samples)[:, None], block_first]
+
+    return (block_starts + positions - block_first) % n
+
+
+def _factor_stat_values(returns, factor_returns):
+    """
+    Values of FACTOR_STAT_FUNCS for one (bootstrap) sample, computed
+    with a single call to alpha_beta_stats.
+    """
+
+    factor_stats = alpha_beta_stats(returns, factor_returns)
+    return factor_stats[[f.__name__ for f in FACTOR_STAT_FUNCS]].values
+
+
 def perf_stats_bootstrap(returns, factor_returns=None, return_stats=True,
-                         **kwargs):
+                         adaptive=False, tol=0.01, min_samples=200,
+                         max_samples=5000, batch_size=100, method=IID,
+                         block_length=None, **kwargs):
     """Calculates various bootstrapped performance metrics of a strategy.
 
     Parameters
@@ -758,6 +1264,25 @@ def perf_stats_bootstrap(returns, factor_returns=None, return_stats=True,
         for each perf metric.
         If False, returns a DataFrame with the bootstrap samples for
         each perf metric.
+    adaptive : boolean, optional
+        If True, draw samples for each metric in batches until its 5 and
+        95 percentiles converge, instead of a fixed 1000 samples.
+         - See calc_bootstrap_adaptive.
+    tol : float, optional
+        Convergence tolerance of the adaptive bootstrap, relative to the
+        width of the 5-95 percentile interval.
+    min_samples : int, optional
+        Minimum number of samples drawn by the adaptive bootstrap.
+    max_samples : int, optional
+        Maximum number of samples drawn by the adaptive bootstrap.
+    batch_size : int, optional
+        Number of samples drawn between convergence checks.
+    method : str, optional
+        Resampling scheme: 'iid' (default) resamples individual days,
+        'stationary' or 'circular' resample blocks of consecutive days.
+         - See block_bootstrap_indices.
+    block_length : int or float, optional
+        (Mean) block length of the block bootstrap methods.
 
     Returns
     -------
@@ -765,34 +1290,93 @@ def perf_stats_bootstrap(returns, factor_returns=None, return_stats=True,
         if return_stats is True:
         - Distributional statistics of bootstrapped sampling
         distribution of performance metrics.
+        - If adaptive, an additional n_samples column holds the number
+        of samples drawn for each metric.
         if return_stats is False:
         - Bootstrap samples for each performance metric.
-    """
+        - If adaptive, metrics that converged early are padded
+        with NaNs.
+    """
+
+    if adaptive:
+        bootstrap = partial(calc_bootstrap_adaptive,
+                            tol=tol,
+                            min_samples=min_samples,
+                            max_samples=max_samples,
+                            batch_size=batch_size,
+                            method=method,
+                            block_length=block_length)
+    else:
+        bootstrap = partial(calc_bootstrap,
+                            method=method,
+                            block_length=block_length)
 
     bootstrap_values = OrderedDict()
 
     for stat_func in SIMPLE_STAT_FUNCS:
         stat_name = STAT_FUNC_NAMES[stat_func.__name__]
-        bootstrap_values[stat_name] = calc_bootstrap(stat_func,
-                                                     returns)
+        bootstrap_values[stat_name] = pd.Series(bootstrap(stat_func,
+                                                          returns))
 
     if factor_returns is not None:
-        for stat_func in FACTOR_STAT_FUNCS:
+        factor_stats = bootstrap(_factor_stat_values,
+                                 returns,
+                                 factor_returns=factor_returns)
+        for i, stat_func in enumerate(FACTOR_STAT_FUNCS):
             stat_name = STAT_FUNC_NAMES[stat_func.__name__]
-            bootstrap_values[stat_name] = calc_bootstrap(
-                stat_func,
-                returns,
-                factor_returns=factor_returns)
+            bootstrap_values[stat_name] = pd.Series(factor_stats[:, i])
 
+    n_samples = pd.Series(OrderedDict((stat_name, len(values))
+                                      for stat_name, values
+                                      in bootstrap_values.items()))
     bootstrap_values = pd.DataFrame(bootstrap_values)
 
     if return_stats:
-        stats = bootstrap_values.apply(calc_distribution_stats)
-        return stats.T[['mean', 'median', '5%', '95%']]
+        # Only the padding of metrics with fewer samples is left out.
+        stats = bootstrap_values.apply(
+            lambda x: calc_distribution_stats(x.iloc[:n_samples[x.name]]))
+        stats = stats.T[['mean', 'median', '5%', '95%']]
+        if adaptive:
+            stats['n_samples'] = n_samples
+        return stats
     else:
         return bootstrap_values
 
 
+def _draw_bootstrap(func, returns, factor_returns, n_samples, args, kwargs,
+                    method=IID, block_length=None):
+    """
+    Draws n_samples bootstrap samples of func, stacked along the
+    first axis.
+    """
+
+    if method != IID:
+        indices = block_bootstrap_indices(len(returns), n_samples,
+                                          method=method,
+                                          block_length=block_length)
+    out = None
+
+    for i in range(n_samples):
+        if method == IID:
+            idx = np.random.randint(len(returns), size=len(returns))
+        else:
+            idx = indices[i]
+        returns_i = returns.iloc[idx].reset_index(drop=True)
+        if factor_returns is not None:
+            factor_returns_i = factor_returns.iloc[idx].reset_index(drop=True)
+            res = func(returns_i, factor_returns_i,
+                       *args, **kwargs)
+        else:
+            res = func(returns_i,
+                       *args, **kwargs)
+
+        if out is None:
+            out = np.empty((n_samples,) + np.shape(res))
+        out[i] = res
+
+    return out
+
+
 def calc_bootstrap(func, returns, *args, **kwargs):
     """Performs a bootstrap analysis on a user-defined function returning
     a summary statistic.
@@ -814,30 +1398,122 @@ def calc_bootstrap(func, returns, *args, **kwargs):
     n_samples : int, optional
         Number of bootstrap samples to draw. Default is 1000.
         Increasing this will lead to more stable / accurate estimates.
+    method : str, optional
+        Resampling scheme, one of 'iid' (default), 'stationary' or
+        'circular'.
+         - See block_bootstrap_indices.
+    block_length : int or float, optional
+        (Mean) block length of the block bootstrap methods.
 
     Returns
     -------
     numpy.ndarray
         Bootstrapped sampling distribution of passed in func.
+        If func returns an array, the samples are stacked along
+        the first axis.
     """
 
     n_samples = kwargs.pop('n_samples', 1000)
-    out = np.empty(n_samples)
+    factor_returns = kwargs.pop('factor_returns', None)
+    method = kwargs.pop('method', IID)
+    block_length = kwargs.pop('block_length', None)
+
+    return _draw_bootstrap(func, returns, factor_returns, n_samples,
+                           args, kwargs, method=method,
+                           block_length=block_length)
+
+
+def calc_bootstrap_adaptive(func, returns, *args, **kwargs):
+    """Performs a bootstrap analysis on a user-defined function, drawing
+    samples in batches until the sampling distribution's 5 and 95
+    percentiles have converged.
+
+    After each batch (once at least min_samples have been drawn), the
+    percentiles are compared to those of the previous batch. Sampling
+    stops when neither moved by more than tol times the width of the
+    5-95 percentile interval, or when max_samples is reached.
+
+    Parameters
+    ----------
+    func : function
+        Function that either takes a single array (commonly returns)
+        or two arrays (commonly returns and factor returns) and
+        returns a single value (commonly a summary
+        statistic). Additional args and kwargs are passed as well.
+    returns : pd.Series
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    factor_returns : pd.Series, optional
+        Daily noncumulative returns of the benchmark factor to which betas are
+        computed. Usually a benchmark such as market returns.
+         - This is in the same style as returns.
+    tol : float, optional
+        Convergence tolerance, relative to the 5-95 percentile interval
+        width. Default is 0.01.
+    min_samples : int, optional
+        Minimum number of samples to draw. Default is 200.
+    max_samples : int, optional
+        Maximum number of samples to draw. Default is 5000.
+    batch_size : int, optional
+        Number of samples drawn between convergence checks.
+        Default is 100.
+    method : str, optional
+        Resampling scheme, one of 'iid' (default), 'stationary' or
+        'circular'.
+         - See block_bootstrap_indices.
+    block_length : int or float, optional
+        (Mean) block length of the block bootstrap methods.
+
+    Returns
+    -------
+    numpy.ndarray
+        Bootstrapped sampling distribution of passed in func, with as
+        many samples as were needed to converge. If func returns an
+        array, the samples are stacked along the first axis and all
+        of its elements must converge.
+    """
 
+    tol = kwargs.pop('tol', 0.01)
+    min_samples = kwargs.pop('min_samples', 200)
+    max_samples = kwargs.pop('max_samples', 5000)
+    batch_size = kwargs.pop('batch_size', 100)
     factor_returns = kwargs.pop('factor_returns', None)
+    method = kwargs.pop('method', IID)
+    block_length = kwargs.pop('block_length', None)
+
+    if batch_size < 1:
+        raise ValueError('batch_size must be positive, got {}'
+                         .format(batch_size))
+
+    batches = []
+    n_drawn = 0
+    prev_bounds = None
+
+    while n_drawn < max_samples:
+        n_batch = min(batch_size, max_samples - n_drawn)
+        batches.append(_draw_bootstrap(func, returns, factor_returns,
+                                       n_batch, args, kwargs,
+                                       method=method,
+                                       block_length=block_length))
+        n_drawn += n_batch
+
+        if n_drawn < min_samples:
+            continue
 
-    for i in range(n_samples):
-        idx = np.random.randint(len(returns), size=len(returns))
-        returns_i = returns.iloc[idx].reset_index(drop=True)
-        if factor_returns is not None:
-            factor_returns_i = factor_returns.iloc[idx].reset_index(drop=True)
-            out[i] = func(returns_i, factor_returns_i,
-                          *args, **kwargs)
-        else:
-            out[i] = func(returns_i,
-                          *args, **kwargs)
+        samples = np.concatenate(batches)
+        bounds = np.nanpercentile(samples, [5, 95], axis=0)
 
-    return out
+        if prev_bounds is not None:
+            width = bounds[1] - bounds[0]
+            change = np.abs(bounds - prev_bounds).max(axis=0)
+            with np.errstate(invalid='ignore'):
+                converged = change <= tol * width
+            if np.all(converged):
+                break
+
+        prev_bounds = bounds
+
+    return np.concatenate(batches)
 
 
 def calc_distribution_stats(x):
@@ -1034,6 +1710,8 @@ def rolling_volatility(returns, rolling_vol_window):
          - See full explanation in tears.create_full_tear_sheet.
     rolling_vol_window : int
         Length of rolling window, in days, over which to compute.
+         - For intraday returns the window is a number of bars and the
+           result is annualized with utils.annualization_factor.
 
     Returns
     -------
@@ -1042,7 +1720,7 @@ def rolling_volatility(returns, rolling_vol_window):
     """
 
     return returns.rolling(rolling_vol_window).std() \
-        * np.sqrt(APPROX_BDAYS_PER_YEAR)
+        * np.sqrt(annualization_factor(returns))
 
 
 def rolling_sharpe(returns, rolling_sharpe_window):
@@ -1056,6 +1734,8 @@ def rolling_sharpe(returns, rolling_sharpe_window):
          - See full explanation in tears.create_full_tear_sheet.
     rolling_sharpe_window : int
         Length of rolling window, in days, over which to compute.
+         - For intraday returns the window is a number of bars and the
+           result is annualized with utils.annualization_factor.
 
     Returns
     -------
@@ -1069,11 +1749,12 @@ def rolling_sharpe(returns, rolling_sharpe_window):
 
     return returns.rolling(rolling_sharpe_window).mean() \
         / returns.rolling(rolling_sharpe_window).std() \
-        * np.sqrt(APPROX_BDAYS_PER_YEAR)
+        * np.sqrt(annualization_factor(returns))
 
 
 def simulate_paths(is_returns, num_days,
-                   starting_value=1, num_samples=1000, random_seed=None):
+                   starting_value=1, num_samples=1000, random_seed=None,
+                   method=IID, block_length=None):
     """
     Gnerate alternate paths using available values from in-sample returns.
 
@@ -1093,14 +1774,29 @@ def simulate_paths(is_returns, num_days,
     random_seed : int
         Seed for the pseudorandom number generator used by the pandas
         sample method.
+    method : str, optional
+        Resampling scheme: 'iid' (default) samples individual days,
+        'stationary' or 'circular' sample blocks of consecutive days.
+         - See block_bootstrap_indices.
+    block_length : int or float, optional
+        (Mean) block length of the block bootstrap methods.
 
     Returns
     -------
     samples : numpy.ndarray
     """
 
-    samples = np.empty((num_samples, num_days))
     seed = np.random.RandomState(seed=random_seed)
+
+    if method != IID:
+        indices = block_bootstrap_indices(len(is_returns), num_samples,
+                                          sample_length=num_days,
+                                          method=method,
+                                          block_length=block_length,
+                                          random_state=seed)
+        return np.asarray(is_returns)[indices]
+
+    samples = np.empty((num_samples, num_days))
     for i in range(num_samples):
         samples[i, :] = is_returns.sample(num_days, replace=True,
                                           random_state=seed)
@@ -1146,7 +1842,8 @@ def summarize_paths(samples, cone_std=(1., 1.5, 2.), starting_value=1.):
 
 def forecast_cone_bootstrap(is_returns, num_days, cone_std=(1., 1.5, 2.),
                             starting_value=1, num_samples=1000,
-                            random_seed=None):
+                            random_seed=None, method=IID,
+                            block_length=None):
     """
     Determines the upper and lower bounds of an n standard deviation
     cone of forecasted cumulative returns. Future cumulative mean and
@@ -1175,6 +1872,13 @@ def forecast_cone_bootstrap(is_returns, num_days, cone_std=(1., 1.5, 2.),
     random_seed : int
         Seed for the pseudorandom number generator used by the pandas
         sample method.
+    method : str, optional
+        Resampling scheme, one of 'iid' (default), 'stationary' or
+        'circular'. Block methods keep the serial correlation of
+        returns, which widens the cone for trending strategies.
+         - See block_bootstrap_indices.
+    block_length : int or float, optional
+        (Mean) block length of the block bootstrap methods.
 
     Returns
     -------
@@ -1190,7 +1894,9 @@ def forecast_cone_bootstrap(is_returns, num_days, cone_std=(1., 1.5, 2.),
         num_days=num_days,
         starting_value=starting_value,
         num_samples=num_samples,
-        random_seed=random_seed
+        random_seed=random_seed,
+        method=method,
+        block_length=block_length
     )
 
     cone_bounds = summarize_paths(
@@ -14,7 +14,16 @@
 # limitations under the License.
 from __future__ import division
 
+import warnings
+from collections import OrderedDict
+from itertools import chain
+
+import numpy as np
 import pandas as pd
+import scipy as sp
+import scipy.sparse
+
+from .memoize import memoize_by_object
 
 
 def map_transaction(txn):
@@ -48,10 +57,18 @@ def map_transaction(txn):
             'dt': txn['dt']}
 
 
+TXN_FRAME_COLUMNS = ['sid', 'symbol', 'price', 'order_id', 'amount',
+                     'commission', 'dt']
+
+
 def make_transaction_frame(transactions):
     """
     Formats a transaction DataFrame.
 
+    The nested per-day lists of transaction dicts are flattened once
+    and gathered into columns by pandas, then ordered with a stable
+    sort on the transaction time.
+
     Parameters
     ----------
     transactions : pd.DataFrame
@@ -64,29 +81,800 @@ def make_transaction_frame(transactions):
          - See full explanation in tears.create_full_tear_sheet.
     """
 
-    transaction_list = []
-    for dt in transactions.index:
-        txns = transactions.loc[dt]
-        if len(txns) == 0:
-            continue
+    records = list(chain.from_iterable(transactions.values))
+    df = pd.DataFrame.from_records(
+        records, columns=['sid', 'price', 'order_id', 'amount',
+                          'commission', 'dt'])
 
-        for txn in txns:
-            txn = map_transaction(txn)
-            transaction_list.append(txn)
-    df = pd.DataFrame(sorted(transaction_list, key=lambda x: x['dt']))
+    sids = df['sid'].values
+    nested = np.array([isinstance(sid, dict) for sid in sids], dtype=bool)
+    if nested.any():
+        symbols = sids.copy()
+        symbols[nested] = [sid['symbol'] for sid in sids[nested]]
+        sids = sids.copy()
+        sids[nested] = [sid['sid'] for sid in sids[nested]]
+        df['sid'] = pd.Series(list(sids), index=df.index)
+        df['symbol'] = pd.Series(list(symbols), index=df.index)
+    else:
+        df['symbol'] = df['sid']
+
+    order = np.argsort(pd.DatetimeIndex(df['dt']).asi8, kind='mergesort')
+    df = df.take(order)[TXN_FRAME_COLUMNS]
     df['txn_dollars'] = -df['amount'] * df['price']
 
-    df.index = list(map(pd.Timestamp, df.dt.values))
+    df.index = pd.DatetimeIndex(df.dt.values)
     return df
 
 
+TURNOVER_DENOMINATORS = ('AGB', 'portfolio_value')
+
+NANOS_PER_MINUTE = 60 * 10 ** 9
+NANOS_PER_DAY = 24 * 60 * NANOS_PER_MINUTE
+MINUTES_PER_DAY = 24 * 60
+
+
+class Transactions(object):
+    """
+    Columnar, time-sorted container of transactions.
+
+    Building it once and passing it to the transaction functions (and
+    tear sheets) shares the preprocessing that each of them would
+    otherwise repeat on the raw DataFrame: sorting by time, grouping by
+    symbol and bucketing into days. Symbol groups, day buckets and the
+    daily aggregates are computed lazily on first use and cached.
+
+    Parameters
+    ----------
+    transactions : pd.DataFrame
+        Prices and amounts of executed trades. One row per trade.
+         - See full explanation in tears.create_full_tear_sheet.
+
+    Attributes
+    ----------
+    frame : pd.DataFrame
+        The transactions, stably sorted by time.
+    times : np.ndarray
+        int64 nanosecond timestamps of the sorted transactions.
+    tz : tzinfo or None
+        Time zone of the transaction timestamps.
+    amounts : np.ndarray
+        Signed number of shares of each transaction.
+    prices : np.ndarray
+        Price of each transaction.
+    """
+
+    def __init__(self, transactions):
+        if not transactions.index.is_monotonic_increasing:
+            order = np.argsort(transactions.index.asi8, kind='mergesort')
+            transactions = transactions.iloc[order]
+
+        self.frame = transactions
+        self.times = transactions.index.asi8
+        self.tz = transactions.index.tz
+        self.amounts = transactions['amount'].values
+        self.prices = transactions['price'].values
+
+        self._symbols = None
+        self._days = None
+        self._daily_txn_vol = None
+        self._daily_symbol_amounts = None
+        self._minutes_of_day = {}
+
+    def __len__(self):
+        return len(self.times)
+
+    def __getitem__(self, key):
+        """
+        Boolean masks over the (sorted) rows select a new Transactions
+        object, anything else is looked up in frame.
+        """
+
+        key_values = getattr(key, 'values', key)
+        if getattr(key_values, 'dtype', None) == bool:
+            return Transactions(self.frame[key_values])
+        return self.frame[key]
+
+    @property
+    def index(self):
+        """DatetimeIndex of the sorted transactions."""
+
+        return self.frame.index
+
+    def _group_symbols(self):
+        codes, symbols = pd.factorize(self.frame['symbol'], sort=True)
+
+        # Transactions without a symbol (code -1) are left out of the
+        # symbol groups, as they are by DataFrame.groupby.
+        order = np.argsort(codes, kind='mergesort')
+        order = order[np.searchsorted(codes[order], 0):]
+        counts = np.bincount(codes[codes >= 0], minlength=len(symbols))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        self._symbols = (symbols, codes, order, offsets)
+
+    @property
+    def symbols(self):
+        """Unique symbols, sorted."""
+
+        if self._symbols is None:
+            self._group_symbols()
+        return self._symbols[0]
+
+    @property
+    def symbol_codes(self):
+        """Position of each transaction's symbol in symbols, or -1."""
+
+        if self._symbols is None:
+            self._group_symbols()
+        return self._symbols[1]
+
+    @property
+    def symbol_order(self):
+        """Row positions grouped by symbol, sorted by time in each group."""
+
+        if self._symbols is None:
+            self._group_symbols()
+        return self._symbols[2]
+
+    @property
+    def symbol_offsets(self):
+        """
+        Boundaries of each symbol's rows in symbol_order: the rows of
+        symbols[i] are symbol_order[symbol_offsets[i]:symbol_offsets[i+1]].
+        """
+
+        if self._symbols is None:
+            self._group_symbols()
+        return self._symbols[3]
+
+    def iter_symbols(self):
+        """
+        Iterates over (symbol, transactions of symbol sorted by time),
+        like DataFrame.groupby('symbol').
+        """
+
+        order = self.symbol_order
+        offsets = self.symbol_offsets
+        for i, symbol in enumerate(self.symbols):
+            yield symbol, self.frame.iloc[order[offsets[i]:offsets[i + 1]]]
+
+    @property
+    def days(self):
+        """Sorted unique days (midnight, in tz) on which trades happened."""
+
+        if self._days is None:
+            self._days = _bucket_days(self.index)
+        return self._days[0]
+
+    @property
+    def day_codes(self):
+        """Position of each transaction's day in days."""
+
+        if self._days is None:
+            self._days = _bucket_days(self.index)
+        return self._days[1]
+
+    def daily_txn_vol(self):
+        """
+        Daily traded dollar volume and number of shares.
+
+        Returns
+        -------
+        pd.DataFrame
+            txn_volume and txn_shares columns, indexed by day.
+             - See get_txn_vol.
+        """
+
+        if self._daily_txn_vol is None:
+            self._daily_txn_vol = _sum_txn_vol(self.days, self.day_codes,
+                                               self.amounts, self.prices)
+
+        return self._daily_txn_vol.copy()
+
+    def _symbol_day_sums(self):
+        """
+        Absolute shares and dollars traded per (symbol, day) pair with
+        trades, as (symbol codes, day codes, shares, dollars) arrays.
+        """
+
+        if self._daily_symbol_amounts is None:
+            valid = self.symbol_codes >= 0
+            n_days = len(self.days)
+            pairs = (self.symbol_codes[valid].astype(np.int64) * n_days +
+                     self.day_codes[valid])
+            pairs, pair_codes = np.unique(pairs, return_inverse=True)
+
+            shares = np.abs(np.asarray(self.amounts[valid], dtype=float))
+            values = shares * np.asarray(self.prices[valid], dtype=float)
+            bins = 2 * pair_codes
+            sums = np.bincount(
+                np.concatenate([bins, bins + 1]),
+                weights=np.nan_to_num(np.concatenate([shares, values])),
+                minlength=2 * len(pairs)).reshape(len(pairs), 2)
+
+            self._daily_symbol_amounts = (pairs // n_days, pairs % n_days,
+                                          sums[:, 0], sums[:, 1])
+
+        return self._daily_symbol_amounts
+
+    def daily_symbol_amounts(self):
+        """
+        Absolute number of shares traded in each symbol on each day.
+
+        Returns
+        -------
+        pd.Series
+            Indexed by (symbol, date), only for days with trades in
+            the symbol.
+        """
+
+        symbol_codes, day_codes, amounts, _ = self._symbol_day_sums()
+        index = pd.MultiIndex.from_arrays(
+            [self.symbols.take(symbol_codes), self.days.take(day_codes)],
+            names=['symbol', 'date'])
+        return pd.Series(amounts, index=index, name='amount')
+
+    def daily_symbol_counts(self):
+        """
+        Number of distinct symbols traded on each day.
+
+        Returns
+        -------
+        pd.Series
+            Indexed by day.
+        """
+
+        _, day_codes, _, _ = self._symbol_day_sums()
+        counts = np.bincount(day_codes, minlength=len(self.days))
+        return pd.Series(counts, index=self.days)
+
+    def minutes_of_day(self, tz):
+        """
+        Minute of the day of each transaction in the given time zone.
+
+        Parameters
+        ----------
+        tz : str or tzinfo
+            Time zone, e.g. 'America/New_York'.
+
+        Returns
+        -------
+        np.ndarray
+            Minutes since local midnight, from 0 to 1439.
+        """
+
+        key = str(tz)
+        if key not in self._minutes_of_day:
+            local_times = _local_times(self.index.tz_convert(tz))
+            self._minutes_of_day[key] = \
+                (local_times % NANOS_PER_DAY) // NANOS_PER_MINUTE
+
+        return self._minutes_of_day[key]
+
+    def traded_value_by_minute(self, tz):
+        """
+        Absolute dollars traded in each minute of the day, summed over
+        all days.
+
+        Parameters
+        ----------
+        tz : str or tzinfo
+            Time zone, e.g. 'America/New_York'.
+
+        Returns
+        -------
+        pd.Series
+            Indexed by minute since local midnight, from 0 to 1439.
+        """
+
+        values = np.abs(np.asarray(self.amounts, dtype=float) *
+                        np.asarray(self.prices, dtype=float))
+        return pd.Series(np.bincount(self.minutes_of_day(tz),
+                                     weights=np.nan_to_num(values),
+                                     minlength=MINUTES_PER_DAY))
+
+
+class TransactionAggregator(object):
+    """
+    Streaming, bounded-memory aggregates of transactions.
+
+    Transaction logs too large to load as one DataFrame are read in
+    chunks (see from_csv, from_parquet and update). Only the compact
+    aggregates that the transaction functions need are kept:
+
+     - absolute shares and dollars traded per (day, symbol),
+     - shares and dollars traded per day,
+     - dollars traded per minute of the day, in time_hist_tz.
+
+    An aggregator can be passed in place of a transactions DataFrame or
+    Transactions object to get_txn_vol, get_turnover,
+    get_turnover_breakdown, adjust_returns_for_slippage,
+    capacity.daily_txns_with_bar_data, utils.detect_intraday,
+    plotting.plot_txn_time_hist and the tear sheets built on them.
+    Functions that need the individual trades, such as round trip
+    extraction and utils.estimate_intraday, raise a ValueError.
+
+    Parameters
+    ----------
+    tz : str or tzinfo, optional
+        Time zone in which trades are bucketed into days. Naive
+        timestamps are assumed to be UTC, as in utils.to_utc.
+    time_hist_tz : str or tzinfo, optional
+        Time zone of the minute-of-day histogram.
+    max_buffer : int, optional
+        Number of buffered (day, symbol) rows above which chunk results
+        are merged, bounding memory use. Once the merged aggregates are
+        larger, merges wait until as many new rows are buffered, so
+        that each row is re-merged a bounded number of times on
+        average.
+    """
+
+    def __init__(self, tz='UTC', time_hist_tz='America/New_York',
+                 max_buffer=1000000):
+        self.tz = tz
+        self.time_hist_tz = time_hist_tz
+        self.max_buffer = max_buffer
+        self.n_transactions = 0
+
+        self._integer_amounts = True
+        self._pair_chunks = []
+        self._n_merged = 0
+        self._n_pending = 0
+        self._daily_totals = None
+        self._minute_values = np.zeros(MINUTES_PER_DAY)
+        self._result = None
+
+    def update(self, transactions):
+        """
+        Adds a chunk of transactions to the aggregates.
+
+        Parameters
+        ----------
+        transactions : pd.DataFrame
+            Prices and amounts of executed trades. One row per trade,
+            indexed by trade time.
+             - See full explanation in tears.create_full_tear_sheet.
+
+        Returns
+        -------
+        self : TransactionAggregator
+        """
+
+        if len(transactions) == 0:
+            return self
+
+        index = pd.DatetimeIndex(transactions.index)
+        if index.tz is None:
+            index = index.tz_localize('UTC')
+
+        local_times = _local_times(index.tz_convert(self.tz))
+        day_starts = local_times - local_times % NANOS_PER_DAY
+
+        self._integer_amounts &= transactions['amount'].dtype.kind in 'iu'
+        shares = np.abs(transactions['amount'].values.astype(float))
+        values = shares * transactions['price'].values.astype(float)
+        chunk = pd.DataFrame({'day': day_starts,
+                              'symbol': transactions['symbol'].values,
+                              'shares': np.nan_to_num(shares),
+                              'dollars': np.nan_to_num(values)})
+
+        pairs = chunk.groupby(['day', 'symbol'])[['shares', 'dollars']].sum()
+        self._pair_chunks.append(pairs)
+        self._n_pending += len(pairs)
+        if self._n_pending > max(self.max_buffer, self._n_merged):
+            self._merge_pairs()
+
+        daily = chunk.groupby('day')[['shares', 'dollars']].sum()
+        if self._daily_totals is None:
+            self._daily_totals = daily
+        else:
+            self._daily_totals = self._daily_totals.add(daily, fill_value=0)
+
+        minutes = (_local_times(index.tz_convert(self.time_hist_tz)) %
+                   NANOS_PER_DAY) // NANOS_PER_MINUTE
+        self._minute_values += np.bincount(minutes,
+                                           weights=np.nan_to_num(values),
+                                           minlength=MINUTES_PER_DAY)
+
+        self.n_transactions += len(transactions)
+        self._result = None
+        return self
+
+    def _merge_pairs(self):
+        if len(self._pair_chunks) > 1:
+            pairs = pd.concat(self._pair_chunks)
+            self._pair_chunks = [pairs.groupby(level=[0, 1]).sum()]
+        self._n_merged = sum(len(p) for p in self._pair_chunks)
+        self._n_pending = 0
+
+    @classmethod
+    def from_chunks(cls, chunks, **kwargs):
+        """
+        Aggregates an iterable of transaction DataFrames.
+
+        Parameters
+        ----------
+        chunks : iterable of pd.DataFrame
+            Chunks of transactions, each as passed to update.
+        **kwargs
+            Passed to TransactionAggregator.
+
+        Returns
+        -------
+        TransactionAggregator
+        """
+
+        aggregator = cls(**kwargs)
+        for chunk in chunks:
+            aggregator.update(chunk)
+        return aggregator
+
+    @classmethod
+    def from_csv(cls, path, chunksize=1000000, time_column=None,
+                 tz='UTC', time_hist_tz='America/New_York', **kwargs):
+        """
+        Aggregates a CSV file of transactions, chunksize rows at a time.
+
+        Parameters
+        ----------
+        path : str or file-like
+            CSV file with amount, price and symbol columns.
+        chunksize : int, optional
+            Number of rows read per chunk.
+        time_column : str, optional
+            Column holding the trade times. By default the first
+            column is parsed as the trade times.
+        tz, time_hist_tz : str or tzinfo, optional
+            See TransactionAggregator.
+        **kwargs
+            Passed to pd.read_csv.
+
+        Returns
+        -------
+        TransactionAggregator
+        """
+
+        if time_column is None:
+            kwargs.setdefault('index_col', 0)
+            kwargs.setdefault('parse_dates', True)
+        reader = pd.read_csv(path, chunksize=chunksize, **kwargs)
+        chunks = (_set_time_index(chunk, time_column) for chunk in reader)
+
+        return cls.from_chunks(chunks, tz=tz, time_hist_tz=time_hist_tz)
+
+    @classmethod
+    def from_parquet(cls, path, batch_size=1000000, time_column='dt',
+                     tz='UTC', time_hist_tz='America/New_York'):
+        """
+        Aggregates a Parquet file of transactions, batch_size rows at a
+        time. Requires pyarrow.
+
+        Parameters
+        ----------
+        path : str or file-like
+            Parquet file with amount, price and symbol columns.
+        batch_size : int, optional
+            Number of rows read per batch.
+        time_column : str, optional
+            Column holding the trade times.
+        tz, time_hist_tz : str or tzinfo, optional
+            See TransactionAggregator.
+
+        Returns
+        -------
+        TransactionAggregator
+        """
+
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError('Reading transactions from Parquet files '
+                              'requires pyarrow.')
+
+        parquet_file = pq.ParquetFile(path)
+        columns = [time_column, 'amount', 'price', 'symbol']
+        chunks = (_set_time_index(batch.to_pandas(), time_column)
+                  for batch in parquet_file.iter_batches(
+                      batch_size=batch_size, columns=columns))
+
+        return cls.from_chunks(chunks, tz=tz, time_hist_tz=time_hist_tz)
+
+    def _aggregates(self):
+        if self._result is not None:
+            return self._result
+
+        self._merge_pairs()
+        if self._pair_chunks:
+            pairs = self._pair_chunks[0]
+            daily = self._daily_totals
+        else:
+            pairs = pd.DataFrame(
+                {'shares': [], 'dollars': []},
+                index=pd.MultiIndex.from_arrays([[], []],
+                                                names=['day', 'symbol']))
+            daily = pd.DataFrame({'shares': [], 'dollars': []})
+
+        daily = daily.sort_index()
+        days = pd.DatetimeIndex(daily.index.values.astype(np.int64))
+        if self.tz is not None:
+            days = days.tz_localize(self.tz)
+        day_codes = np.searchsorted(
+            daily.index.values, pairs.index.get_level_values(0).values)
+        symbol_codes, symbols = pd.factorize(
+            pairs.index.get_level_values(1), sort=True)
+        order = np.lexsort((day_codes, symbol_codes))
+
+        self._result = (days, daily, pd.Index(symbols),
+                        symbol_codes[order], day_codes[order],
+                        pairs['shares'].values[order],
+                        pairs['dollars'].values[order])
+        return self._result
+
+    @property
+    def days(self):
+        """Sorted unique days (midnight, in tz) on which trades happened."""
+
+        return self._aggregates()[0]
+
+    @property
+    def index(self):
+        """
+        The trading days. Boolean masks over them select days, see
+        __getitem__.
+        """
+
+        return self.days
+
+    @property
+    def symbols(self):
+        """Unique symbols, sorted."""
+
+        return self._aggregates()[2]
+
+    def __getitem__(self, key):
+        """
+        Selects the aggregates of the days in a boolean mask over index.
+        Trades are selected by day, not by time of day.
+        """
+
+        mask = np.asarray(getattr(key, 'values', key), dtype=bool)
+        days, daily, symbols, symbol_codes, day_codes, shares, dollars = \
+            self._aggregates()
+
+        selected = TransactionAggregator(tz=self.tz,
+                                         time_hist_tz=self.time_hist_tz,
+                                         max_buffer=self.max_buffer)
+        keep = mask[day_codes]
+        selected._pair_chunks = [pd.DataFrame(
+            {'shares': shares[keep], 'dollars': dollars[keep]},
+            index=pd.MultiIndex.from_arrays(
+                [daily.index.values[day_codes[keep]],
+                 symbols.take(symbol_codes[keep])],
+                names=['day', 'symbol']))]
+        selected._daily_totals = daily[mask]
+        selected._integer_amounts = self._integer_amounts
+        # The minute-of-day histogram is not kept per day.
+        selected._minute_values = None
+        return selected
+
+    def _symbol_day_sums(self):
+        """
+        Absolute shares and dollars traded per (symbol, day) pair with
+        trades, as (symbol codes, day codes, shares, dollars) arrays.
+        """
+
+        return self._aggregates()[3:]
+
+    def daily_txn_vol(self):
+        """
+        Daily traded dollar volume and number of shares.
+
+        Returns
+        -------
+        pd.DataFrame
+            txn_volume and txn_shares columns, indexed by day.
+             - See get_txn_vol.
+        """
+
+        days, daily = self._aggregates()[:2]
+        daily_shares = daily['shares'].values
+        if self._integer_amounts:
+            daily_shares = daily_shares.astype(np.int64)
+
+        return pd.DataFrame(OrderedDict([
+            ('txn_volume', daily['dollars'].values),
+            ('txn_shares', daily_shares),
+        ]), index=days)
+
+    def daily_symbol_amounts(self):
+        """
+        Absolute number of shares traded in each symbol on each day.
+
+        Returns
+        -------
+        pd.Series
+            Indexed by (symbol, date), only for days with trades in
+            the symbol.
+        """
+
+        symbol_codes, day_codes, shares, _ = self._symbol_day_sums()
+        index = pd.MultiIndex.from_arrays(
+            [self.symbols.take(symbol_codes),
+             self.days.take(day_codes).rename('date')],
+            names=['symbol', 'date'])
+        return pd.Series(shares, index=index, name='amount')
+
+    def daily_symbol_counts(self):
+        """
+        Number of distinct symbols traded on each day.
+
+        Returns
+        -------
+        pd.Series
+            Indexed by day.
+        """
+
+        _, day_codes, _, _ = self._symbol_day_sums()
+        counts = np.bincount(day_codes, minlength=len(self.days))
+        return pd.Series(counts, index=self.days)
+
+    def traded_value_by_minute(self, tz):
+        """
+        Absolute dollars traded in each minute of the day, summed over
+        all days.
+
+        Parameters
+        ----------
+        tz : str or tzinfo
+            Time zone, which must be the aggregator's time_hist_tz.
+
+        Returns
+        -------
+        pd.Series
+            Indexed by minute since local midnight, from 0 to 1439.
+        """
+
+        if self._minute_values is None:
+            raise ValueError('The minute-of-day histogram is not '
+                             'available for a selection of days.')
+        if str(tz) != str(self.time_hist_tz):
+            raise ValueError(
+                'The minute-of-day histogram was aggregated in {}, '
+                'not {}.'.format(self.time_hist_tz, tz))
+        return pd.Series(self._minute_values.copy())
+
+
+def _set_time_index(transactions, time_column):
+    if time_column is not None:
+        transactions = transactions.set_index(
+            pd.DatetimeIndex(pd.to_datetime(transactions[time_column])))
+    return transactions
+
+
+def _local_times(index):
+    """int64 local wall times of a (possibly tz-aware) DatetimeIndex."""
+
+    if index.tz is None or str(index.tz) == 'UTC':
+        return index.asi8
+    return index.tz_localize(None).asi8
+
+
+def _bucket_days(index):
+    """
+    Buckets timestamps into days by flooring their int64 values.
+
+    Days are taken on local wall time, as DatetimeIndex.normalize does
+    for tz-aware indexes. Only the int64 timestamps are read, the index
+    itself is not normalized.
+
+    Returns
+    -------
+    days : pd.DatetimeIndex
+        Sorted unique days, at midnight in the index's time zone.
+    day_codes : np.ndarray
+        Position of each timestamp's day in days.
+    """
+
+    local_times = _local_times(index)
+    day_starts = local_times - local_times % NANOS_PER_DAY
+    days, day_codes = np.unique(day_starts, return_inverse=True)
+
+    days = pd.DatetimeIndex(days, name=index.name)
+    if index.tz is not None:
+        days = days.tz_localize(index.tz)
+
+    return days, day_codes
+
+
+def _sum_txn_vol(days, day_codes, amounts, prices):
+    """
+    Sums traded dollars and shares per day in one grouped reduction.
+
+    Both columns are summed by a single bincount over interleaved
+    (day, column) bins.
+    """
+
+    shares = np.abs(np.asarray(amounts, dtype=float))
+    values = shares * np.asarray(prices, dtype=float)
+
+    n_days = len(days)
+    bins = 2 * np.asarray(day_codes, dtype=np.int64)
+    sums = np.bincount(np.concatenate([bins, bins + 1]),
+                       weights=np.nan_to_num(np.concatenate([values,
+                                                             shares])),
+                       minlength=2 * n_days).reshape(n_days, 2)
+
+    daily_shares = sums[:, 1]
+    if np.asarray(amounts).dtype.kind in 'iu':
+        daily_shares = daily_shares.astype(np.asarray(amounts).dtype)
+
+    return pd.DataFrame(OrderedDict([('txn_volume', sums[:, 0]),
+                                     ('txn_shares', daily_shares)]),
+                        index=days)
+
+
+@memoize_by_object
+def _get_frame_txn_vol(transactions):
+    days, day_codes = _bucket_days(transactions.index)
+    return _sum_txn_vol(days, day_codes,
+                        transactions['amount'].values,
+                        transactions['price'].values)
+
+
+def to_transactions(transactions):
+    """
+    Converts a transactions DataFrame to a Transactions container.
+
+    Parameters
+    ----------
+    transactions : pd.DataFrame or Transactions
+        Prices and amounts of executed trades. One row per trade.
+         - See full explanation in tears.create_full_tear_sheet.
+
+    Returns
+    -------
+    Transactions
+        The container. Transactions objects (and None) are returned
+        unchanged.
+    """
+
+    if transactions is None or isinstance(transactions, (
+            Transactions, TransactionAggregator)):
+        return transactions
+    return Transactions(transactions)
+
+
+def to_transaction_frame(transactions):
+    """
+    Returns the transactions DataFrame of a Transactions container.
+
+    Parameters
+    ----------
+    transactions : pd.DataFrame or Transactions
+        Prices and amounts of executed trades. One row per trade.
+         - See full explanation in tears.create_full_tear_sheet.
+
+    Returns
+    -------
+    pd.DataFrame
+        The transactions. DataFrames (and None) are returned unchanged.
+    """
+
+    if isinstance(transactions, Transactions):
+        return transactions.frame
+    if isinstance(transactions, TransactionAggregator):
+        raise ValueError('This analysis needs the individual transactions, '
+                         'which a TransactionAggregator does not keep.')
+    return transactions
+
+
 def get_txn_vol(transactions):
     """
     Extract daily transaction data from set of transaction objects.
 
     Parameters
     ----------
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame, Transactions or TransactionAggregator
         Time series containing one row per symbol (and potentially
         duplicate datetime indices) and columns for amount and
         price.
@@ -96,18 +884,130 @@ def get_txn_vol(transactions):
     pd.DataFrame
         Daily transaction volume and number of shares.
          - See full explanation in tears.create_full_tear_sheet.
+
+    Notes
+    -----
+    The result is cached per transactions object, as it is needed by
+    several functions of a tear sheet. Call get_txn_vol.cache_clear()
+    after modifying a transactions DataFrame in place.
     """
 
-    txn_norm = transactions.copy()
-    txn_norm.index = txn_norm.index.normalize()
-    amounts = txn_norm.amount.abs()
-    prices = txn_norm.price
-    values = amounts * prices
-    daily_amounts = amounts.groupby(amounts.index).sum()
-    daily_values = values.groupby(values.index).sum()
-    daily_amounts.name = "txn_shares"
-    daily_values.name = "txn_volume"
-    return pd.concat([daily_values, daily_amounts], axis=1)
+    if isinstance(transactions, (Transactions, TransactionAggregator)):
+        return transactions.daily_txn_vol()
+    return _get_frame_txn_vol(transactions).copy()
+
+
+get_txn_vol.cache_clear = _get_frame_txn_vol.cache_clear
+
+
+def _minute_of_day(time_of_day):
+    """Minutes since midnight of a datetime.time or 'HH:MM' string."""
+
+    if hasattr(time_of_day, 'hour'):
+        return time_of_day.hour * 60 + time_of_day.minute
+    hours, minutes = time_of_day.split(':')
+    return (int(hours) * 60 + int(minutes)) % MINUTES_PER_DAY
+
+
+def session_time_bins(bin_minutes=5, session_start='9:30',
+                      session_end='16:00'):
+    """
+    Bins of the minutes of a trading session by time of day.
+
+    Bins are aligned to multiples of bin_minutes from midnight of the
+    session's first day, so the first and last bins may extend past
+    the session.
+
+    Parameters
+    ----------
+    bin_minutes : int, optional
+        Sizes of the bins in minutes, defaults to 5 minutes.
+    session_start, session_end : str or datetime.time, optional
+        Local start and end of the trading session.
+         - See full explanation in get_txn_time_hist.
+
+    Returns
+    -------
+    minutes : np.ndarray
+        Minute of the day of each minute of the session, counting on
+        past 1440 for sessions that wrap past midnight.
+    bins : np.ndarray
+        Bin of each minute of the session, from 0.
+    bin_starts : np.ndarray
+        Minute of the day of the start of each bin, counting on past
+        1440 as for minutes.
+    """
+
+    if bin_minutes < 1 or bin_minutes != int(bin_minutes):
+        raise ValueError('bin_minutes must be a positive whole number of '
+                         'minutes, got {}.'.format(bin_minutes))
+    bin_minutes = int(bin_minutes)
+
+    start = _minute_of_day(session_start)
+    end = _minute_of_day(session_end)
+    session_minutes = (end - start) % MINUTES_PER_DAY + 1
+    if start == end:
+        session_minutes = MINUTES_PER_DAY
+
+    minutes = start + np.arange(session_minutes)
+    grid = minutes // bin_minutes
+    bins = grid - grid[0]
+    bin_starts = (grid[0] + np.arange(bins[-1] + 1)) * bin_minutes
+
+    return minutes, bins, bin_starts
+
+
+def get_txn_time_hist(transactions, bin_minutes=5, tz='America/New_York',
+                      session_start='9:30', session_end='16:00',
+                      normalize=True):
+    """
+    Histogram of the dollars traded by time of day, over a trading
+    session.
+
+    Parameters
+    ----------
+    transactions : pd.DataFrame, Transactions or TransactionAggregator
+        Prices and amounts of executed trades. One row per trade.
+         - See full explanation in tears.create_full_tear_sheet.
+    bin_minutes : int, optional
+        Sizes of the bins in minutes, defaults to 5 minutes. Bins are
+        aligned to multiples of bin_minutes from midnight.
+         - See session_time_bins.
+    tz : str, optional
+        Time zone of the session times.
+    session_start, session_end : str or datetime.time, optional
+        Local start and end of the trading session, as 'HH:MM' strings
+        or datetime.time. Both ends are included. A session ending
+        before it starts wraps past midnight (e.g. '18:00' to '17:00'
+        for futures), and equal start and end cover the full 24 hours
+        (e.g. FX).
+    normalize : bool, optional
+        Return proportions of the dollars traded in the session rather
+        than dollars.
+
+    Returns
+    -------
+    pd.Series
+        Dollars (or proportion) traded in each bin, in session order,
+        indexed by the bin's start as 'HH:MM'.
+    """
+
+    transactions = to_transactions(transactions)
+    minutes, bins, bin_starts = session_time_bins(
+        bin_minutes, session_start=session_start, session_end=session_end)
+
+    # Traded value by minute of the day, rotated to start at the open.
+    by_minute = np.asarray(transactions.traded_value_by_minute(tz))
+    by_minute = np.roll(by_minute, -minutes[0])[:len(minutes)]
+
+    hist = np.bincount(bins, weights=by_minute)
+    if normalize:
+        hist = hist / hist.sum()
+
+    labels = ['{:02d}:{:02d}'.format(m // 60, m % 60)
+              for m in bin_starts % MINUTES_PER_DAY]
+
+    return pd.Series(hist, index=labels, name='trade_value')
 
 
 def adjust_returns_for_slippage(returns, positions, transactions,
@@ -123,7 +1023,7 @@ def adjust_returns_for_slippage(returns, positions, transactions,
     positions : pd.DataFrame
         Daily net position values.
          - See full explanation in create_full_tear_sheet.
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame, Transactions or TransactionAggregator
         Prices and amounts of executed trades. One row per trade.
          - See full explanation in create_full_tear_sheet.
     slippage_bps: int/float
@@ -157,7 +1057,7 @@ def get_turnover(positions, transactions, denominator='AGB'):
     positions : pd.DataFrame
         Contains daily position values including cash.
         - See full explanation in tears.create_full_tear_sheet
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame, Transactions or TransactionAggregator
         Prices and amounts of executed trades. One row per trade.
         - See full explanation in tears.create_full_tear_sheet
     denominator : str, optional
@@ -182,25 +1082,157 @@ def get_turnover(positions, transactions, denominator='AGB'):
     txn_vol = get_txn_vol(transactions)
     traded_value = txn_vol.txn_volume
 
-    if denominator == 'AGB':
-        # Actual gross book is the same thing as the algo's GMV
-        # We want our denom to be avg(AGB previous, AGB current)
-        AGB = positions.drop('cash', axis=1).abs().sum(axis=1)
-        denom = AGB.rolling(2).mean()
-
-        # Since the first value of pd.rolling returns NaN, we
-        # set our "day 0" AGB to 0.
-        denom.iloc[0] = AGB.iloc[0] / 2
-    elif denominator == 'portfolio_value':
-        denom = positions.sum(axis=1)
-    else:
+    if denominator not in TURNOVER_DENOMINATORS:
         raise ValueError(
             "Unexpected value for denominator '{}'. The "
             "denominator parameter must be either 'AGB'"
             " or 'portfolio_value'.".format(denominator)
         )
 
-    denom.index = denom.index.normalize()
+    denom = _turnover_denominators(positions)[denominator]
     turnover = traded_value.div(denom, axis='index')
     turnover = turnover.fillna(0)
     return turnover
+
+
+def _turnover_denominators(positions):
+    """
+    Daily denominators of turnover for each of TURNOVER_DENOMINATORS.
+
+    Parameters
+    ----------
+    positions : pd.DataFrame
+        Contains daily position values including cash.
+        - See full explanation in tears.create_full_tear_sheet
+
+    Returns
+    -------
+    pd.DataFrame
+        AGB and portfolio_value columns, indexed by normalized date.
+         - See get_turnover.
+    """
+
+    # Actual gross book is the same thing as the algo's GMV
+    # We want our denom to be avg(AGB previous, AGB current)
+    AGB = positions.drop('cash', axis=1).abs().sum(axis=1)
+    avg_AGB = AGB.rolling(2).mean()
+
+    # Since the first value of pd.rolling returns NaN, we
+    # set our "day 0" AGB to 0.
+    avg_AGB.iloc[0] = AGB.iloc[0] / 2
+
+    denoms = pd.DataFrame(OrderedDict([
+        ('AGB', avg_AGB),
+        ('portfolio_value', positions.sum(axis=1)),
+    ]))
+    denoms.index = denoms.index.normalize()
+    return denoms
+
+
+def _sparse_frame(matrix, index, columns, sparse):
+    if not sparse:
+        return pd.DataFrame(matrix.toarray(), index=index, columns=columns)
+    if hasattr(pd.DataFrame, 'sparse'):
+        return pd.DataFrame.sparse.from_spmatrix(matrix, index=index,
+                                                 columns=columns)
+    return pd.SparseDataFrame(matrix, index=index, columns=columns,
+                              default_fill_value=0)
+
+
+def get_turnover_breakdown(positions, transactions, sector_mappings=None,
+                           sparse=False):
+    """
+    Portfolio, per-symbol and per-sector turnover under both
+    denominators, in one pass over the transactions.
+
+    Traded dollar value is summed per (day, symbol) once, into a
+    sparse day x symbol matrix, and then scaled by each denominator.
+    Per-symbol turnover sums to the portfolio turnover, which makes it
+    easy to see which names drive trading costs.
+
+    Parameters
+    ----------
+    positions : pd.DataFrame
+        Contains daily position values including cash.
+        - See full explanation in tears.create_full_tear_sheet
+    transactions : pd.DataFrame, Transactions or TransactionAggregator
+        Prices and amounts of executed trades. One row per trade.
+        - See full explanation in tears.create_full_tear_sheet
+    sector_mappings : dict or pd.Series, optional
+        Security identifier to sector mapping.
+        Security ids as keys, sectors as values.
+         - If None, sector turnover is not computed.
+    sparse : boolean, optional
+        If True, return per-symbol and per-sector turnover as sparse
+        DataFrames, which is much smaller for wide books that trade
+        few names each day.
+
+    Returns
+    -------
+    portfolio_turnover : pd.DataFrame
+        Daily portfolio turnover, with a column per denominator
+        ('AGB' and 'portfolio_value').
+         - See get_turnover.
+    symbol_turnover : pd.DataFrame
+        Daily turnover of each traded symbol, with (denominator,
+        symbol) columns.
+    sector_turnover : pd.DataFrame or None
+        Daily turnover of each sector, with (denominator, sector)
+        columns. Symbols without a sector mapping are left out.
+    """
+
+    transactions = to_transactions(transactions)
+    denoms = _turnover_denominators(positions)
+
+    traded_value = transactions.daily_txn_vol().txn_volume
+    index = denoms.index.union(traded_value.index)
+    denoms = denoms.reindex(index)
+    traded_value = traded_value.reindex(index)
+
+    portfolio_turnover = denoms.rdiv(traded_value, axis='index').fillna(0)
+
+    symbol_codes, day_codes, _, values = transactions._symbol_day_sums()
+    rows = index.get_indexer(transactions.days)[day_codes]
+    symbols = transactions.symbols
+    traded = sp.sparse.csr_matrix((values, (rows, symbol_codes)),
+                                  shape=(len(index), len(symbols)))
+
+    if sector_mappings is not None:
+        sectors = pd.Series(sector_mappings).reindex(symbols)
+        unmapped = symbols[sectors.isnull().values]
+        if len(unmapped) > 0:
+            warnings.warn('Symbols {} have no sector mapping. They will not '
+                          'be included in sector turnover.'
+                          .format(', '.join(map(str, unmapped))),
+                          UserWarning)
+        mapped = np.flatnonzero(sectors.notnull().values)
+        sector_codes, sector_names = pd.factorize(sectors.values[mapped],
+                                                  sort=True)
+        membership = sp.sparse.csr_matrix(
+            (np.ones(len(mapped)), (mapped, sector_codes)),
+            shape=(len(symbols), len(sector_names)))
+        sector_traded = traded.dot(membership)
+
+    symbol_turnover = OrderedDict()
+    sector_turnover = OrderedDict()
+    for denominator in TURNOVER_DENOMINATORS:
+        # Days without a denominator have zero turnover, as in
+        # get_turnover.
+        with np.errstate(divide='ignore'):
+            scale = 1 / denoms[denominator].values
+        scale = sp.sparse.diags(np.where(np.isnan(scale), 0, scale))
+
+        symbol_turnover[denominator] = _sparse_frame(
+            scale.dot(traded), index, symbols, sparse)
+        if sector_mappings is not None:
+            sector_turnover[denominator] = _sparse_frame(
+                scale.dot(sector_traded), index,
+                pd.Index(sector_names), sparse)
+
+    symbol_turnover = pd.concat(symbol_turnover, axis=1)
+    if sector_mappings is not None:
+        sector_turnover = pd.concat(sector_turnover, axis=1)
+    else:
+        sector_turnover = None
+
+    return portfolio_turnover, symbol_turnover, sector_turnover
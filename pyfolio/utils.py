@@ -27,21 +27,28 @@ import empyrical.utils
 
 from . import pos
 from . import txn
+from .memoize import memoize_by_object
 
 APPROX_BDAYS_PER_MONTH = 21
 APPROX_BDAYS_PER_YEAR = 252
+APPROX_MINUTES_PER_DAY = 390
+APPROX_HOURS_PER_DAY = APPROX_MINUTES_PER_DAY / 60
 
 MONTHS_PER_YEAR = 12
 WEEKS_PER_YEAR = 52
 
 MM_DISPLAY_UNIT = 1000000.
 
+MINUTELY = 'minutely'
+HOURLY = 'hourly'
 DAILY = 'daily'
 WEEKLY = 'weekly'
 MONTHLY = 'monthly'
 YEARLY = 'yearly'
 
 ANNUALIZATION_FACTORS = {
+    MINUTELY: APPROX_BDAYS_PER_YEAR * APPROX_MINUTES_PER_DAY,
+    HOURLY: APPROX_BDAYS_PER_YEAR * APPROX_HOURS_PER_DAY,
     DAILY: APPROX_BDAYS_PER_YEAR,
     WEEKLY: WEEKS_PER_YEAR,
     MONTHLY: MONTHS_PER_YEAR
@@ -96,6 +103,117 @@ def format_asset(asset):
         return asset
 
 
+@memoize_by_object
+def _bar_minutes(index):
+    spacing = np.diff(index.values.astype('datetime64[ns]')
+                      .astype(np.int64))
+    return np.median(spacing) / 60e9
+
+
+def get_bar_minutes(returns):
+    """
+    Infers the bar size of a returns series from the median spacing
+    of its index.
+
+    The result is cached per index object, so returns and the series
+    derived from them are only scanned once.
+
+    Parameters
+    ----------
+    returns : pd.Series or pd.DataFrame
+        Returns of the strategy, noncumulative, with a DatetimeIndex.
+
+    Returns
+    -------
+    float
+        Median time between observations, in minutes. NaN if there are
+        fewer than two observations or the index holds no datetimes.
+    """
+
+    if not isinstance(returns.index, pd.DatetimeIndex) or \
+            len(returns.index) < 2:
+        return np.nan
+
+    return _bar_minutes(returns.index)
+
+
+def is_intraday_returns(returns):
+    """
+    Whether returns are sampled more frequently than once a day.
+
+    Parameters
+    ----------
+    returns : pd.Series or pd.DataFrame
+        Returns of the strategy, noncumulative, with a DatetimeIndex.
+
+    Returns
+    -------
+    boolean
+        True for minute or hourly bars.
+    """
+
+    return get_bar_minutes(returns) < 60 * 12
+
+
+def annualization_factor(returns):
+    """
+    Number of return observations per year.
+
+    Daily and lower frequency returns use the daily factor, matching
+    the behavior of the performance statistics for daily data.
+    Intraday returns are scaled by the number of bars in a trading day
+    of APPROX_MINUTES_PER_DAY minutes.
+
+    Parameters
+    ----------
+    returns : pd.Series or pd.DataFrame
+        Returns of the strategy, noncumulative, with a DatetimeIndex.
+
+    Returns
+    -------
+    float
+        Annualization factor.
+    """
+
+    if not is_intraday_returns(returns):
+        return ANNUALIZATION_FACTORS[DAILY]
+
+    bars_per_day = max(APPROX_MINUTES_PER_DAY / get_bar_minutes(returns), 1)
+    return APPROX_BDAYS_PER_YEAR * bars_per_day
+
+
+@memoize_by_object
+def _daily_returns(returns):
+    return returns.add(1).groupby(returns.index.normalize()).prod() - 1
+
+
+def to_daily_returns(returns):
+    """
+    Compounds intraday returns into daily returns.
+
+    Daily (or lower frequency) returns are passed through unchanged.
+    The roll-up is cached per returns object, so repeated calls, e.g.
+    from each plot in a tear sheet, only compute it once. Each call
+    returns a copy of the cached result, as get_txn_vol does, so
+    callers may modify it.
+
+    Parameters
+    ----------
+    returns : pd.Series or pd.DataFrame
+        Returns of the strategy, noncumulative, with a DatetimeIndex.
+
+    Returns
+    -------
+    pd.Series or pd.DataFrame
+        Daily returns, noncumulative.
+    """
+
+    if returns is None or not is_intraday_returns(returns):
+        return returns
+
+    return _daily_returns(returns).copy()
+
+
 def vectorize(func):
     """
     Decorator so that functions can be written to work on Series but
@@ -249,7 +367,7 @@ def detect_intraday(positions, transactions, threshold=0.25):
     positions : pd.DataFrame
         Daily net position values.
          - See full explanation in create_full_tear_sheet.
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame, txn.Transactions or txn.TransactionAggregator
         Prices and amounts of executed trades. One row per trade.
          - See full explanation in create_full_tear_sheet.
 
@@ -259,9 +377,8 @@ def detect_intraday(positions, transactions, threshold=0.25):
         True if an intraday strategy is detected.
     """
 
-    daily_txn = transactions.copy()
-    daily_txn.index = daily_txn.index.date
-    txn_count = daily_txn.groupby(level=0).symbol.nunique().sum()
+    transactions = txn.to_transactions(transactions)
+    txn_count = transactions.daily_symbol_counts().sum()
     daily_pos = positions.drop('cash', axis=1).replace(0, np.nan)
     return daily_pos.count(axis=1).sum() / txn_count < threshold
 
@@ -281,7 +398,7 @@ def check_intraday(estimate, returns, positions, transactions):
     positions : pd.DataFrame
         Daily net position values.
          - See full explanation in create_full_tear_sheet.
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame or txn.Transactions
         Prices and amounts of executed trades. One row per trade.
          - See full explanation in create_full_tear_sheet.
 
@@ -329,7 +446,7 @@ def estimate_intraday(returns, positions, transactions, EOD_hour=23):
     positions : pd.DataFrame
         Daily net position values.
          - See full explanation in create_full_tear_sheet.
-    transactions : pd.DataFrame
+    transactions : pd.DataFrame or txn.Transactions
         Prices and amounts of executed trades. One row per trade.
          - See full explanation in create_full_tear_sheet.
 
@@ -340,7 +457,7 @@ def estimate_intraday(returns, positions, transactions, EOD_hour=23):
     """
 
     # Construct DataFrame of transaction amounts
-    txn_val = transactions.copy()
+    txn_val = txn.to_transaction_frame(transactions).copy()
     txn_val.index.names = ['date']
     txn_val['value'] = txn_val.amount * txn_val.price
     txn_val = txn_val.reset_index().pivot_table(
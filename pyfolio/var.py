@@ -0,0 +1,299 @@
+#
+# Copyright 2018 Quantopian, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Rolling value at risk (VaR) and expected shortfall (CVaR) estimates.
+
+All estimates are expressed in returns space, i.e. a 5% VaR of -0.02
+means that losses larger than 2% are expected on 5% of days. This
+matches the sign convention of timeseries.value_at_risk.
+"""
+
+from __future__ import division
+
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+from .utils import APPROX_BDAYS_PER_YEAR
+
+HISTORICAL = 'historical'
+PARAMETRIC = 'parametric'
+CORNISH_FISHER = 'cornish_fisher'
+
+VAR_METHODS = (HISTORICAL, PARAMETRIC, CORNISH_FISHER)
+
+# Number of tail quantiles averaged when integrating the Cornish-Fisher
+# quantile function to obtain expected shortfall.
+CF_ES_GRID_SIZE = 50
+
+
+def _historical_tail(values, window, cutoff, min_periods):
+    """
+    Rolling historical quantile and tail mean of a 1-d array.
+
+    The non-NaN observations of the window are kept in a sorted list
+    that is updated incrementally: each step inserts the new
+    observation and deletes the one leaving the window, both located
+    by binary search, so consecutive windows are never re-sorted. The
+    quantile is then read off by index and the tail is a prefix of the
+    list.
+    """
+
+    n = len(values)
+    var = np.full(n, np.nan)
+    es = np.full(n, np.nan)
+    ordered = []
+    min_count = max(min_periods, 1)
+
+    for i in range(n):
+        x = values[i]
+        if x == x:
+            insort(ordered, x)
+        if i >= window:
+            x = values[i - window]
+            if x == x:
+                del ordered[bisect_left(ordered, x)]
+
+        count = len(ordered)
+        if count < min_count:
+            continue
+
+        pos = cutoff * (count - 1)
+        lo = int(pos)
+        hi = min(lo + 1, count - 1)
+        q = ordered[lo] + (pos - lo) * (ordered[hi] - ordered[lo])
+
+        k = max(bisect_right(ordered, q), 1)
+        var[i] = q
+        es[i] = sum(ordered[:k]) / k
+
+    return var, es
+
+
+def _cornish_fisher_z(z, skew, kurt):
+    """
+    Cornish-Fisher expansion of the standard normal quantile z given
+    skewness and excess kurtosis.
+    """
+
+    return (z +
+            (z ** 2 - 1) * skew / 6 +
+            (z ** 3 - 3 * z) * kurt / 24 -
+            (2 * z ** 3 - 5 * z) * skew ** 2 / 36)
+
+
+def _rolling_tail_risk_series(returns, window, cutoff, min_periods,
+                              horizons, methods):
+    """
+    Computes VaR and ES of a single return series for every requested
+    method and horizon. See rolling_tail_risk.
+    """
+
+    one_day = OrderedDict()
+
+    if HISTORICAL in methods:
+        var, es = _historical_tail(returns.values.astype(float), window,
+                                   cutoff, min_periods)
+        one_day[HISTORICAL] = (var, es)
+
+    if PARAMETRIC in methods or CORNISH_FISHER in methods:
+        rolling = returns.rolling(window, min_periods=min_periods)
+        mu = rolling.mean().values
+        sigma = rolling.std().values
+        z = stats.norm.ppf(cutoff)
+
+        if PARAMETRIC in methods:
+            var = mu + z * sigma
+            es = mu - sigma * stats.norm.pdf(z) / cutoff
+            one_day[PARAMETRIC] = (var, es)
+
+        if CORNISH_FISHER in methods:
+            skew = rolling.skew().values
+            kurt = rolling.kurt().values
+            var = mu + _cornish_fisher_z(z, skew, kurt) * sigma
+            # ES is the average quantile over the tail, integrated with
+            # the midpoint rule on a grid of tail probabilities.
+            grid = (np.arange(CF_ES_GRID_SIZE) + 0.5) / CF_ES_GRID_SIZE
+            z_grid = stats.norm.ppf(cutoff * grid)[:, np.newaxis]
+            es = mu + (_cornish_fisher_z(z_grid, skew, kurt)
+                       .mean(axis=0) * sigma)
+            one_day[CORNISH_FISHER] = (var, es)
+
+    out = OrderedDict()
+    for metric, i in (('VaR', 0), ('ES', 1)):
+        for method in methods:
+            for horizon in horizons:
+                out[(metric, method, horizon)] = \
+                    one_day[method][i] * np.sqrt(horizon)
+
+    out = pd.DataFrame(out, index=returns.index)
+    out.columns.names = ['metric', 'method', 'horizon']
+    return out
+
+
+def rolling_tail_risk(returns, window=APPROX_BDAYS_PER_YEAR, cutoff=0.05,
+                      horizons=(1, 10), methods=VAR_METHODS,
+                      min_periods=None):
+    """
+    Computes rolling value at risk and expected shortfall for several
+    estimation methods and horizons in a single pass.
+
+    Parameters
+    ----------
+    returns : pd.Series or pd.DataFrame
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+         - If a DataFrame, each column is treated as a separate strategy.
+    window : int, optional
+        Length of the rolling window, in days (default one year).
+    cutoff : float, optional
+        Tail probability of the VaR estimate, e.g. 0.05 for 95% VaR.
+    horizons : tuple of int, optional
+        Holding periods, in days. Multi-day estimates are obtained from
+        the one-day estimates with the square-root-of-time rule.
+    methods : tuple of str, optional
+        Any of 'historical', 'parametric' and 'cornish_fisher'.
+        - historical: empirical quantile of the window, kept in a
+          sorted window that is updated incrementally.
+        - parametric: Gaussian quantile from the rolling mean and
+          standard deviation.
+        - cornish_fisher: Gaussian quantile adjusted for the rolling
+          skewness and excess kurtosis.
+    min_periods : int, optional
+        Minimum number of non-NaN observations required for an estimate.
+        Defaults to window.
+
+    Returns
+    -------
+    pd.DataFrame
+        Rolling VaR and ES estimates. Columns are a MultiIndex of
+        (metric, method, horizon), with an additional outer 'strategy'
+        level if returns is a DataFrame.
+    """
+
+    for method in methods:
+        if method not in VAR_METHODS:
+            raise ValueError(
+                "Unexpected VaR method '{}'. Must be one of {}."
+                .format(method, ', '.join(VAR_METHODS)))
+
+    if min_periods is None:
+        min_periods = window
+
+    if returns.ndim == 1:
+        return _rolling_tail_risk_series(returns, window, cutoff,
+                                         min_periods, horizons, methods)
+
+    tail_risk = OrderedDict()
+    for name, strategy_returns in returns.iteritems():
+        tail_risk[name] = _rolling_tail_risk_series(strategy_returns,
+                                                    window, cutoff,
+                                                    min_periods, horizons,
+                                                    methods)
+    tail_risk = pd.concat(tail_risk, axis=1)
+    tail_risk.columns.names = ['strategy', 'metric', 'method', 'horizon']
+    return tail_risk
+
+
+def rolling_value_at_risk(returns, window=APPROX_BDAYS_PER_YEAR,
+                          cutoff=0.05, horizon=1, method=HISTORICAL,
+                          min_periods=None):
+    """
+    Determines the rolling value at risk (VaR) of a strategy.
+
+    Parameters
+    ----------
+    returns : pd.Series or pd.DataFrame
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    window : int, optional
+        Length of the rolling window, in days (default one year).
+    cutoff : float, optional
+        Tail probability of the VaR estimate, e.g. 0.05 for 95% VaR.
+    horizon : int, optional
+        Holding period, in days.
+    method : str, optional
+        Either 'historical', 'parametric' or 'cornish_fisher'.
+        - See full explanation in var.rolling_tail_risk.
+    min_periods : int, optional
+        Minimum number of non-NaN observations required for an estimate.
+        Defaults to window.
+
+    Returns
+    -------
+    pd.Series or pd.DataFrame
+        Rolling VaR, in the same shape as returns.
+    """
+
+    tail_risk = rolling_tail_risk(returns, window=window, cutoff=cutoff,
+                                  horizons=(horizon,), methods=(method,),
+                                  min_periods=min_periods)
+    return _select(tail_risk, returns, 'VaR')
+
+
+def rolling_expected_shortfall(returns, window=APPROX_BDAYS_PER_YEAR,
+                               cutoff=0.05, horizon=1, method=HISTORICAL,
+                               min_periods=None):
+    """
+    Determines the rolling expected shortfall (CVaR) of a strategy,
+    the mean return on days where the VaR is breached.
+
+    Parameters
+    ----------
+    returns : pd.Series or pd.DataFrame
+        Daily returns of the strategy, noncumulative.
+         - See full explanation in tears.create_full_tear_sheet.
+    window : int, optional
+        Length of the rolling window, in days (default one year).
+    cutoff : float, optional
+        Tail probability of the VaR estimate, e.g. 0.05 for 95% VaR.
+    horizon : int, optional
+        Holding period, in days.
+    method : str, optional
+        Either 'historical', 'parametric' or 'cornish_fisher'.
+        - See full explanation in var.rolling_tail_risk.
+    min_periods : int, optional
+        Minimum number of non-NaN observations required for an estimate.
+        Defaults to window.
+
+    Returns
+    -------
+    pd.Series or pd.DataFrame
+        Rolling expected shortfall, in the same shape as returns.
+    """
+
+    tail_risk = rolling_tail_risk(returns, window=window, cutoff=cutoff,
+                                  horizons=(horizon,), methods=(method,),
+                                  min_periods=min_periods)
+    return _select(tail_risk, returns, 'ES')
+
+
+def _select(tail_risk, returns, metric):
+    """
+    Extracts a single metric from the output of rolling_tail_risk,
+    reshaped to match returns.
+    """
+
+    if returns.ndim == 1:
+        out = tail_risk[metric].iloc[:, 0]
+        out.name = returns.name
+        return out
+
+    out = tail_risk.xs(metric, axis='columns', level='metric')
+    out.columns = out.columns.get_level_values('strategy')
+    return out